@@ -0,0 +1,88 @@
+import random
+import time
+
+from manager.klines_store import KlinesStore
+from manager.klines_update import KlinesUpdate
+from signal_detector.batch_reverse_mean_evaluator import BatchReverseMeanEvaluator
+from signal_detector.reverse_mean_signal_detector import ReverseMeanSignalDetector
+
+SYMBOL_COUNTS = (10, 100, 1000)
+CANDLES = 200
+CLOSES = 50
+INTERVAL = 60 * 1000
+
+
+class CollectingQueue:
+
+    def __init__(self):
+        self.symbols = []
+
+    def put_nowait(self, signal):
+        self.symbols.append(signal.symbol)
+
+
+def random_row(open_time, close):
+    return [open_time, repr(close), repr(close + 1), repr(close - 1), repr(close), '1.0', open_time + INTERVAL - 1,
+            '0', 1, '0', '0', '0']
+
+
+def run(symbol_count):
+    random.seed(symbol_count)
+    stores = []
+    prices = []
+    for index in range(symbol_count):
+        store = KlinesStore(symbol=f'SYM{index}USDT', period='1m')
+        price = random.uniform(1, 1000)
+        rows = []
+        for candle in range(CANDLES):
+            price *= 1 + random.gauss(0, 0.002)
+            rows.append(random_row(candle * INTERVAL, round(price, 4)))
+        store.merge(rows)
+        stores.append(store)
+        prices.append(price)
+
+    per_symbol_queue = CollectingQueue()
+    batch_queue = CollectingQueue()
+    detectors = []
+    evaluator = BatchReverseMeanEvaluator(period='1m')
+    for store in stores:
+        detector = ReverseMeanSignalDetector(app_config=None, symbol=store.symbol)
+        detector.add_signal_consumer(per_symbol_queue)
+        detectors.append(detector)
+        batch_detector = ReverseMeanSignalDetector(app_config=None, symbol=store.symbol, batch=True)
+        batch_detector.add_signal_consumer(batch_queue)
+        evaluator.add_detector(batch_detector)
+
+    per_symbol_time = 0.0
+    batch_time = 0.0
+    for close in range(CLOSES):
+        open_time = (CANDLES + close) * INTERVAL
+        updates = []
+        for index, store in enumerate(stores):
+            prices[index] *= 1 + random.gauss(0, 0.002)
+            klines = store.merge([random_row(open_time, round(prices[index], 4))])
+            updates.append(KlinesUpdate(symbol=store.symbol, period='1m', klines=klines, window=store.window()))
+
+        started = time.perf_counter()
+        for detector, update in zip(detectors, updates):
+            detector.detect_signal(update.window)
+        per_symbol_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        for update in updates:
+            evaluator.klines_queues[update.symbol].put_nowait(update)
+        evaluator.evaluate('1m')
+        batch_time += time.perf_counter() - started
+
+    assert per_symbol_queue.symbols == batch_queue.symbols
+    print(f"{symbol_count:>5} symbols  per symbol detectors {per_symbol_time / CLOSES * 1000:>8.2f} ms/close   "
+          f"batch {batch_time / CLOSES * 1000:>7.2f} ms/close   {len(batch_queue.symbols)} signals, same as per symbol")
+
+
+def main():
+    for symbol_count in SYMBOL_COUNTS:
+        run(symbol_count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from manager.klines_store import KlinesStore
+from signal_detector.reverse_mean_signal_detector import ReverseMeanSignalDetector
+
+CANDLES = 1000
+UPDATES = 3000
+INTERVAL = 60 * 1000
+
+
+def random_row(open_time, close):
+    return [open_time, repr(close), repr(close + 1), repr(close - 1), repr(close), '1.0', open_time + INTERVAL - 1,
+            '0', 1, '0', '0', '0']
+
+
+def pandas_signal(window, window_size=20, num_std=2):
+    # Reference implementation: the pandas path the detector used before the incremental engine
+    data = pd.DataFrame({'close': window.close}, index=pd.to_datetime(window.open_time, unit='ms'))
+    data['MA'] = data['close'].rolling(window=window_size).mean()
+    data['STD'] = data['close'].rolling(window=window_size).std()
+    data['Lower_Band'] = data['MA'] - (data['STD'] * num_std)
+    last_row = data.iloc[-1]
+    if last_row['close'] < last_row['Lower_Band']:
+        return 'BUY'
+    if last_row['close'] > last_row['MA']:
+        return 'SELL'
+    return None
+
+
+def engine_signal(detector, window):
+    detector.indicator_service.update(window)
+    detector.interval = window.period
+    return detector.compute_signal_type(last_close=float(window.close[-1]))
+
+
+def main():
+    random.seed(7)
+    store = KlinesStore(symbol='BTCUSDT', period='1m')
+    price = 30000.0
+    rows = []
+    for index in range(CANDLES):
+        price += random.gauss(0, 25)
+        rows.append(random_row(index * INTERVAL, round(price, 2)))
+    store.merge(rows)
+
+    detector = ReverseMeanSignalDetector(app_config=None, symbol='BTCUSDT')
+    detector.last_price = price
+    pandas_time = 0.0
+    engine_time = 0.0
+    mismatches = 0
+    signals = 0
+    open_time = (CANDLES - 1) * INTERVAL
+    for update in range(UPDATES):
+        # Mix updates of the open candle with new candles, like the live klines feed
+        if update % 3 == 0:
+            open_time += INTERVAL
+        price += random.gauss(0, 25)
+        store.merge([random_row(open_time, round(price, 2))])
+        window = store.window()
+
+        started = time.perf_counter()
+        expected = pandas_signal(window)
+        pandas_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = engine_signal(detector, window)
+        engine_time += time.perf_counter() - started
+
+        signals += expected is not None
+        mismatches += expected != actual
+
+    print(f"parity: {UPDATES} updates, {signals} signals, {mismatches} mismatches")
+    assert mismatches == 0, f"incremental bands disagree with pandas on {mismatches} updates"
+    print(f"pandas rolling  {pandas_time / UPDATES * 1e6:>10.1f} us/update")
+    print(f"incremental     {engine_time / UPDATES * 1e6:>10.1f} us/update")
+
+    started = time.perf_counter()
+    ticks = np.random.default_rng(7).normal(price, 25, 100000)
+    for tick in ticks:
+        detector.compute_signal_type(float(tick), tick=True)
+    print(f"tick evaluation {(time.perf_counter() - started) / len(ticks) * 1e6:>10.2f} us/tick")
+
+
+if __name__ == '__main__':
+    main()
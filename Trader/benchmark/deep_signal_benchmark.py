@@ -0,0 +1,76 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from manager.klines_store import KlinesStore
+from manager.klines_update import KlinesUpdate
+from signal_detector.deep_signal_detector import DeepSignalDetector
+from signal_detector.deep_signal_evaluator import DeepSignalEvaluator
+from signal_detector.deep_signal_model import DeepSignalModel, build_features, save_deep_signal_model
+
+BATCH_SIZES = (1, 10, 100, 1000, 5000)
+LOOKBACK = 32
+HIDDEN_LAYERS = (128, 64)
+REPEATS = 50
+INTERVAL = 60 * 1000
+
+
+class CollectingQueue:
+
+    def __init__(self):
+        self.signals = []
+
+    def put_nowait(self, signal):
+        self.signals.append(signal)
+
+
+def random_layers(rng):
+    sizes = (LOOKBACK + 2,) + HIDDEN_LAYERS + (3,)
+    return [(rng.normal(0, 1 / np.sqrt(fan_in), (fan_in, fan_out)).astype(np.float32),
+             np.zeros(fan_out, dtype=np.float32)) for fan_in, fan_out in zip(sizes[:-1], sizes[1:])]
+
+
+def random_closes(rng, batch_size):
+    returns = rng.normal(0, 0.002, (batch_size, LOOKBACK + 1))
+    return 100 * np.exp(np.cumsum(returns, axis=1))
+
+
+def main():
+    rng = np.random.default_rng(7)
+    path = os.path.join(tempfile.mkdtemp(), 'deep_signal.npz')
+    save_deep_signal_model(path, random_layers(rng), lookback=LOOKBACK)
+    model = DeepSignalModel(path)
+    print(f"MLP {LOOKBACK + 2} -> {' -> '.join(map(str, HIDDEN_LAYERS))} -> 3, NumPy on CPU")
+
+    for batch_size in BATCH_SIZES:
+        closes = random_closes(rng, batch_size)
+        model.predict(build_features(closes))
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            model.predict(build_features(closes))
+        elapsed = (time.perf_counter() - started) / REPEATS
+        print(f"batch {batch_size:>5}  {elapsed * 1000:>8.3f} ms/batch  {elapsed / batch_size * 1e6:>8.2f} us/symbol")
+
+    # End to end at a candle close: mailboxes, stacking, features, inference and signal dispatch
+    evaluator = DeepSignalEvaluator(period='1m', model=model, min_confidence=0.5, latency_budget=0.05)
+    consumer = CollectingQueue()
+    for index in range(1000):
+        detector = DeepSignalDetector(app_config=None, symbol=f'SYM{index}USDT')
+        detector.add_signal_consumer(consumer)
+        evaluator.add_detector(detector)
+        store = KlinesStore(symbol=detector.symbol, period='1m')
+        store.merge([[row * INTERVAL, '0', '0', '0', repr(float(close)), '0', row * INTERVAL + INTERVAL - 1, '0', 0, '0',
+                      '0', '0'] for row, close in enumerate(random_closes(rng, 1)[0])])
+        detector.klines_queue.put_nowait(KlinesUpdate(symbol=detector.symbol, period='1m', klines=[],
+                                                      window=store.window()))
+    started = time.perf_counter()
+    evaluator.evaluate('1m')
+    elapsed = time.perf_counter() - started
+    print(f"candle close, 1000 symbols  {elapsed * 1000:.2f} ms, {len(consumer.signals)} signals, "
+          f"{evaluator.over_budget} over the {evaluator.latency_budget * 1000:.0f}ms budget")
+
+
+if __name__ == '__main__':
+    main()
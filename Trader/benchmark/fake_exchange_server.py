@@ -0,0 +1,191 @@
+import itertools
+import json
+import math
+import threading
+import time
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from manager.rate_limiter import interval_suffix
+
+ORDER_PATH = '/api/v3/order'
+CANCEL_REPLACE_PATH = '/api/v3/order/cancelReplace'
+OPEN_ORDERS_PATH = '/api/v3/openOrders'
+ALL_ORDERS_PATH = '/api/v3/allOrders'
+EXCHANGE_INFO_PATH = '/api/v3/exchangeInfo'
+# Request weight and order count of each request of the order endpoints
+ORDER_ENDPOINT_COSTS = {
+    ('POST', ORDER_PATH): (1, 1),
+    ('DELETE', ORDER_PATH): (1, 0),
+    ('GET', ORDER_PATH): (4, 0),
+    ('POST', CANCEL_REPLACE_PATH): (1, 1),
+    ('GET', OPEN_ORDERS_PATH): (6, 0),
+    ('GET', ALL_ORDERS_PATH): (20, 0),
+    ('GET', EXCHANGE_INFO_PATH): (20, 0)
+}
+
+
+class FakeExchangeServer:
+    """Local stand-in of the exchange order endpoints, for loading the order gateway without touching the exchange.
+
+    Like the exchange, it counts request weight and orders in fixed windows, reports the usage in the
+    X-MBX-USED-WEIGHT-* and X-MBX-ORDER-COUNT-* headers and answers 429 with a Retry-After header over the limits.
+    Refused requests still use weight.
+    """
+
+    def __init__(self, weight_limit=6000, weight_interval=60, order_limit=100, order_interval=10, latency=0.005):
+        self.weight_limit = weight_limit
+        self.weight_interval = weight_interval
+        self.order_limit = order_limit
+        self.order_interval = order_interval
+        self.latency = latency
+        self.accepted = 0
+        self.throttled = 0
+        self.orders = {}
+        self.server = None
+        self.base_url = None
+        self.__weights = {}
+        self.__order_counts = {}
+        self.__order_ids = itertools.count(1)
+        self.__lock = threading.Lock()
+
+    def start(self):
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_POST(self):
+                exchange.handle(self)
+
+            def do_DELETE(self):
+                exchange.handle(self)
+
+            def do_GET(self):
+                exchange.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # Bursts of parallel requests would overflow the default listen backlog of 5
+            request_queue_size = 128
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fill(self, order_id):
+        with self.__lock:
+            order = self.orders[order_id]
+            order['status'] = 'FILLED'
+            order['executedQty'] = order['origQty']
+            order['cummulativeQuoteQty'] = str(Decimal(order['price']) * Decimal(order['origQty']))
+
+    def handle(self, handler):
+        url = urlparse(handler.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        time.sleep(self.latency)
+        costs = ORDER_ENDPOINT_COSTS.get((handler.command, url.path))
+        if costs is None:
+            self.__reply(handler, 404, {'code': -1, 'msg': 'Unknown path'}, {})
+            return
+        weight, orders = costs
+        now = time.time()
+        with self.__lock:
+            weight_window = int(now // self.weight_interval)
+            order_window = int(now // self.order_interval)
+            used_weight = self.__weights.get(weight_window, 0) + weight
+            self.__weights = {weight_window: used_weight}
+            order_count = self.__order_counts.get(order_window, 0)
+            headers = {
+                'X-MBX-USED-WEIGHT-' + interval_suffix(self.weight_interval).upper(): used_weight,
+                'X-MBX-ORDER-COUNT-' + interval_suffix(self.order_interval).upper(): order_count
+            }
+            if used_weight > self.weight_limit:
+                self.throttled += 1
+                retry_after = (weight_window + 1) * self.weight_interval - now
+                self.__reply(handler, 429, {'code': -1003, 'msg': 'Too many requests'}, headers, retry_after)
+                return
+            if order_count + orders > self.order_limit:
+                self.throttled += 1
+                retry_after = (order_window + 1) * self.order_interval - now
+                self.__reply(handler, 429, {'code': -1015, 'msg': 'Too many new orders'}, headers, retry_after)
+                return
+            order_count += orders
+            self.__order_counts = {order_window: order_count}
+            headers['X-MBX-ORDER-COUNT-' + interval_suffix(self.order_interval).upper()] = order_count
+            self.accepted += 1
+            status, body = self.__apply(handler.command, url.path, params)
+        self.__reply(handler, status, body, headers)
+
+    def __apply(self, command, path, params):
+        if path == EXCHANGE_INFO_PATH:
+            return 200, {'symbols': [{
+                'symbol': symbol,
+                'quoteAssetPrecision': 8,
+                'filters': [
+                    {'filterType': 'PRICE_FILTER', 'tickSize': '0.01000000'},
+                    {'filterType': 'LOT_SIZE', 'stepSize': '0.00001000', 'minQty': '0.00001000'}
+                ]
+            } for symbol in json.loads(params.get('symbols', '[]'))]}
+        if path == OPEN_ORDERS_PATH:
+            return 200, [order for order in self.orders.values()
+                         if order['status'] == 'NEW' and params.get('symbol') in (None, order['symbol'])]
+        if path == ALL_ORDERS_PATH:
+            start_id = int(params.get('orderId', 0))
+            orders = [order for order_id, order in sorted(self.orders.items())
+                      if order['symbol'] == params.get('symbol') and order_id >= start_id]
+            return 200, orders[:int(params.get('limit', 500))]
+        if path == CANCEL_REPLACE_PATH:
+            canceled = self.orders.get(int(params.get('cancelOrderId', 0)))
+            if canceled is None or canceled['status'] != 'NEW':
+                return 400, {'code': -2022, 'msg': 'Order cancel-replace failed.',
+                             'data': {'cancelResult': 'FAILURE', 'newOrderResult': 'NOT_ATTEMPTED'}}
+            canceled['status'] = 'CANCELED'
+            _, new_order = self.__apply('POST', ORDER_PATH, params)
+            return 200, {'cancelResult': 'SUCCESS', 'newOrderResult': 'SUCCESS', 'cancelResponse': canceled,
+                         'newOrderResponse': new_order}
+        if command == 'POST':
+            order_id = next(self.__order_ids)
+            order = {
+                'symbol': params.get('symbol'),
+                'orderId': order_id,
+                'clientOrderId': params.get('newClientOrderId', f'fake-{order_id}'),
+                'price': params.get('price', '0'),
+                'origQty': params.get('quantity', '0'),
+                'executedQty': '0',
+                'cummulativeQuoteQty': '0',
+                'status': 'NEW',
+                'type': params.get('type'),
+                'side': params.get('side')
+            }
+            self.orders[order['orderId']] = order
+            return 200, order
+        if 'orderId' in params:
+            order = self.orders.get(int(params['orderId']))
+        else:
+            order = next((order for order in self.orders.values()
+                          if order['clientOrderId'] == params.get('origClientOrderId')), None)
+        if order is None:
+            return 400, {'code': -2013, 'msg': 'Order does not exist.'}
+        if command == 'DELETE':
+            order['status'] = 'CANCELED'
+        return 200, order
+
+    def __reply(self, handler, status, body, headers, retry_after=None):
+        payload = json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        for key, value in headers.items():
+            handler.send_header(key, str(value))
+        if retry_after is not None:
+            handler.send_header('Retry-After', str(max(1, math.ceil(retry_after))))
+        handler.end_headers()
+        handler.wfile.write(payload)
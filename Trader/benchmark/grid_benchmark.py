@@ -0,0 +1,112 @@
+import itertools
+import random
+import time
+from decimal import Decimal
+
+from config.trader_config import TraderConfig
+from manager.order_gateway import OrderGateway
+from manager.symbol_filters import SymbolFilterCache, SymbolFilters
+from replay.simulated_spot_client import SimulatedSpotClient
+from trader.grid_trader import GridTrader
+from trader.model.trader import Trader
+
+LEVEL_COUNTS = (100, 1000, 5000)
+TICKS = 20000
+
+
+class NullDatabaseManager:
+    """Keeps nothing, but gives the trades ids and reports every write as done, like the database."""
+
+    trade_ids = itertools.count(1)
+
+    def save_trade(self, trade):
+        trade.id = next(self.trade_ids)
+
+    def save_trades(self, trades):
+        for trade in trades:
+            trade.id = next(self.trade_ids)
+
+    def update_trade(self, trade):
+        pass
+
+    def update_trades(self, trades):
+        return True
+
+    def update_trader(self, trader):
+        pass
+
+
+class LegacyGridTrader(GridTrader):
+    """Per tick handling before the grid book: both passes scan every level."""
+
+    def update_orders(self):
+        if len(self.current_trades) < self.max_trades and len(self.grids) > 0:
+            for grid in self.grids:
+                if grid.in_price_range:
+                    if self.last_price < grid.start:
+                        if self.trade_grid.get(grid.id) is None:
+                            trade = self.open_position()
+                            self.trade_grid[grid.id] = trade
+                    if self.last_price > grid.end:
+                        trade = self.trade_grid.get(grid.id, None)
+                        if trade is not None and trade.status == 'filled':
+                            self.close_position(trade=trade)
+                            self.trade_grid[grid.id] = None
+
+    def update_grid_in_range(self):
+        for grid in self.grids:
+            if grid.start <= self.last_price <= grid.end:
+                grid.in_price_range = True
+            else:
+                grid.in_price_range = False
+
+
+def build_trader(trader_class, level_count):
+    trader = Trader()
+    trader.id = 1
+    trader.symbol = 'BTCUSDT'
+    trader.trade_quantity = '0.001'
+    trader.total_reserved_amount = Decimal('0')
+    instance = trader_class(api_config=None, database_manager=NullDatabaseManager(), trader=trader,
+                            client=SimulatedSpotClient())
+    instance.trader_config = TraderConfig(symbol='BTCUSDT', capital=1000, detector='GridSignalDetector',
+                                          trade_quantity='0.001', grid_gap=10)
+    instance.max_trades = 10 ** 9
+    instance.symbol_filters = SymbolFilterCache()
+    instance.symbol_filters.put(SymbolFilters(symbol='BTCUSDT', tick_size='0.01000000', step_size='0.00001000',
+                                              min_quantity='0.00001000', min_notional='5.00000000'))
+    # Not started, the orders wait in the gateway: only the price thread is measured
+    instance.order_gateway = OrderGateway(name=instance.name, queue_size=TICKS)
+    instance.create_or_update_grids(Decimal('30000'), Decimal('30000') + 10 * level_count)
+    return instance
+
+
+def run(trader_class, level_count, prices):
+    instance = build_trader(trader_class, level_count)
+    started = time.perf_counter()
+    for price in prices:
+        instance.last_price = price
+        instance.update_orders()
+        instance.update_grid_in_range()
+    elapsed = time.perf_counter() - started
+    return elapsed, len(instance.current_trades)
+
+
+def main():
+    for level_count in LEVEL_COUNTS:
+        random.seed(level_count)
+        price = 30000 + 5 * level_count
+        prices = []
+        for _ in range(TICKS):
+            price += random.gauss(0, 3)
+            prices.append(Decimal(str(round(price, 2))))
+        legacy_time, legacy_trades = run(LegacyGridTrader, level_count, prices)
+        book_time, book_trades = run(GridTrader, level_count, prices)
+        assert legacy_trades == book_trades
+        print(f"{level_count:>5} levels  scan {legacy_time / TICKS * 1e6:>9.2f} us/tick ({TICKS / legacy_time:>9,.0f} "
+              f"ticks/s)   grid book {book_time / TICKS * 1e6:>6.2f} us/tick ({TICKS / book_time:>9,.0f} ticks/s)   "
+              f"{book_trades} trades opened by both")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+import threading
+import time
+from decimal import Decimal
+
+from binance.spot import Spot
+from requests.adapters import HTTPAdapter
+
+from benchmark.fake_exchange_server import FakeExchangeServer
+from benchmark.grid_benchmark import NullDatabaseManager, build_trader
+from manager.order_gateway import OrderGateway
+from trader.abstract_trader import STATUS_BUY_OPEN
+from trader.grid_trader import GridTrader
+from trader.model.trade import Trade
+
+LEVELS = 100
+OPEN_ORDERS = 16
+LATENCY = 0.02
+
+
+class CountingDatabaseManager(NullDatabaseManager):
+
+    def __init__(self):
+        self.writes = 0
+        self.written = threading.Event()
+
+    def update_trade(self, trade):
+        self.writes += 1
+
+    def update_trades(self, trades):
+        self.writes += 1
+        return True
+
+    def update_trader(self, trader):
+        # Last write of a batch, once every order is answered
+        self.writes += 1
+        self.written.set()
+
+
+def build_client(server):
+    client = Spot(api_key='key', api_secret='secret', base_url=server.base_url, show_limit_usage=True)
+    client.session.mount('http://', HTTPAdapter(pool_maxsize=OPEN_ORDERS))
+    return client
+
+
+def build_grid_trader(server):
+    instance = build_trader(GridTrader, LEVELS)
+    instance.client = build_client(server)
+    instance.database_manager = CountingDatabaseManager()
+    instance.order_gateway = OrderGateway(name=instance.name, workers=OPEN_ORDERS, queue_size=1000)
+    instance.order_gateway.start()
+    # Open buy orders resting on the top levels of the grid
+    for grid in instance.grids.grids[-OPEN_ORDERS:]:
+        order = instance.client.new_order(symbol='BTCUSDT', side='BUY', type='LIMIT', quantity='0.001',
+                                          timeInForce='GTC', price=str(grid.start))['data']
+        trade = Trade()
+        trade.buy_id = order['orderId']
+        trade.buy_client_id = order['clientOrderId']
+        trade.status = STATUS_BUY_OPEN
+        trade.quantity = Decimal('0.001')
+        trade.reserved_amount = grid.start * trade.quantity
+        instance.current_trades.append(trade)
+        instance.trade_grid[grid.id] = trade
+        instance.trade_levels[trade] = grid.id
+    return instance
+
+
+def replace_one_at_a_time(instance, moves):
+    # Rebuild with the single order primitives: cancel, place, then write each trade
+    client = instance.client
+    for trade, price in moves:
+        client.cancel_order(symbol='BTCUSDT', orderId=trade.buy_id)
+        order = client.new_order(symbol='BTCUSDT', side='BUY', type='LIMIT', quantity=str(trade.quantity),
+                                 timeInForce='GTC', price=str(price))['data']
+        trade.buy_id = order['orderId']
+        instance.database_manager.update_trade(trade)
+        instance.database_manager.update_trader(instance.trader)
+
+
+def main():
+    server = FakeExchangeServer(latency=LATENCY)
+    server.start()
+
+    instance = build_grid_trader(server)
+    moves = [(trade, Decimal('29000') - index * 10) for index, trade in enumerate(instance.current_trades)]
+    started = time.perf_counter()
+    replace_one_at_a_time(instance, moves)
+    sequential_time = time.perf_counter() - started
+    sequential_writes = instance.database_manager.writes
+
+    instance = build_grid_trader(server)
+    max_price = instance.max_price
+    # The range jumps down: the top levels leave the grid and their orders move to the levels below the price
+    instance.last_price = max_price - 10 * LEVELS
+    started = time.perf_counter()
+    instance.create_or_update_grids(max_price - 20 * LEVELS, max_price - 10 * LEVELS + 10 * OPEN_ORDERS)
+    instance.database_manager.written.wait(timeout=10)
+    batched_time = time.perf_counter() - started
+    moved = sum(trade.buy_id is not None and trade in instance.trade_grid.values()
+                for trade in instance.current_trades)
+    server.stop()
+
+    print(f"{OPEN_ORDERS} open orders moved, {LATENCY * 1e3:.0f} ms per round trip")
+    print(f"one at a time      {sequential_time * 1e3:>7.1f} ms   {sequential_writes} database writes")
+    print(f"cancel-replace     {batched_time * 1e3:>7.1f} ms   {instance.database_manager.writes} database writes   "
+          f"{moved} orders on new levels")
+    assert moved == OPEN_ORDERS
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import json
+import random
+import tracemalloc
+
+import pandas as pd
+
+from manager.klines_store import KlinesStore, KLINES_LIMIT
+
+CONSUMERS_PER_SYMBOL = 2
+INTERVAL = 60 * 1000
+
+
+def build_payload():
+    random.seed(42)
+    price = 100.0
+    rows = []
+    for index in range(KLINES_LIMIT):
+        open_time = 1700000000000 + index * INTERVAL
+        close = price + random.uniform(-1, 1)
+        rows.append([open_time, f"{price:.8f}", f"{max(price, close) + 0.5:.8f}", f"{min(price, close) - 0.5:.8f}",
+                     f"{close:.8f}", f"{random.uniform(1, 100):.8f}", open_time + INTERVAL - 1,
+                     f"{random.uniform(100, 10000):.8f}", random.randint(1, 500), "1.00000000", "100.00000000", "0"])
+        price = close
+    return json.dumps(rows)
+
+
+def legacy_frame(data):
+    columns = [
+        'timestamp', 'open', 'high', 'low', 'close', 'volume',
+        'close_time', 'quote_asset_volume', 'trades',
+        'taker_base_vol', 'taker_quote_vol', 'ignore'
+    ]
+    data = pd.DataFrame(data, columns=columns)
+    for col in ['open', 'high', 'low', 'close', 'volume']:
+        data[col] = pd.to_numeric(data[col])
+    data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
+    data.set_index('timestamp', inplace=True)
+    return data[['open', 'high', 'low', 'close', 'volume']]
+
+
+def measure(name, build):
+    tracemalloc.start()
+    retained = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name:<40} retained {current / 1024:>9.1f} KiB   peak {peak / 1024:>9.1f} KiB")
+    return retained
+
+
+def main():
+    payload = build_payload()
+
+    def before():
+        # Every consumer got the parsed JSON list and built its own DataFrame out of it
+        rows = json.loads(payload)
+        return rows, [legacy_frame(rows) for _ in range(CONSUMERS_PER_SYMBOL)]
+
+    def after():
+        store = KlinesStore(symbol='BTCUSDT', period='1m')
+        store.merge(json.loads(payload))
+        window = store.window()
+        return store, [window for _ in range(CONSUMERS_PER_SYMBOL)]
+
+    print(f"Per symbol footprint, {KLINES_LIMIT} candles and {CONSUMERS_PER_SYMBOL} consumers")
+    measure('before: raw rows + DataFrame per consumer', before)
+    store, windows = measure('after: shared columnar window', after)
+    print(f"window columns: {windows[0].nbytes() / 1024:.1f} KiB, store buffers sized for {store.capacity} candles")
+    assert (windows[0].close == legacy_frame(json.loads(payload))['close'].to_numpy()).all()
+
+
+if __name__ == '__main__':
+    main()
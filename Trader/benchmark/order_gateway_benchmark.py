@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from benchmark.grid_benchmark import NullDatabaseManager, build_trader
+from manager.order_gateway import OrderGateway
+from manager.order_router import OrderRouter
+from replay.simulated_spot_client import SimulatedSpotClient
+from trader.grid_trader import GridTrader
+
+LEVELS = 200
+TICKS = 3000
+ORDER_LATENCY = 0.02
+# Prices arrive at most every millisecond, the wait is not part of the tick time
+TICK_INTERVAL = 0.001
+
+
+class SlowSpotClient(SimulatedSpotClient):
+    """Simulated exchange answering each order after a network round trip."""
+
+    def new_order(self, symbol, side, type, **kwargs):
+        time.sleep(ORDER_LATENCY)
+        return super().new_order(symbol, side, type, **kwargs)
+
+
+class SynchronousOrderGateway(OrderGateway):
+    """Places the order on the caller's thread, like the traders did before the gateway."""
+
+    def submit(self, request):
+        try:
+            response = request.submit()
+        except Exception as e:
+            if request.on_failure is not None:
+                request.on_failure(e)
+        else:
+            if request.on_success is not None:
+                request.on_success(response)
+        return True
+
+
+class CountingDatabaseManager(NullDatabaseManager):
+
+    def __init__(self):
+        self.saved = 0
+
+    def save_trades(self, trades):
+        for trade in trades:
+            self.saved += 1
+            trade.id = self.saved
+
+
+def run(gateway_class, prices):
+    client = SlowSpotClient()
+    router = OrderRouter()
+    client.set_order_queues([router])
+    instance = build_trader(GridTrader, LEVELS)
+    instance.trader.remaining_capital = Decimal('1000')
+    instance.trader.profit = Decimal('0')
+    instance.client = client
+    instance.database_manager = CountingDatabaseManager()
+    instance.order_router = router
+    instance.order_gateway = gateway_class(name=instance.name, workers=4, queue_size=1000)
+    instance.order_gateway.start()
+    instance.init_order_update_handling()
+
+    tick_times = []
+    for price in prices:
+        started = time.perf_counter()
+        client.on_price('BTCUSDT', price)
+        instance.last_price = price
+        instance.update_orders()
+        instance.update_grid_in_range()
+        tick_times.append(time.perf_counter() - started)
+        time.sleep(TICK_INTERVAL)
+    instance.order_gateway.queue.join()
+    # Let the last execution reports reach the trader
+    time.sleep(0.5)
+    instance.order_queue.join()
+    instance.stop_event.set()
+    instance.order_gateway.stop()
+    return instance, tick_times
+
+
+def main():
+    random.seed(11)
+    price = 30000 + 5 * LEVELS
+    prices = []
+    for _ in range(TICKS):
+        price += random.gauss(0, 3)
+        prices.append(Decimal(str(round(price, 2))))
+
+    for label, gateway_class in (('synchronous', SynchronousOrderGateway), ('order gateway', OrderGateway)):
+        instance, tick_times = run(gateway_class, prices)
+        trades = instance.current_trades + instance.trade_history
+        unacknowledged = sum(trade.buy_id is None for trade in trades)
+        print(f"{label:<14} mean {statistics.mean(tick_times) * 1e3:>7.3f} ms/tick   "
+              f"max {max(tick_times) * 1e3:>7.2f} ms/tick   {len(trades)} trades, {len(instance.trade_history)} closed, "
+              f"{instance.database_manager.saved} saved, {unacknowledged} unacknowledged, "
+              f"{len(instance.client_orders)} client orders open")
+        assert unacknowledged == 0
+        assert instance.database_manager.saved == len(trades)
+
+
+if __name__ == '__main__':
+    main()
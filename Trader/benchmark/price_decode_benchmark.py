@@ -0,0 +1,70 @@
+import json
+import random
+import time
+from decimal import Decimal
+
+from manager.price_manager import PriceManager
+from utils.conflating_mailbox import ConflatingMailbox
+
+MESSAGES = 200000
+SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT', 'XRPUSDT', 'AVAXUSDT']
+PRICE_CHANGE_RATIO = 0.3
+
+
+def build_messages():
+    random.seed(42)
+    prices = {symbol: 100.0 + index for index, symbol in enumerate(SYMBOLS)}
+    messages = []
+    for trade_id in range(MESSAGES):
+        symbol = random.choice(SYMBOLS)
+        if random.random() < PRICE_CHANGE_RATIO:
+            prices[symbol] += random.choice([-0.01, 0.01])
+        payload = {
+            "stream": symbol.lower() + "@trade",
+            "data": {
+                "e": "trade", "E": 1700000000000 + trade_id, "s": symbol, "t": trade_id,
+                "p": f"{prices[symbol]:.8f}", "q": "0.01000000", "T": 1700000000000 + trade_id,
+                "m": random.random() < 0.5, "M": True
+            }
+        }
+        messages.append(json.dumps(payload, separators=(',', ':')))
+    return messages
+
+
+class LegacyDecoder:
+
+    def __init__(self, consumers_queues):
+        self.last_prices = {}
+        self.consumers_queues = consumers_queues
+
+    def update_price(self, message):
+        data = json.loads(message)
+        payload = data['data']
+        symbol = payload['s']
+        received_price = Decimal(payload['p'])
+        if received_price != self.last_prices.get(symbol):
+            self.last_prices[symbol] = received_price
+            notification = {"last_price": received_price, "symbol": symbol}
+            for mailbox in self.consumers_queues.get(symbol, []):
+                mailbox.put_nowait(notification)
+
+
+def run(name, update_price, messages):
+    started = time.process_time()
+    for message in messages:
+        update_price(message)
+    elapsed = time.process_time() - started
+    print(f"{name:<10} {len(messages) / elapsed:>12,.0f} msg/s/core")
+
+
+def main():
+    messages = build_messages()
+    consumers_queues = {symbol: [ConflatingMailbox(), ConflatingMailbox()] for symbol in SYMBOLS}
+    legacy = LegacyDecoder(consumers_queues)
+    price_manager = PriceManager(app_config=None, io_reactor=None, consumers_queues=consumers_queues)
+    run('before', legacy.update_price, messages)
+    run('after', price_manager._PriceManager__update_price, messages)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import statistics
+import threading
+import time
+
+from binance.error import ClientError
+from binance.spot import Spot
+
+from benchmark.fake_exchange_server import FakeExchangeServer
+from manager.order_gateway import OrderGateway, OrderRequest, PRIORITY_CANCEL, WEIGHT_CANCEL
+from manager.rate_limiter import RateLimiter
+
+TRADERS = 10
+ORDERS_PER_TRADER = 15
+WEIGHT_LIMIT = 200
+WEIGHT_INTERVAL = 2
+ORDER_LIMIT = 30
+ORDER_INTERVAL = 1
+
+
+def build_server():
+    server = FakeExchangeServer(weight_limit=WEIGHT_LIMIT, weight_interval=WEIGHT_INTERVAL, order_limit=ORDER_LIMIT,
+                                order_interval=ORDER_INTERVAL)
+    server.start()
+    return server
+
+
+def build_client(server, show_limit_usage=False):
+    return Spot(api_key='key', api_secret='secret', base_url=server.base_url, show_limit_usage=show_limit_usage)
+
+
+def new_order(client, trader, index):
+    return client.new_order(symbol='BTCUSDT', side='BUY', type='LIMIT', quantity='0.001', timeInForce='GTC',
+                            price='30000', newClientOrderId=f'{trader}-{index}')
+
+
+def retry_on_limit(call):
+    # What a trader does alone: waits what the exchange asks, then tries again
+    while True:
+        try:
+            return call()
+        except ClientError as e:
+            if e.status_code != 429:
+                raise
+            time.sleep(int(e.header.get('Retry-After', 1)))
+
+
+def run_independent(server):
+    cancel_latencies = []
+
+    def trade(trader):
+        client = build_client(server)
+        for index in range(ORDERS_PER_TRADER):
+            order = retry_on_limit(lambda: new_order(client, trader, index))
+            started = time.perf_counter()
+            retry_on_limit(lambda: client.cancel_order(symbol='BTCUSDT', orderId=order['orderId']))
+            cancel_latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=trade, args=(trader,)) for trader in range(TRADERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return cancel_latencies
+
+
+def run_gateway(server):
+    client = build_client(server, show_limit_usage=True)
+    gateway = OrderGateway(name='OrderGateway', workers=4, queue_size=1000,
+                           rate_limiter=RateLimiter(weight_limit=WEIGHT_LIMIT, weight_interval=WEIGHT_INTERVAL,
+                                                    order_limit=ORDER_LIMIT, order_interval=ORDER_INTERVAL))
+    gateway.start()
+    cancel_latencies = []
+    done = threading.Semaphore(0)
+
+    def on_cancelled(started):
+        cancel_latencies.append(time.perf_counter() - started)
+        done.release()
+
+    def on_placed(order):
+        started = time.perf_counter()
+        gateway.submit(OrderRequest(name=f"cancel {order['orderId']}",
+                                    submit=lambda: client.cancel_order(symbol='BTCUSDT', orderId=order['orderId']),
+                                    on_success=lambda _: on_cancelled(started),
+                                    priority=PRIORITY_CANCEL, weight=WEIGHT_CANCEL, orders=0))
+
+    # Traders fire their buys at once, the gateway spreads them within the limits
+    for trader in range(TRADERS):
+        for index in range(ORDERS_PER_TRADER):
+            gateway.submit(OrderRequest(name=f'buy {trader}-{index}',
+                                        submit=lambda trader=trader, index=index: new_order(client, trader, index),
+                                        on_success=on_placed))
+    for _ in range(TRADERS * ORDERS_PER_TRADER):
+        done.acquire()
+    gateway.stop()
+    return cancel_latencies
+
+
+def run_saturated(server):
+    # Buys queued beyond the order budget, then one cancel: it must not wait for the buys the workers would hold
+    client = build_client(server, show_limit_usage=True)
+    gateway = OrderGateway(name='OrderGateway', workers=4, queue_size=1000,
+                           rate_limiter=RateLimiter(weight_limit=WEIGHT_LIMIT, weight_interval=WEIGHT_INTERVAL,
+                                                    order_limit=ORDER_LIMIT, order_interval=ORDER_INTERVAL))
+    gateway.start()
+    order = gateway.call(OrderRequest(name='buy 0', submit=lambda: new_order(client, 'saturated', 0)))
+    for index in range(1, 3 * ORDER_LIMIT):
+        gateway.submit(OrderRequest(name=f'buy {index}',
+                                    submit=lambda index=index: new_order(client, 'saturated', index)))
+    time.sleep(0.5)
+    cancelled = threading.Event()
+    started = time.perf_counter()
+    gateway.submit(OrderRequest(name=f"cancel {order['orderId']}",
+                                submit=lambda: client.cancel_order(symbol='BTCUSDT', orderId=order['orderId']),
+                                on_success=lambda _: cancelled.set(),
+                                priority=PRIORITY_CANCEL, weight=WEIGHT_CANCEL, orders=0))
+    cancelled.wait(timeout=10)
+    latency = time.perf_counter() - started
+    gateway.stop()
+    return latency
+
+
+def main():
+    orders = TRADERS * ORDERS_PER_TRADER
+    for label, run in (('independent', run_independent), ('shared gateway', run_gateway)):
+        server = build_server()
+        started = time.perf_counter()
+        cancel_latencies = run(server)
+        elapsed = time.perf_counter() - started
+        server.stop()
+        print(f"{label:<15} {orders} buys + cancels in {elapsed:>5.2f} s   {server.throttled:>4} requests refused "
+              f"with 429   cancel latency median {statistics.median(cancel_latencies) * 1e3:>7.1f} ms, "
+              f"max {max(cancel_latencies) * 1e3:>7.1f} ms")
+    server = build_server()
+    latency = run_saturated(server)
+    server.stop()
+    print(f"order budget exhausted, {3 * ORDER_LIMIT} buys queued   cancel latency {latency * 1e3:>7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
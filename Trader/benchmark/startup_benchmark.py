@@ -0,0 +1,145 @@
+import logging
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from benchmark.fake_exchange_server import FakeExchangeServer
+from benchmark.grid_rebuild_benchmark import build_client
+from config.order_gateway_config import OrderGatewayConfig
+from manager.order_gateway import OrderGateway
+from manager.symbol_filters import SymbolFilterCache
+from manager.trader_manager import GRID_SIGNAL_DETECTOR, TraderManager
+from trader.abstract_trader import STATUS_BUY_OPEN, STATUS_FILLED
+from trader.grid_trader import GridTrader
+from trader.model.trade import Trade
+from trader.model.trader import Trader
+
+SYMBOLS = ('BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'SOLUSDT')
+TRADES_PER_TRADER = 100
+LATENCY = 0.02
+WORKERS = 8
+
+
+class StartupDatabaseManager:
+    """Traders and open trades as stored before a restart, each load returning fresh trades."""
+
+    def __init__(self, orders):
+        self.orders = orders
+        self.writes = 0
+
+    def load_all_traders(self):
+        traders = []
+        for index, symbol in enumerate(SYMBOLS):
+            trader = Trader()
+            trader.id = index + 1
+            trader.symbol = symbol
+            trader.signal_detector = GRID_SIGNAL_DETECTOR
+            trader.trade_quantity = '0.001'
+            trader.remaining_capital = Decimal('100000')
+            trader.profit = Decimal('0')
+            trader.total_reserved_amount = Decimal('0')
+            traders.append(trader)
+        return traders
+
+    def load_trades_by_trader(self, trader_id, statuses_not=('closed', 'canceled')):
+        trades = []
+        for index, order in enumerate(self.orders[SYMBOLS[trader_id - 1]]):
+            trade = Trade()
+            trade.id = trader_id * 1000 + index
+            trade.buy_id = order['orderId']
+            trade.buy_client_id = order['clientOrderId']
+            trade.status = STATUS_BUY_OPEN
+            trade.quantity = Decimal(order['origQty'])
+            trade.reserved_amount = Decimal(order['price']) * trade.quantity
+            trade.open_date = '01/01/2024T00:00'
+            trades.append(trade)
+        return trades
+
+    def update_trade(self, trade):
+        self.writes += 1
+
+    def update_trades(self, trades):
+        self.writes += 1
+        return True
+
+    def update_trader(self, trader):
+        self.writes += 1
+
+
+def place_orders(server, client):
+    # Open buy orders left by the traders before the restart, one in two filled while they were stopped
+    orders = {}
+    for symbol in SYMBOLS:
+        orders[symbol] = []
+        for index in range(TRADES_PER_TRADER):
+            order = client.new_order(symbol=symbol, side='BUY', type='LIMIT', quantity='0.001', timeInForce='GTC',
+                                     price=str(20000 + index))['data']
+            orders[symbol].append(order)
+            if index % 2:
+                server.fill(order['orderId'])
+    return orders
+
+
+def start_one_by_one(database_manager, client):
+    # Startup before the bulk reconciliation: traders one after another, one order query per open trade
+    order_gateway = OrderGateway(name='OrderGateway', workers=WORKERS)
+    order_gateway.start()
+    symbol_filters = SymbolFilterCache(client=client, order_gateway=order_gateway)
+    symbol_filters.load(SYMBOLS)
+    traders = []
+    for trader in database_manager.load_all_traders():
+        instance = GridTrader(api_config=None, database_manager=database_manager, trader=trader, client=client)
+        instance.order_gateway = order_gateway
+        instance.symbol_filters = symbol_filters
+        instance.load_trades()
+        instance.reconcile_orders({})
+        traders.append(instance)
+    return traders
+
+
+def start_in_bulk(database_manager, client):
+    app_config = SimpleNamespace(api_config=None, traders_config=[],
+                                 order_gateway_config=OrderGatewayConfig(workers=WORKERS))
+    trader_manager = TraderManager(app_config, database_manager=database_manager, spot_client=client)
+    trader_manager.start()
+    return trader_manager.traders
+
+
+def filled(traders):
+    return sum(trade.status == STATUS_FILLED for trader in traders for trade in trader.current_trades)
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    server = FakeExchangeServer(weight_limit=10 ** 6, order_limit=10 ** 6, latency=LATENCY)
+    server.start()
+    client = build_client(server)
+    orders = place_orders(server, client)
+
+    database_manager = StartupDatabaseManager(orders)
+    accepted = server.accepted
+    started = time.perf_counter()
+    traders = start_one_by_one(database_manager, client)
+    sequential_time = time.perf_counter() - started
+    sequential_requests = server.accepted - accepted
+    sequential_filled = filled(traders)
+
+    database_manager = StartupDatabaseManager(orders)
+    accepted = server.accepted
+    started = time.perf_counter()
+    traders = start_in_bulk(database_manager, client)
+    bulk_time = time.perf_counter() - started
+    bulk_requests = server.accepted - accepted
+    bulk_filled = filled(traders)
+    server.stop()
+
+    print(f"{len(SYMBOLS)} traders, {TRADES_PER_TRADER} open trades each, {LATENCY * 1e3:.0f} ms per round trip")
+    print(f"one by one   {sequential_time * 1e3:>7.0f} ms to ready   {sequential_requests:>4} requests   "
+          f"{sequential_filled} trades filled")
+    print(f"bulk         {bulk_time * 1e3:>7.0f} ms to ready   {bulk_requests:>4} requests   "
+          f"{bulk_filled} trades filled")
+    assert bulk_filled == sequential_filled == len(SYMBOLS) * TRADES_PER_TRADER // 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+import random
+import time
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+
+from manager.symbol_filters import SymbolFilters, format_decimal
+
+SAMPLES = 100000
+TICK_SIZE = '0.01000000'
+STEP_SIZE = '0.00001000'
+FEE_RATE = Decimal('0.001')
+QUOTE_SCALE = 8
+
+
+def units_price(price, scale, tick_units):
+    # Order pricing in integer units of 10 ** -scale, as the trader did before the filters kept Decimal sizes
+    units = int(price.scaleb(scale))
+    units -= units % tick_units
+    whole, fraction = divmod(units, 10 ** scale)
+    return f'{whole}.{fraction:0{scale}d}'
+
+
+def units_settlement(total_sale_amount, cost, fees_to_cover):
+    # Sale accounting in integer units, each Decimal amount converted in and the profit converted back
+    scale = 10 ** QUOTE_SCALE
+    whole, _, fraction = total_sale_amount.partition('.')
+    total_units = int(whole) * scale + int(fraction.ljust(QUOTE_SCALE, '0')[:QUOTE_SCALE])
+    fees_units = total_units * 1000 // 1000000
+    profit_units = total_units - int(cost.scaleb(QUOTE_SCALE)) - fees_units - int(fees_to_cover.scaleb(QUOTE_SCALE))
+    return Decimal(profit_units).scaleb(-QUOTE_SCALE)
+
+
+def decimal_settlement(filters, total_sale_amount, cost, fees_to_cover):
+    total = Decimal(total_sale_amount)
+    fees = filters.round_quote(total * FEE_RATE)
+    return total - cost - fees - fees_to_cover
+
+
+def check_parity(filters, tick, prices):
+    mismatches = 0
+    for price in prices:
+        mismatches += filters.round_price(price, 'BUY') != price.quantize(tick, rounding=ROUND_FLOOR)
+        mismatches += filters.round_price(price, 'SELL') != price.quantize(tick, rounding=ROUND_CEILING)
+    return mismatches
+
+
+def main():
+    random.seed(5)
+    filters = SymbolFilters(symbol='BTCUSDT', tick_size=TICK_SIZE, step_size=STEP_SIZE, quote_scale=QUOTE_SCALE)
+    tick = Decimal(TICK_SIZE).normalize()
+    prices = [Decimal(repr(round(random.uniform(20000, 70000), random.randint(0, 6)))) for _ in range(SAMPLES)]
+
+    mismatches = check_parity(filters, tick, prices)
+    # A tick that is not a power of ten rounds to its multiples
+    nickel = SymbolFilters(symbol='BTCUSDT', tick_size='0.05', step_size=STEP_SIZE)
+    odd = sum(nickel.round_price(price, 'BUY') % Decimal('0.05') != 0
+              or not 0 <= price - nickel.round_price(price, 'BUY') < Decimal('0.05') for price in prices)
+    print(f"tick rounding parity: {2 * SAMPLES} prices, {mismatches} mismatches, {odd} off the 0.05 tick")
+
+    started = time.perf_counter()
+    for price in prices:
+        format_decimal(filters.round_price(price, 'BUY'))
+    filters_time = time.perf_counter() - started
+    started = time.perf_counter()
+    for price in prices:
+        units_price(price, 8, 1000000)
+    units_time = time.perf_counter() - started
+    started = time.perf_counter()
+    for price in prices:
+        str(price.quantize(tick, rounding=ROUND_FLOOR))
+    quantize_time = time.perf_counter() - started
+    print(f"order price   symbol filters {filters_time / SAMPLES * 1e9:>6.0f} ns   "
+          f"integer units {units_time / SAMPLES * 1e9:>6.0f} ns   "
+          f"bare quantize {quantize_time / SAMPLES * 1e9:>6.0f} ns")
+
+    cost = Decimal('30.12345678')
+    fees_to_cover = Decimal('0.00012345')
+    totals = [f'{random.uniform(20, 40):.8f}' for _ in range(SAMPLES)]
+    started = time.perf_counter()
+    decimal_profits = [decimal_settlement(filters, total, cost, fees_to_cover) for total in totals]
+    decimal_time = time.perf_counter() - started
+    started = time.perf_counter()
+    units_profits = [units_settlement(total, cost, fees_to_cover) for total in totals]
+    units_time = time.perf_counter() - started
+    differences = sum(units != profit for units, profit in zip(units_profits, decimal_profits))
+    print(f"sale profit   Decimal {decimal_time / SAMPLES * 1e9:>6.0f} ns   integer units "
+          f"{units_time / SAMPLES * 1e9:>6.0f} ns   {differences} differences")
+    assert mismatches == 0 and odd == 0 and differences == 0
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
 
 class ApiPriceConfig:
 
-    def __init__(self, symbols):
-        self.symbols = symbols
+    def __init__(self, combined_stream=True, connections=1, stream_type='trade', symbol_stream_types=None):
+        self.combined_stream = combined_stream
+        self.connections = connections
+        self.stream_type = stream_type
+        self.symbol_stream_types = symbol_stream_types or {}
+
+    def get_stream_type(self, symbol):
+        return self.symbol_stream_types.get(symbol, self.stream_type)
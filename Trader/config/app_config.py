@@ -2,7 +2,12 @@
 class AppConfig:
     def __init__(self):
         self.api_config = None
+        self.price_config = None
         self.signal_configs = None
         self.klines_config = None
         self.traders_config = None
         self.database_config = None
+        self.recorder_config = None
+        self.replay_config = None
+        self.detector_pool_config = None
+        self.order_gateway_config = None
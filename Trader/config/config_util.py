@@ -7,10 +7,17 @@ from config.api_config_credentials import ApiConfigCredentials
 from config.api_trades_config import ApiTradesConfig
 from config.app_config import AppConfig
 from config.databse_config import DatabaseConfig
+from config.deep_signal_config import DeepSignalConfig
+from config.detector_pool_config import DetectorPoolConfig
 from config.env_util import get_environment
 from config.api_price_config import ApiPriceConfig
 from config.klines_config import KlinesConfig
+from config.order_gateway_config import OrderGatewayConfig
+from config.price_qos_config import PriceQosConfig
+from config.recorder_config import RecorderConfig
+from config.replay_config import ReplayConfig
 from config.signal_config import SignalConfig
+from config.signal_gate_config import SignalGateConfig
 from config.trader_config import TraderConfig
 
 
@@ -21,17 +28,27 @@ def load_current_config():
         file_config = load_file(f'resources/{file_name}')
 
         api_config = extract_api_config(file_config)
+        price_config = extract_price_config(file_config)
         signal_configs = extract_signal_config(file_config)
         klines_config = extract_klines_config(file_config)
         traders_config = extract_traders_config(file_config)
         database_config = extract_database_config(file_config)
+        recorder_config = extract_recorder_config(file_config)
+        replay_config = extract_replay_config(file_config)
+        detector_pool_config = extract_detector_pool_config(file_config)
+        order_gateway_config = extract_order_gateway_config(file_config)
 
         app_config = AppConfig()
         app_config.api_config = api_config
+        app_config.price_config = price_config
         app_config.signal_configs = signal_configs
         app_config.klines_config = klines_config
         app_config.traders_config = traders_config
         app_config.database_config = database_config
+        app_config.recorder_config = recorder_config
+        app_config.replay_config = replay_config
+        app_config.detector_pool_config = detector_pool_config
+        app_config.order_gateway_config = order_gateway_config
 
         return app_config
     except Exception as e:
@@ -40,8 +57,48 @@ def load_current_config():
 
 
 def extract_price_config(file_config):
-    file_price_config = file_config['price']['symbols']
-    return ApiPriceConfig(file_price_config)
+    file_price_config = file_config.get('price', {})
+    symbol_stream_types = {}
+    for entry in file_price_config.get('symbols', []):
+        for key, value in entry.items():
+            symbol_stream_types[key] = value['stream-type']
+    return ApiPriceConfig(
+        combined_stream=file_price_config.get('combined-stream', True),
+        connections=file_price_config.get('connections', 1),
+        stream_type=file_price_config.get('stream-type', 'trade'),
+        symbol_stream_types=symbol_stream_types
+    )
+
+
+def extract_price_qos_config(file_price_qos_config):
+    if file_price_qos_config is None:
+        return None
+    return PriceQosConfig(
+        min_delta_percent=file_price_qos_config.get('min-delta-percent', None),
+        min_delta_ticks=file_price_qos_config.get('min-delta-ticks', None),
+        tick_size=file_price_qos_config.get('tick-size', None),
+        min_interval=file_price_qos_config.get('min-interval', None)
+    )
+
+
+def extract_signal_gate_config(file_signal_gate_config):
+    if file_signal_gate_config is None:
+        return None
+    return SignalGateConfig(
+        on_change=file_signal_gate_config.get('on-change', False),
+        min_interval=file_signal_gate_config.get('min-interval', None),
+        coalesce=file_signal_gate_config.get('coalesce', False)
+    )
+
+
+def extract_deep_signal_config(file_deep_signal_config):
+    if file_deep_signal_config is None:
+        return None
+    return DeepSignalConfig(
+        model=file_deep_signal_config['model'],
+        min_confidence=file_deep_signal_config.get('min-confidence', 0.6),
+        latency_budget=file_deep_signal_config.get('latency-budget', 0.05)
+    )
 
 
 def extract_api_config(file_config):
@@ -74,7 +131,14 @@ def extract_signal_config(file_config):
             symbol = value['symbol']
             detector = value['detector']
             need_klines = value.get('need_klines', None)
-            signal_config = SignalConfig(symbol=symbol, detector=detector, need_klines=need_klines)
+            price_qos = extract_price_qos_config(value.get('price-qos', None))
+            evaluate_on_tick = value.get('evaluate-on-tick', False)
+            batch = value.get('batch', False)
+            signal_gate = extract_signal_gate_config(value.get('signal-gate', None))
+            deep_signal = extract_deep_signal_config(value.get('deep-signal', None))
+            signal_config = SignalConfig(symbol=symbol, detector=detector, need_klines=need_klines,
+                                         price_qos=price_qos, evaluate_on_tick=evaluate_on_tick, batch=batch,
+                                         signal_gate=signal_gate, deep_signal=deep_signal)
             signal_configs.append(signal_config)
     return signal_configs
 
@@ -85,7 +149,8 @@ def extract_klines_config(file_config):
     for entry in file_klines_config:
         for key, value in entry.items():
             period = value['period']
-            kline_config = KlinesConfig(symbol=key, period=period)
+            source = value.get('source', 'rest')
+            kline_config = KlinesConfig(symbol=key, period=period, source=source)
             klines_configs.append(kline_config)
     return klines_configs
 
@@ -100,12 +165,14 @@ def extract_traders_config(file_config):
             capital = value['capital']
             trade_quantity = value['trade-quantity']
             grid_gap = value.get('grid-gap', None)
+            price_qos = extract_price_qos_config(value.get('price-qos', None))
             trader_config = TraderConfig(
                 symbol=symbol,
                 detector=detector,
                 capital=capital,
                 trade_quantity=trade_quantity,
-                grid_gap=grid_gap
+                grid_gap=grid_gap,
+                price_qos=price_qos
             )
             traders_configs.append(trader_config)
     return traders_configs
@@ -122,3 +189,44 @@ def extract_database_config(file_config):
         port=file_database_config['port']
     )
     return database_config
+
+
+def extract_recorder_config(file_config):
+    file_recorder_config = file_config.get('recorder', {})
+    return RecorderConfig(
+        enabled=file_recorder_config.get('enabled', False),
+        directory=file_recorder_config.get('directory', 'records'),
+        segment_records=file_recorder_config.get('segment-records', 1000000),
+        buffer_size=file_recorder_config.get('buffer-size', 100000)
+    )
+
+
+def extract_detector_pool_config(file_config):
+    file_detector_pool_config = file_config.get('detector-pool', {})
+    return DetectorPoolConfig(
+        enabled=file_detector_pool_config.get('enabled', False),
+        processes=file_detector_pool_config.get('processes', 2)
+    )
+
+
+def extract_order_gateway_config(file_config):
+    file_order_gateway_config = file_config.get('order-gateway', {})
+    file_weight_config = file_order_gateway_config.get('request-weight', {})
+    file_order_count_config = file_order_gateway_config.get('order-count', {})
+    return OrderGatewayConfig(
+        workers=file_order_gateway_config.get('workers', 4),
+        queue_size=file_order_gateway_config.get('queue-size', 1000),
+        weight_limit=file_weight_config.get('limit', 6000),
+        weight_interval=file_weight_config.get('interval', 60),
+        order_limit=file_order_count_config.get('limit', 100),
+        order_interval=file_order_count_config.get('interval', 10)
+    )
+
+
+def extract_replay_config(file_config):
+    file_replay_config = file_config.get('replay', {})
+    return ReplayConfig(
+        enabled=file_replay_config.get('enabled', False),
+        directory=file_replay_config.get('directory', 'records'),
+        speed=file_replay_config.get('speed', 0)
+    )
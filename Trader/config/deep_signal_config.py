@@ -0,0 +1,6 @@
+class DeepSignalConfig:
+
+    def __init__(self, model, min_confidence=0.6, latency_budget=0.05):
+        self.model = model
+        self.min_confidence = min_confidence
+        self.latency_budget = latency_budget
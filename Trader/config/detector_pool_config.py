@@ -0,0 +1,5 @@
+class DetectorPoolConfig:
+
+    def __init__(self, enabled=False, processes=2):
+        self.enabled = enabled
+        self.processes = processes
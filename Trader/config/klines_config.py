@@ -1,6 +1,7 @@
 
 class KlinesConfig:
 
-    def __init__(self, symbol, period):
+    def __init__(self, symbol, period, source='rest'):
         self.symbol = symbol
         self.period = period
+        self.source = source
@@ -0,0 +1,10 @@
+class OrderGatewayConfig:
+
+    def __init__(self, workers=4, queue_size=1000, weight_limit=6000, weight_interval=60, order_limit=100,
+                 order_interval=10):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.weight_limit = weight_limit
+        self.weight_interval = weight_interval
+        self.order_limit = order_limit
+        self.order_interval = order_interval
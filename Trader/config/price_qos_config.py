@@ -0,0 +1,8 @@
+
+class PriceQosConfig:
+
+    def __init__(self, min_delta_percent=None, min_delta_ticks=None, tick_size=None, min_interval=None):
+        self.min_delta_percent = min_delta_percent
+        self.min_delta_ticks = min_delta_ticks
+        self.tick_size = tick_size
+        self.min_interval = min_interval
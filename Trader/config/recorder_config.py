@@ -0,0 +1,8 @@
+
+class RecorderConfig:
+
+    def __init__(self, enabled=False, directory='records', segment_records=1000000, buffer_size=100000):
+        self.enabled = enabled
+        self.directory = directory
+        self.segment_records = segment_records
+        self.buffer_size = buffer_size
@@ -0,0 +1,7 @@
+
+class ReplayConfig:
+
+    def __init__(self, enabled=False, directory='records', speed=0):
+        self.enabled = enabled
+        self.directory = directory
+        self.speed = speed
@@ -1,7 +1,13 @@
 
 class SignalConfig:
 
-    def __init__(self, symbol, detector, need_klines=None):
+    def __init__(self, symbol, detector, need_klines=None, price_qos=None, evaluate_on_tick=False, batch=False,
+                 signal_gate=None, deep_signal=None):
         self.symbol = symbol
         self.detector = detector
         self.need_klines = need_klines
+        self.price_qos = price_qos
+        self.evaluate_on_tick = evaluate_on_tick
+        self.batch = batch
+        self.signal_gate = signal_gate
+        self.deep_signal = deep_signal
@@ -0,0 +1,7 @@
+
+class SignalGateConfig:
+
+    def __init__(self, on_change=False, min_interval=None, coalesce=False):
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.coalesce = coalesce
@@ -1,9 +1,10 @@
 
 class TraderConfig:
 
-    def __init__(self, symbol, capital, detector, trade_quantity, grid_gap):
+    def __init__(self, symbol, capital, detector, trade_quantity, grid_gap, price_qos=None):
         self.symbol = symbol
         self.capital = capital
         self.detector = detector
         self.trade_quantity = trade_quantity
         self.grid_gap = grid_gap
+        self.price_qos = price_qos
@@ -14,3 +14,30 @@ def compute_duration_until_now(date):
     hours, remainder = divmod(runtime.seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     return f"{days}d {hours}h {minutes}m"
+
+
+INTERVAL_UNITS_MILLISECONDS = {
+    's': 1000,
+    'm': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': 24 * 60 * 60 * 1000,
+    'w': 7 * 24 * 60 * 60 * 1000
+}
+
+
+def interval_to_milliseconds(interval):
+    # Binance kline intervals such as 1m, 15m, 4h or 1d. Monthly candles are not fixed length and unsupported
+    unit = interval[-1]
+    if unit not in INTERVAL_UNITS_MILLISECONDS:
+        raise ValueError(f"Unsupported interval {interval}")
+    return int(interval[:-1]) * INTERVAL_UNITS_MILLISECONDS[unit]
+
+
+# Weekly candles open on Monday while the epoch fell on a Thursday
+WEEKLY_OPEN_OFFSET_MILLISECONDS = 4 * INTERVAL_UNITS_MILLISECONDS['d']
+
+
+def interval_open_time(timestamp, interval):
+    interval_ms = interval_to_milliseconds(interval)
+    offset = WEEKLY_OPEN_OFFSET_MILLISECONDS if interval[-1] == 'w' else 0
+    return timestamp - (timestamp - offset) % interval_ms
@@ -2,10 +2,15 @@ import logging
 
 from manager.abstract_manager import AbstractManager
 from manager.database_manager import DatabaseManager
+from manager.io_reactor import IoReactor
 from manager.order_manager import OrderManager
+from manager.order_router import OrderRouter
 from manager.signal_manager import SignalManager
 from manager.symbol_data_manager import SymbolDataManager
 from manager.trader_manager import TraderManager
+from recorder.tick_recorder import TickRecorder
+from replay.replay_engine import ReplayEngine
+from signal_detector.indicator.indicator_service import IndicatorService
 from utils.dico_util import merge_dicts
 
 
@@ -14,28 +19,53 @@ class AppManager(AbstractManager):
     def __init__(self, app_config):
         super().__init__(app_config)
         self.database_manager = DatabaseManager(app_config=app_config)
-        self.trader_manager = TraderManager(self.app_config, database_manager=self.database_manager)
-        self.signal_manager = SignalManager(self.app_config)
+        self.io_reactor = IoReactor(app_config=app_config)
+        self.indicator_service = IndicatorService()
+        self.tick_recorder = None
+        if app_config.recorder_config is not None and app_config.recorder_config.enabled:
+            self.tick_recorder = TickRecorder(recorder_config=app_config.recorder_config)
+        self.replay_engine = None
+        spot_client = None
+        if app_config.replay_config is not None and app_config.replay_config.enabled:
+            self.replay_engine = ReplayEngine(replay_config=app_config.replay_config)
+            spot_client = self.replay_engine.spot_client
+        self.order_router = OrderRouter()
+        self.trader_manager = TraderManager(self.app_config, database_manager=self.database_manager,
+                                            spot_client=spot_client, order_router=self.order_router)
+        self.signal_manager = SignalManager(self.app_config, indicator_service=self.indicator_service)
         self.symbol_data_manager = SymbolDataManager(
-            app_config=self.app_config
+            app_config=self.app_config,
+            io_reactor=self.io_reactor,
+            tick_recorder=self.tick_recorder,
+            replay_engine=self.replay_engine,
+            indicator_service=self.indicator_service
         )
-        self.order_manager = OrderManager(app_config=app_config)
+        self.order_manager = OrderManager(app_config=app_config, io_reactor=self.io_reactor,
+                                          order_router=self.order_router, tick_recorder=self.tick_recorder,
+                                          replay_engine=self.replay_engine)
 
     def start(self):
+        # The trades table is migrated before the traders load their trades from it
+        logging.info("start : Starting database manager")
+        self.database_manager.start()
+        logging.info("start : Starting IO reactor")
+        self.io_reactor.start()
+        if self.tick_recorder is not None:
+            logging.info("start : Starting tick recorder")
+            self.tick_recorder.start()
         logging.info("start : Starting trader manager")
         self.trader_manager.start()
 
         self.fill_signal_consumers_queues()
         self.fill_price_consumers_queues()
         self.fill_signal_klines_queues()
-        self.fill_order_queues()
+        self.fill_close_listeners()
         logging.info("start : Starting symbol_data_manager")
         self.symbol_data_manager.start()
         logging.info("start : Starting signal manager")
         self.signal_manager.start()
         logging.info("start : Starting order manager")
         self.order_manager.start()
-        logging.info("start : Starting database manager")
         threads = self.__get_threads()
         for t in threads:
             t.join()
@@ -45,6 +75,7 @@ class AppManager(AbstractManager):
         threads += self.symbol_data_manager.get_threads()
         threads += self.trader_manager.get_threads()
         threads += self.order_manager.get_threads()
+        threads += self.io_reactor.get_threads()
         return threads
 
     def __extract_price_queues(self):
@@ -65,9 +96,12 @@ class AppManager(AbstractManager):
         klines_queues = self.signal_manager.get_klines_queues()
         self.symbol_data_manager.init_klines_managers(klines_consumers_queues=klines_queues)
 
-    def fill_order_queues(self):
-        order_queues = self.trader_manager.get_order_queues()
-        self.order_manager.set_order_queues(order_queues=order_queues)
+    def fill_close_listeners(self):
+        if self.replay_engine is not None:
+            self.signal_manager.add_close_listeners(self.replay_engine)
+        else:
+            self.signal_manager.add_close_listeners(self.symbol_data_manager.candle_scheduler)
+
 
 
 
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from date.date_util import interval_open_time, interval_to_milliseconds
+
+SETTLE_DELAY = 2
+# Threads running the close listeners, the signal evaluators of one close run side by side
+LISTENER_WORKERS = 4
+
+
+class CandleScheduler:
+    """Wakes every klines manager sharing an interval once, right after each candle close.
+
+    Close listeners run the signal evaluators, numpy work and model inference, on threads of their own so the
+    websockets served by the IO loop never wait on them.
+    """
+
+    def __init__(self, io_reactor, settle_delay=SETTLE_DELAY, listener_workers=LISTENER_WORKERS):
+        self.io_reactor = io_reactor
+        self.settle_delay = settle_delay
+        self.listener_executor = ThreadPoolExecutor(max_workers=listener_workers,
+                                                    thread_name_prefix='CandleScheduler-listener')
+        self.klines_managers = {}
+        self.close_listeners = {}
+        self.__started = set()
+
+    def add_klines_manager(self, klines_manager):
+        self.klines_managers.setdefault(klines_manager.period, []).append(klines_manager)
+
+    def add_close_listener(self, period, listener):
+        self.close_listeners.setdefault(period, []).append(listener)
+
+    def start(self):
+        for period in set(self.klines_managers) | set(self.close_listeners):
+            if period not in self.__started:
+                self.__started.add(period)
+                self.io_reactor.submit(self.process_interval(period))
+
+    def next_close_delay(self, period, now_ms=None):
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        next_open = interval_open_time(now_ms, period) + interval_to_milliseconds(period)
+        return (next_open - now_ms) / 1000 + self.settle_delay
+
+    async def process_interval(self, period):
+        logging.info(f"process_interval : Scheduling {len(self.klines_managers.get(period, []))} klines managers "
+                     f"on {period} candle close")
+        await self.__update_klines(period)
+        while True:
+            try:
+                await asyncio.sleep(self.next_close_delay(period))
+                started = time.perf_counter()
+                await self.__update_klines(period)
+                await self.__notify_listeners(period)
+                logging.debug(f"process_interval : {period} candle close handled in "
+                              f"{(time.perf_counter() - started) * 1000:.1f}ms")
+            except Exception as e:
+                logging.error(f"process_interval : An error occurred on {period} candle close", exc_info=True)
+
+    async def __notify_listeners(self, period):
+        loop = asyncio.get_running_loop()
+        listeners = self.close_listeners.get(period, [])
+        results = await asyncio.gather(*(loop.run_in_executor(self.listener_executor, listener, period)
+                                         for listener in listeners), return_exceptions=True)
+        for listener, result in zip(listeners, results):
+            if isinstance(result, Exception):
+                logging.error(f"__notify_listeners : An error occurred in {period} close listener {listener}: "
+                              f"{result}")
+
+    async def __update_klines(self, period):
+        klines_managers = self.klines_managers.get(period, [])
+        results = await asyncio.gather(*(manager.update_klines() for manager in klines_managers),
+                                       return_exceptions=True)
+        for manager, result in zip(klines_managers, results):
+            if isinstance(result, Exception):
+                logging.error(f"__update_klines : An error occurred while updating klines for {manager.symbol}: "
+                              f"{result}")
@@ -1,4 +1,5 @@
 import psycopg2
+from psycopg2.extras import execute_batch, execute_values
 from manager.abstract_manager import AbstractManager
 from trader.model.trade import Trade
 from trader.model.trader import Trader
@@ -10,7 +11,29 @@ class DatabaseManager(AbstractManager):
         super().__init__(app_config)
 
     def start(self):
-        pass
+        self.migrate_schema()
+
+    def migrate_schema(self):
+        """Ajoute les colonnes des identifiants client des ordres aux bases créées avant elles."""
+        conn = self.connect()
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+            ALTER TABLE public.trades
+                ADD COLUMN IF NOT EXISTS buy_client_id VARCHAR(36),
+                ADD COLUMN IF NOT EXISTS sale_client_id VARCHAR(36);
+            """)
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"Erreur lors de la migration du schéma : {e}")
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
+            conn.close()
 
     def connect(self):
         """Établit une connexion à la base de données PostgreSQL."""
@@ -71,9 +94,10 @@ class DatabaseManager(AbstractManager):
             query = """
             INSERT INTO public.trades (
                 trader_id, buy_id, open_date, status, detected_price, reserved_amount, quantity, sale_id, cost, 
-                buy_commission, buy_price, quantity_filled, close_date, sale_price, duration, sale_timestamp, sale_fees
+                buy_commission, buy_price, quantity_filled, close_date, sale_price, duration, sale_timestamp, sale_fees,
+                buy_client_id, sale_client_id
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             RETURNING id;
             """
             cursor.execute(query, (
@@ -93,7 +117,9 @@ class DatabaseManager(AbstractManager):
                 trade.sale_price,
                 trade.duration,
                 trade.sale_timestamp,
-                trade.sale_fees
+                trade.sale_fees,
+                trade.buy_client_id,
+                trade.sale_client_id
             ))
             trade.id = cursor.fetchone()[0]
             conn.commit()
@@ -139,8 +165,8 @@ class DatabaseManager(AbstractManager):
             conn.close()
         return traders
 
-    def load_trades_by_trader(self, trader_id, status_not='closed'):
-        """Charge les trades d'un trader spécifique avec un statut différent de 'closed'."""
+    def load_trades_by_trader(self, trader_id, statuses_not=('closed', 'canceled')):
+        """Charge les trades d'un trader spécifique dont le statut n'est ni 'closed' ni 'canceled'."""
         conn = self.connect()
         if conn is None:
             return []
@@ -149,11 +175,12 @@ class DatabaseManager(AbstractManager):
         try:
             query = """
             SELECT id, trader_id, buy_id, open_date, status, detected_price, reserved_amount, quantity, sale_id, cost, 
-                   buy_commission, buy_price, quantity_filled, close_date, sale_price, duration, sale_timestamp, sale_fees
+                   buy_commission, buy_price, quantity_filled, close_date, sale_price, duration, sale_timestamp, sale_fees,
+                   buy_client_id, sale_client_id
             FROM public.trades
-            WHERE trader_id = %s AND status != %s
+            WHERE trader_id = %s AND status NOT IN %s
             """
-            cursor.execute(query, (trader_id, status_not))
+            cursor.execute(query, (trader_id, tuple(statuses_not)))
             rows = cursor.fetchall()
             for row in rows:
                 trade = Trade()
@@ -175,6 +202,8 @@ class DatabaseManager(AbstractManager):
                 trade.duration = row[15]
                 trade.sale_timestamp = row[16]
                 trade.sale_fees = row[17]
+                trade.buy_client_id = row[18]
+                trade.sale_client_id = row[19]
                 trades.append(trade)
         except Exception as e:
             print(f"Erreur lors du chargement des trades : {e}")
@@ -227,7 +256,8 @@ class DatabaseManager(AbstractManager):
             UPDATE public.trades
             SET trader_id = %s, buy_id = %s, open_date = %s, status = %s, detected_price = %s, reserved_amount = %s,
                 quantity = %s, sale_id = %s, cost = %s, buy_commission = %s, buy_price = %s, quantity_filled = %s,
-                close_date = %s, sale_price = %s, duration = %s, sale_timestamp = %s, sale_fees = %s
+                close_date = %s, sale_price = %s, duration = %s, sale_timestamp = %s, sale_fees = %s,
+                buy_client_id = %s, sale_client_id = %s
             WHERE id = %s;
             """
             cursor.execute(query, (
@@ -248,6 +278,8 @@ class DatabaseManager(AbstractManager):
                 trade.duration,
                 trade.sale_timestamp,
                 trade.sale_fees,
+                trade.buy_client_id,
+                trade.sale_client_id,
                 trade.id
             ))
             conn.commit()
@@ -258,3 +290,102 @@ class DatabaseManager(AbstractManager):
             cursor.close()
             conn.close()
 
+    def save_trades(self, trades):
+        """Sauvegarde plusieurs trades en une seule requête."""
+        if not trades:
+            return
+        conn = self.connect()
+        if conn is None:
+            return
+        cursor = conn.cursor()
+        try:
+            query = """
+            INSERT INTO public.trades (
+                trader_id, buy_id, open_date, status, detected_price, reserved_amount, quantity, sale_id, cost, 
+                buy_commission, buy_price, quantity_filled, close_date, sale_price, duration, sale_timestamp, sale_fees,
+                buy_client_id, sale_client_id
+            )
+            VALUES %s
+            RETURNING id;
+            """
+            rows = [(
+                trade.trader_id,
+                trade.buy_id,
+                trade.open_date,
+                trade.status,
+                trade.detected_price,
+                trade.reserved_amount,
+                trade.quantity,
+                trade.sale_id,
+                trade.cost,
+                trade.buy_commission,
+                trade.buy_price,
+                trade.quantity_filled,
+                trade.close_date,
+                trade.sale_price,
+                trade.duration,
+                trade.sale_timestamp,
+                trade.sale_fees,
+                trade.buy_client_id,
+                trade.sale_client_id
+            ) for trade in trades]
+            # Ids come back in the order of the rows
+            ids = execute_values(cursor, query, rows, page_size=len(rows), fetch=True)
+            conn.commit()
+            for trade, row in zip(trades, ids):
+                trade.id = row[0]
+        except Exception as e:
+            print(f"Erreur lors de l'insertion des trades : {e}")
+            conn.rollback()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def update_trades(self, trades):
+        """Met à jour plusieurs trades dans une seule transaction, retourne True si elle est validée."""
+        if not trades:
+            return True
+        conn = self.connect()
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            query = """
+            UPDATE public.trades
+            SET trader_id = %s, buy_id = %s, open_date = %s, status = %s, detected_price = %s, reserved_amount = %s,
+                quantity = %s, sale_id = %s, cost = %s, buy_commission = %s, buy_price = %s, quantity_filled = %s,
+                close_date = %s, sale_price = %s, duration = %s, sale_timestamp = %s, sale_fees = %s,
+                buy_client_id = %s, sale_client_id = %s
+            WHERE id = %s;
+            """
+            execute_batch(cursor, query, [(
+                trade.trader_id,
+                trade.buy_id,
+                trade.open_date,
+                trade.status,
+                trade.detected_price,
+                trade.reserved_amount,
+                trade.quantity,
+                trade.sale_id,
+                trade.cost,
+                trade.buy_commission,
+                trade.buy_price,
+                trade.quantity_filled,
+                trade.close_date,
+                trade.sale_price,
+                trade.duration,
+                trade.sale_timestamp,
+                trade.sale_fees,
+                trade.buy_client_id,
+                trade.sale_client_id,
+                trade.id
+            ) for trade in trades], page_size=len(trades))
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"Erreur lors de la mise à jour des trades : {e}")
+            conn.rollback()
+            return False
+        finally:
+            cursor.close()
+            conn.close()
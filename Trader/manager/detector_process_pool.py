@@ -0,0 +1,178 @@
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import threading
+
+from manager.klines_store import KlinesStore
+from manager.klines_update import KlinesUpdate
+from manager.price_qos import build_price_qos_policy
+from signal_detector.abstract_signal_detector import AbstractSignalDetector
+from signal_detector.indicator.indicator_service import IndicatorService
+from signal_detector.signal_detector_factory import build_signal_detector
+
+MESSAGE_PRICE = 'price'
+MESSAGE_KLINES = 'klines'
+MESSAGE_STOP = 'stop'
+
+# Detectors evaluated alone, batch evaluated detectors stay in the trading process with the candle close clock
+POOLED_DETECTORS = ('ReverseMeanSignalDetector', 'GridSignalDetector')
+
+
+class RemoteSignalDetector(AbstractSignalDetector):
+    """Stands for a detector hosted in a worker process: forwards its prices and klines to the worker and publishes
+    the signals coming back to the traders' signal queues."""
+
+    def __init__(self, app_config, index, config, worker_queue):
+        super().__init__(app_config=app_config, symbol=config.symbol, type=config.detector)
+        self.index = index
+        self.worker_queue = worker_queue
+        self.klines_queue = queue.Queue(maxsize=1000)
+
+    def start(self):
+        super().start()
+        t = threading.Thread(target=self.process_klines_update, args=(), daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def process_price_update_message(self):
+
+        while not self.stop_event.is_set():
+            try:
+                message = self.price_queue.get(timeout=1)
+                if message is None:
+                    break
+                self.last_price = message['last_price']
+                self.worker_queue.put((MESSAGE_PRICE, self.index, message))
+            except queue.Empty:
+                continue
+            except Exception as e:
+                logging.error(
+                    f"process_price_update_message : Error forwarding price message for symbol {self.symbol}: {e}",
+                    exc_info=True)
+
+    def process_klines_update(self):
+        while not self.stop_event.is_set():
+            try:
+                message = self.klines_queue.get(timeout=1)
+                if message is None:
+                    break
+                # Only the changed rows cross the pipe, the worker keeps its own klines store
+                self.worker_queue.put((MESSAGE_KLINES, self.index, message.period, message.klines))
+            except queue.Empty:
+                continue
+            except Exception as e:
+                logging.error(
+                    f"process_klines_update : Error forwarding klines update for symbol {self.symbol}: {e}",
+                    exc_info=True)
+
+
+class SignalForwarder:
+
+    def __init__(self, index, signal_queue):
+        self.index = index
+        self.signal_queue = signal_queue
+
+    def put_nowait(self, message):
+        self.signal_queue.put((self.index, message))
+
+
+class DetectorProcessPool:
+    """Hosts the signal detectors in worker processes sharded by symbol, so that indicator math does not compete
+    with order handling for the GIL of the trading process."""
+
+    def __init__(self, app_config, processes):
+        self.app_config = app_config
+        self.context = multiprocessing.get_context('spawn')
+        self.signal_queue = self.context.Queue()
+        self.worker_queues = []
+        self.workers = []
+        self.threads = []
+        self.signal_detectors = []
+        symbols = sorted({config.symbol for config in app_config.signal_configs if config.detector in POOLED_DETECTORS})
+        processes = max(1, min(processes, len(symbols)))
+        shards = {symbol: index % processes for index, symbol in enumerate(symbols)}
+        worker_configs = [[] for _ in range(processes)]
+        for _ in range(processes):
+            self.worker_queues.append(self.context.Queue())
+        for config in app_config.signal_configs:
+            if config.detector not in POOLED_DETECTORS:
+                continue
+            shard = shards[config.symbol]
+            index = len(self.signal_detectors)
+            detector = RemoteSignalDetector(app_config=app_config, index=index, config=config,
+                                            worker_queue=self.worker_queues[shard])
+            # Prices are filtered before crossing the pipe, signals are gated inside the worker
+            detector.price_queue.qos = build_price_qos_policy(config.price_qos)
+            self.signal_detectors.append(detector)
+            worker_configs[shard].append((index, config))
+        self.worker_configs = worker_configs
+
+    def start(self):
+        for shard, configs in enumerate(self.worker_configs):
+            worker = self.context.Process(target=run_detector_worker, name=f'DetectorWorker-{shard}', daemon=True,
+                                          args=(self.app_config, configs, self.worker_queues[shard],
+                                                self.signal_queue))
+            worker.start()
+            self.workers.append(worker)
+            logging.info(f"start : Detector worker {shard} started with {len(configs)} detectors")
+        t = threading.Thread(target=self.process_signals, args=(), daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def process_signals(self):
+        while True:
+            try:
+                item = self.signal_queue.get()
+                if isinstance(item, logging.LogRecord):
+                    logging.getLogger(item.name).handle(item)
+                    continue
+                index, message = item
+                self.signal_detectors[index].notify_consumers(message)
+            except Exception as e:
+                logging.error(f"process_signals : Error dispatching a signal from a detector worker: {e}",
+                              exc_info=True)
+
+    def stop(self):
+        for worker_queue in self.worker_queues:
+            worker_queue.put((MESSAGE_STOP,))
+
+
+def run_detector_worker(app_config, configs, worker_queue, signal_queue):
+    """Entry point of a worker process: runs its shard of detectors fed from the trading process."""
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.handlers.QueueHandler(signal_queue))
+
+    indicator_service = IndicatorService()
+    detectors = {}
+    stores = {}
+    for index, config in configs:
+        # Batch evaluation needs the candle close clock of the trading process, workers run each detector alone
+        detector = build_signal_detector(app_config, config, indicator_service=indicator_service, batch=False)
+        detector.add_signal_consumer(SignalForwarder(index, signal_queue))
+        detector.start()
+        detectors[index] = detector
+
+    while True:
+        message = worker_queue.get()
+        kind = message[0]
+        if kind == MESSAGE_STOP:
+            break
+        try:
+            if kind == MESSAGE_PRICE:
+                detectors[message[1]].price_queue.put_nowait(message[2])
+            elif kind == MESSAGE_KLINES:
+                index, period, klines = message[1:]
+                detector = detectors[index]
+                store = stores.get((detector.symbol, period))
+                if store is None:
+                    store = KlinesStore(symbol=detector.symbol, period=period)
+                    stores[(detector.symbol, period)] = store
+                store.merge(klines)
+                window = store.window()
+                indicator_service.update(window)
+                detector.klines_queue.put_nowait(KlinesUpdate(symbol=detector.symbol, period=period, klines=klines,
+                                                              window=window))
+        except Exception as e:
+            logging.error(f"run_detector_worker : Error handling {kind} message: {e}", exc_info=True)
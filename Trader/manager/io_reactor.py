@@ -0,0 +1,100 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from manager.abstract_manager import AbstractManager
+
+LATENCY_REPORT_INTERVAL = 60
+LOOP_LAG_PROBE_INTERVAL = 1
+LOOP_LAG_WARNING_THRESHOLD = 0.1
+BLOCKING_IO_WORKERS = 8
+
+
+class IoLatencyStats:
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+
+class IoReactor(AbstractManager):
+    """Process-wide event loop owning every network connection, with per-call IO latency tracking."""
+
+    def __init__(self, app_config):
+        super().__init__(app_config)
+        self.threads = []
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix='IoReactor-io')
+        self.latencies = {}
+        self.loop_lag = IoLatencyStats()
+        self.__lock = threading.Lock()
+
+    def start(self):
+        if self.threads:
+            return
+        t = threading.Thread(target=self.__run, name='IoReactor', daemon=True)
+        t.start()
+        self.threads.append(t)
+        self.submit(self.__monitor_loop_lag())
+        self.submit(self.__report_latencies())
+
+    def __run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.set_default_executor(self.executor)
+        logging.info("__run : IO reactor started")
+        self.loop.run_forever()
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    async def run_blocking(self, name, func, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await self.loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+        finally:
+            self.record_latency(name, time.perf_counter() - started)
+
+    def record_latency(self, name, duration):
+        with self.__lock:
+            stats = self.latencies.get(name)
+            if stats is None:
+                stats = IoLatencyStats()
+                self.latencies[name] = stats
+            stats.record(duration)
+
+    async def __monitor_loop_lag(self):
+        while True:
+            expected = self.loop.time() + LOOP_LAG_PROBE_INTERVAL
+            await asyncio.sleep(LOOP_LAG_PROBE_INTERVAL)
+            lag = max(0.0, self.loop.time() - expected)
+            self.loop_lag.record(lag)
+            if lag > LOOP_LAG_WARNING_THRESHOLD:
+                logging.warning(f"__monitor_loop_lag : IO reactor loop lagging by {lag * 1000:.1f}ms")
+
+    async def __report_latencies(self):
+        while True:
+            await asyncio.sleep(LATENCY_REPORT_INTERVAL)
+            with self.__lock:
+                report = ', '.join(
+                    f"{name}: n={stats.count} mean={stats.mean() * 1000:.1f}ms max={stats.max * 1000:.1f}ms"
+                    for name, stats in self.latencies.items())
+            logging.info(f"__report_latencies : loop lag max={self.loop_lag.max * 1000:.1f}ms {report}")
+
+    def get_threads(self):
+        return self.threads
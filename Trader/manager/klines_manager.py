@@ -1,58 +1,120 @@
+import asyncio
 import logging
 import queue
-import threading
 import time
+
 import requests
+import websockets
 
 from manager.abstract_manager import AbstractManager
+from manager.klines_store import KlinesStore, KLINES_LIMIT
+from manager.klines_update import KlinesUpdate
+from utils.json_util import loads
+
+KLINES_SOURCE_REST = 'rest'
+KLINES_SOURCE_WEBSOCKET = 'websocket'
+KLINES_UPDATE_INTERVAL = 60
 
 
 class KlinesManager(AbstractManager):
 
-    def __init__(self, app_config, symbol, period, consumers_queues):
+    def __init__(self, app_config, io_reactor, symbol, period, consumers_queues, source=KLINES_SOURCE_REST,
+                 candle_scheduler=None, indicator_service=None):
         super().__init__(app_config)
         self.symbol = symbol
         self.period = period
         self.threads = []
+        self.io_reactor = io_reactor
         self.consumers_queues = consumers_queues
+        self.source = source
+        self.candle_scheduler = candle_scheduler
+        self.indicator_service = indicator_service
+        self.store = KlinesStore(symbol=symbol, period=period)
 
     def start(self):
         self.init_handler()
 
     def init_handler(self):
-        t = threading.Thread(
-            target=self.process_klines_update,
-            args=(),
-            daemon=True
-        )
-        t.start()
-        self.threads.append(t)
-
-    def process_klines_update(self):
+        if self.source == KLINES_SOURCE_WEBSOCKET:
+            self.io_reactor.submit(self.process_klines_stream())
+        else:
+            self.candle_scheduler.add_klines_manager(self)
+
+    async def fetch_klines(self, start_time=None):
         base_url = self.app_config.api_config.base_url
         url = base_url + '/api/v3/klines'
         params = {
             'symbol': self.symbol,
             'interval': self.period,
-            'limit': 1000
+            'limit': KLINES_LIMIT
         }
+        if start_time is not None:
+            params['startTime'] = start_time
+        response = await self.io_reactor.run_blocking('klines', requests.get, url, params=params)
+        return response.json()
+
+    async def update_klines(self):
+        # Bootstraps the whole window once, then only asks for the candles from the last known one onwards
+        start_time = self.store.last_open_time()
+        rows = await self.fetch_klines(start_time=start_time)
+        changed = self.store.merge(rows)
+        while start_time is not None and len(rows) == KLINES_LIMIT:
+            start_time = self.store.last_open_time()
+            rows = await self.fetch_klines(start_time=start_time)
+            changed += self.store.merge(rows)
+        if changed:
+            self.__notify_consumers(changed)
+
+    async def process_klines_stream(self):
+        websocket_base_url = self.app_config.api_config.websocket_base_url
+        websocket_url = websocket_base_url + f'/ws/{self.symbol.lower()}@kline_{self.period}'
         while True:
             try:
-                logging.debug('process_klines_update : Retrieving klines...')
-                response = requests.get(url, params=params)
-                self.__notify_consumers(response.json())
+                # Fill the window and any gap left by a disconnection before following the stream
+                await self.update_klines()
+                pending = []
+                last_notification = time.monotonic()
+                async with websockets.connect(websocket_url) as websocket:
+                    logging.info(f'Connected to WebSocket {websocket_url}')
+                    while True:
+                        message = await websocket.recv()
+                        if isinstance(message, bytes):
+                            await websocket.pong(message)
+                            continue
+                        kline = loads(message)['k']
+                        for row in self.store.merge([self.__to_row(kline)]):
+                            if pending and pending[-1][0] == row[0]:
+                                pending[-1] = row
+                            else:
+                                pending.append(row)
+                        now = time.monotonic()
+                        if pending and (kline['x'] or now - last_notification >= KLINES_UPDATE_INTERVAL):
+                            self.__notify_consumers(pending)
+                            pending = []
+                            last_notification = now
+            except (websockets.ConnectionClosedError, websockets.ConnectionClosed):
+                logging.error(f"process_klines_stream : Connection lost for {websocket_url}. Try to reconnect")
+                await asyncio.sleep(5)
             except Exception as e:
-                logging.error('An error occureed while updqting klines')
-            finally:
-                time.sleep(60)
+                logging.error(f"process_klines_stream : An error occurred while streaming klines for {self.symbol}",
+                              exc_info=True)
+                await asyncio.sleep(5)
+
+    def __to_row(self, kline):
+        return [kline['t'], kline['o'], kline['h'], kline['l'], kline['c'], kline['v'], kline['T'], kline['q'],
+                kline['n'], kline['V'], kline['Q'], kline['B']]
 
-    def __notify_consumers(self, payload):
+    def __notify_consumers(self, klines):
 
         logging.debug(f"__notify_consumers : Start notifying consumers about klines update for symbol {self.symbol}")
+        window = self.store.window()
+        if self.indicator_service is not None:
+            self.indicator_service.update(window)
+        message = KlinesUpdate(symbol=self.symbol, period=self.period, klines=klines, window=window)
         for q in self.consumers_queues:
             try:
-                q.put_nowait(payload)
+                q.put_nowait(message)
             except queue.Full:
                 logging.warning(f"Klines queue is full for symbol {self.symbol}. Dropping message.")
             except Exception as e:
-                logging.error(f"An error occurred while notifying consumers for klines update for symbol {self.symbol}")
\ No newline at end of file
+                logging.error(f"An error occurred while notifying consumers for klines update for symbol {self.symbol}")
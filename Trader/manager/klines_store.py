@@ -0,0 +1,108 @@
+import threading
+
+import numpy as np
+
+from manager.klines_window import KlinesWindow
+
+KLINES_LIMIT = 1000
+
+# Raw klines row index of each stored column
+COLUMNS = {
+    'open_time': (0, np.int64),
+    'open': (1, np.float64),
+    'high': (2, np.float64),
+    'low': (3, np.float64),
+    'close': (4, np.float64),
+    'volume': (5, np.float64),
+    'close_time': (6, np.int64)
+}
+
+
+class KlinesStore:
+    """Rolling window of candles parsed once into NumPy columns and advanced incrementally.
+
+    Windows are read-only views into the store, so handing one to every consumer copies nothing. The last,
+    still open candle of a window may be refreshed in place by a later merge.
+    """
+
+    def __init__(self, symbol, period, limit=KLINES_LIMIT):
+        self.symbol = symbol
+        self.period = period
+        self.limit = limit
+        self.capacity = 2 * limit
+        self.__columns = self.__allocate()
+        self.__start = 0
+        self.__end = 0
+        self.__window = None
+        self.__version = 0
+        self.__lock = threading.Lock()
+
+    def __allocate(self):
+        return {name: np.zeros(self.capacity, dtype=dtype) for name, (index, dtype) in COLUMNS.items()}
+
+    def merge(self, rows):
+        changed = []
+        with self.__lock:
+            for row in rows:
+                last_open_time = self.__last_open_time()
+                if last_open_time is not None and row[0] < last_open_time:
+                    continue
+                if last_open_time is not None and row[0] == last_open_time:
+                    if not self.__write(self.__end - 1, row):
+                        continue
+                else:
+                    self.__append(row)
+                changed.append(row)
+            if changed:
+                self.__window = None
+                self.__version += 1
+        return changed
+
+    def __append(self, row):
+        if self.__end == self.capacity:
+            # Compact into fresh arrays so that windows already handed out keep their data
+            columns = self.__allocate()
+            kept = self.__end - self.__start
+            for name, column in self.__columns.items():
+                columns[name][:kept] = column[self.__start:self.__end]
+            self.__columns = columns
+            self.__start = 0
+            self.__end = kept
+        self.__write(self.__end, row)
+        self.__end += 1
+        if self.__end - self.__start > self.limit:
+            self.__start += 1
+
+    def __write(self, position, row):
+        changed = False
+        for name, (index, dtype) in COLUMNS.items():
+            value = dtype(row[index])
+            column = self.__columns[name]
+            if column[position] != value:
+                column[position] = value
+                changed = True
+        return changed
+
+    def __last_open_time(self):
+        if self.__end == self.__start:
+            return None
+        return int(self.__columns['open_time'][self.__end - 1])
+
+    def last_open_time(self):
+        with self.__lock:
+            return self.__last_open_time()
+
+    def window(self):
+        with self.__lock:
+            if self.__window is None:
+                views = {}
+                for name, column in self.__columns.items():
+                    view = column[self.__start:self.__end]
+                    view.flags.writeable = False
+                    views[name] = view
+                self.__window = KlinesWindow(symbol=self.symbol, period=self.period, version=self.__version,
+                                             **views)
+            return self.__window
+
+    def __len__(self):
+        return self.__end - self.__start
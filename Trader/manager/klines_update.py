@@ -0,0 +1,8 @@
+
+class KlinesUpdate:
+
+    def __init__(self, symbol, period, klines, window):
+        self.symbol = symbol
+        self.period = period
+        self.klines = klines
+        self.window = window
@@ -0,0 +1,25 @@
+
+class KlinesWindow:
+    """Read-only columnar view over the candles of a klines store, shared as is by every consumer.
+
+    `version` grows with every change of the store, so consumers can tell a newer window from a stale one.
+    """
+
+    def __init__(self, symbol, period, open_time, open, high, low, close, volume, close_time, version=0):
+        self.symbol = symbol
+        self.period = period
+        self.version = version
+        self.open_time = open_time
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.close_time = close_time
+
+    def __len__(self):
+        return len(self.open_time)
+
+    def nbytes(self):
+        return sum(column.nbytes for column in (self.open_time, self.open, self.high, self.low, self.close,
+                                                 self.volume, self.close_time))
@@ -0,0 +1,226 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from binance.error import ClientError
+
+PRIORITY_CANCEL = 0
+PRIORITY_SELL = 1
+PRIORITY_QUERY = 2
+PRIORITY_BUY = 3
+
+# Request weights of the exchange endpoints used by the traders
+WEIGHT_ORDER = 1
+WEIGHT_CANCEL = 1
+WEIGHT_CANCEL_REPLACE = 1
+WEIGHT_QUERY = 4
+WEIGHT_OPEN_ORDERS = 6
+WEIGHT_ALL_ORDERS = 20
+
+RATE_LIMIT_STATUS_CODES = (418, 429)
+MAX_RETRIES = 5
+
+
+class OrderRequest:
+
+    def __init__(self, name, submit, on_success=None, on_failure=None, priority=PRIORITY_BUY, weight=WEIGHT_ORDER,
+                 orders=1):
+        self.name = name
+        self.submit = submit
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.priority = priority
+        self.weight = weight
+        self.orders = orders
+
+
+class OrderBatch:
+    """Counts down the requests of a batch, whatever their outcome, and calls back once with the items the
+    successful ones reported, so a batch is persisted in one write."""
+
+    def __init__(self, size, on_complete):
+        self.remaining = size
+        self.on_complete = on_complete
+        self.items = []
+        self.__lock = threading.Lock()
+        if size == 0:
+            on_complete([])
+
+    def done(self, item=None):
+        with self.__lock:
+            if item is not None:
+                self.items.append(item)
+            self.remaining -= 1
+            if self.remaining != 0:
+                return
+        self.on_complete(self.items)
+
+
+class RequestQueue(queue.PriorityQueue):
+    """Priority queue of (priority, sequence, request) entries whose first entry is only taken once it is ready.
+
+    Requests that cost no budget, like the trade writes sent before their orders, do not wait behind it.
+    """
+
+    def get_ready(self, wait_time, timeout):
+        # wait_time(request) returns 0 once the request can go, else the seconds to wait, during which a more
+        # urgent request put in the queue takes its place at the front
+        deadline = time.monotonic() + timeout
+        with self.not_empty:
+            while True:
+                remaining = deadline - time.monotonic()
+                if not self._qsize():
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self.not_empty.wait(remaining)
+                    continue
+                wait = wait_time(self.queue[0][2])
+                entry = self._get() if wait <= 0 else self.__take_free()
+                if entry is not None:
+                    self.not_full.notify()
+                    return entry
+                if remaining <= 0:
+                    raise queue.Empty
+                self.not_empty.wait(min(wait, remaining))
+
+    def __take_free(self):
+        free = [entry for entry in self.queue if not entry[2].weight and not entry[2].orders]
+        if not free:
+            return None
+        entry = min(free)
+        self.queue.remove(entry)
+        heapq.heapify(self.queue)
+        return entry
+
+
+class OrderGateway:
+    """Sends the requests of every trader to the exchange off the callers' threads.
+
+    Requests wait in a bounded priority queue, cancels first, then sells, queries and buys, and are served by a
+    pool of worker threads. A worker only takes the first request once the rate limiter, if any, holds its weight
+    and order count, so near the limit the budget goes to the most urgent request queued, not to the buys workers
+    already hold. Workers call back with the exchange response or the error once the round trip is done.
+
+    `call` waits for the response instead and fails at once when the queue is full. A worker calling it sends the
+    request itself, waiting on the other workers could hold up the whole pool.
+    """
+
+    def __init__(self, name, workers=2, queue_size=100, rate_limiter=None):
+        self.name = name
+        self.workers = workers
+        self.queue = RequestQueue(maxsize=queue_size)
+        self.rate_limiter = rate_limiter
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.submitted = 0
+        self.failed = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.__sequence = itertools.count()
+
+    def start(self):
+        for _ in range(self.workers):
+            t = threading.Thread(target=self.process_requests, args=(), daemon=True)
+            self.threads.append(t)
+            t.start()
+
+    def submit(self, request):
+        try:
+            self.queue.put_nowait((request.priority, next(self.__sequence), request))
+            return True
+        except queue.Full:
+            self.rejected += 1
+            logging.warning(f"submit : order gateway {self.name} is full. Rejecting {request.name}")
+            return False
+
+    def call(self, request):
+        # Waits for the response, for the requests the caller cannot go on without
+        future = Future()
+        request.on_success = future.set_result
+        request.on_failure = future.set_exception
+        if threading.current_thread() in self.threads:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(request.weight, request.orders)
+            self.__send(request)
+        elif not self.submit(request):
+            raise queue.Full(f'order gateway {self.name} is full')
+        return future.result()
+
+    def process_requests(self):
+        while not self.stop_event.is_set():
+            try:
+                _, _, request = self.queue.get_ready(self.__budget_wait, timeout=1)
+            except queue.Empty:
+                continue
+            self.__send(request)
+            self.queue.task_done()
+
+    def __budget_wait(self, request):
+        if self.rate_limiter is None:
+            return 0
+        return self.rate_limiter.try_acquire(request.weight, request.orders)
+
+    def __send(self, request):
+        for attempt in range(MAX_RETRIES + 1):
+            # The budget of the first attempt was taken with the request
+            if attempt and self.rate_limiter is not None:
+                self.rate_limiter.acquire(request.weight, request.orders)
+            started = time.perf_counter()
+            try:
+                response = request.submit()
+            except ClientError as e:
+                if e.status_code in RATE_LIMIT_STATUS_CODES and attempt < MAX_RETRIES:
+                    # Retried once the exchange lifts the limit, the request keeps its turn
+                    self.throttled += 1
+                    self.__back_off(self.__retry_after(e))
+                    continue
+                self.__fail(request, e)
+                return
+            except Exception as e:
+                self.__fail(request, e)
+                return
+            if isinstance(response, dict) and 'limit_usage' in response:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.update(response['limit_usage'])
+                response = response['data']
+            self.submitted += 1
+            logging.debug(f"__send : {request.name} placed in "
+                          f"{(time.perf_counter() - started) * 1000:.1f} ms by order gateway {self.name}")
+            self.__callback(request, request.on_success, response)
+            return
+
+    def __back_off(self, seconds):
+        if self.rate_limiter is not None:
+            self.rate_limiter.back_off(seconds)
+        else:
+            time.sleep(seconds)
+
+    def __retry_after(self, error):
+        try:
+            return int((error.header or {}).get('Retry-After', 1))
+        except (TypeError, ValueError):
+            return 1
+
+    def __fail(self, request, error):
+        self.failed += 1
+        logging.error(f"__send : {request.name} failed in order gateway {self.name}: {error}")
+        self.__callback(request, request.on_failure, error)
+
+    def __callback(self, request, callback, argument):
+        if callback is None:
+            return
+        try:
+            callback(argument)
+        except Exception as e:
+            logging.error(f"__callback : Error handling the result of {request.name} in order gateway {self.name}: {e}",
+                          exc_info=True)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def __len__(self):
+        return self.queue.qsize()
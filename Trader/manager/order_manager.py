@@ -1,33 +1,39 @@
 import asyncio
 import json
 import logging
-import queue
-import threading
-import time
 
 import requests
 
 from manager.abstract_manager import AbstractManager
 import websockets
 
+from recorder.tick_record import RECORD_KIND_ORDER
+
 
 class OrderManager(AbstractManager):
 
-    def __init__(self, app_config):
+    def __init__(self, app_config, io_reactor, order_router, tick_recorder=None, replay_engine=None):
         super().__init__(app_config)
         self.threads = []
-        self.order_queues = None
+        self.io_reactor = io_reactor
+        self.order_router = order_router
+        self.tick_recorder = tick_recorder
+        self.replay_engine = replay_engine
         self.listen_key = None
 
-    def set_order_queues(self, order_queues):
-        self.order_queues = order_queues
-
     def start(self):
-        self.create_listen_key()
+        if self.replay_engine is not None:
+            # Execution reports come straight from the simulated client, there is no user data stream to open
+            self.replay_engine.spot_client.set_order_queues([self.order_router])
+            return
+        self.io_reactor.submit(self.start_user_data_stream())
+
+    async def start_user_data_stream(self):
+        await self.create_listen_key()
         self.schedule_listen_key_renew()
         self.monitor_orders()
 
-    def create_listen_key(self):
+    async def create_listen_key(self):
         logging.debug("create_listen_key : Start creating listen key for orders update")
         try:
             api_config = self.app_config.api_config
@@ -37,7 +43,7 @@ class OrderManager(AbstractManager):
                 'X-MBX-APIKEY': credentials.api_key
             }
 
-            response = requests.post(url, headers=headers)
+            response = await self.io_reactor.run_blocking('listen-key-create', requests.post, url, headers=headers)
             data = response.json()
 
             if response.status_code == 200:
@@ -52,16 +58,11 @@ class OrderManager(AbstractManager):
     def monitor_orders(self):
         api_config = self.app_config.api_config
         trades_config = api_config.trades_config
-        websocket_url = trades_config.websocket_base_url + f"/ws/{self.listen_key}"
-
-        def run():
-            asyncio.set_event_loop(asyncio.new_event_loop())
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(handler())
 
         async def handler():
             while True:
                 try:
+                    websocket_url = trades_config.websocket_base_url + f"/ws/{self.listen_key}"
                     async with websockets.connect(websocket_url) as websocket:
                         logging.info(f'Connected to WebSocket {websocket_url}')
                         while True:
@@ -69,12 +70,9 @@ class OrderManager(AbstractManager):
                             if isinstance(message, bytes):
                                 await websocket.pong(message)
                             else:
-                                data = json.loads(message)
-                                for q in self.order_queues:
-                                    try:
-                                        q.put_nowait(data)
-                                    except queue.Full:
-                                        logging.warning("handler : order queue is full. Dropping message.")
+                                if self.tick_recorder is not None:
+                                    self.tick_recorder.record(RECORD_KIND_ORDER, message)
+                                self.order_router.put_nowait(json.loads(message))
                 except (websockets.ConnectionClosedError, websockets.ConnectionClosed):
                     logging.error(f"handler : Connection lost for {websocket_url}. Try to reconnect")
                     await asyncio.sleep(5)
@@ -82,16 +80,12 @@ class OrderManager(AbstractManager):
                     logging.error(f"handler : An error occurred while processing order update message", exc_info=True)
                     await asyncio.sleep(5)
 
-        monitor_orders_thread = threading.Thread(target=run, daemon=True)
-        monitor_orders_thread.start()
-        self.threads.append(monitor_orders_thread)
+        self.io_reactor.submit(handler())
 
     def schedule_listen_key_renew(self):
-        renew_listen_key_thread = threading.Thread(target=self.keep_alive_listen_key, args=(), daemon=True)
-        renew_listen_key_thread.start()
-        self.threads.append(renew_listen_key_thread)
+        self.io_reactor.submit(self.keep_alive_listen_key())
 
-    def keep_alive_listen_key(self):
+    async def keep_alive_listen_key(self):
 
         api_config = self.app_config.api_config
         url = api_config.trades_config.base_url + '/api/v3/userDataStream'
@@ -100,23 +94,23 @@ class OrderManager(AbstractManager):
             'X-MBX-APIKEY': credentials.api_key
         }
 
-        params = {
-            'listenKey': self.listen_key
-        }
-
         while True:
             try:
-                time.sleep(1800)
-                response = requests.put(url, headers=headers, params=params)
+                await asyncio.sleep(1800)
+                params = {
+                    'listenKey': self.listen_key
+                }
+                response = await self.io_reactor.run_blocking('listen-key-renew', requests.put, url,
+                                                              headers=headers, params=params)
                 if response.status_code == 200:
                     logging.info("Listen Key renewed with success.")
                 else:
                     logging.error(
                         f"keep_alive_listen_key : Error while trying to keep alive Listen Key : {response.json()}")
-                    self.create_listen_key()
+                    await self.create_listen_key()
             except Exception as e:
                 logging.error("An error occurred while trying to keep alive Listen Key")
-                self.create_listen_key()
+                await self.create_listen_key()
 
     def get_threads(self):
 
@@ -0,0 +1,76 @@
+import logging
+import queue
+import threading
+from collections import OrderedDict
+
+MAX_PENDING_ORDERS = 10000
+
+
+def order_key(order_id):
+    return int(order_id)
+
+
+class OrderRouter:
+    """Delivers each execution report to the order queue of the trader owning the order only.
+
+    Traders register the client order id they generate before an order is sent, then its order id once the
+    exchange acknowledged it, or the order ids of the orders reloaded at startup. Reports of unknown orders are held
+    until the order is registered, within MAX_PENDING_ORDERS orders, those of orders placed outside the traders
+    being eventually dropped.
+    """
+
+    def __init__(self, max_pending_orders=MAX_PENDING_ORDERS):
+        self.max_pending_orders = max_pending_orders
+        self.routed = 0
+        self.unrouted = 0
+        self.__owners = {}
+        self.__client_owners = {}
+        self.__pending = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def register(self, order_id, order_queue):
+        with self.__lock:
+            key = order_key(order_id)
+            self.__owners[key] = order_queue
+            pending = self.__pending.pop(key, [])
+        for message in pending:
+            self.__deliver(order_queue, message)
+
+    def unregister(self, order_id):
+        with self.__lock:
+            self.__owners.pop(order_key(order_id), None)
+
+    def register_client_order(self, client_order_id, order_queue):
+        with self.__lock:
+            self.__client_owners[client_order_id] = order_queue
+
+    def unregister_client_order(self, client_order_id):
+        with self.__lock:
+            self.__client_owners.pop(client_order_id, None)
+
+    def put_nowait(self, message):
+        if message.get('e') != 'executionReport':
+            return
+        key = order_key(message['i'])
+        with self.__lock:
+            order_queue = self.__owners.get(key)
+            if order_queue is None:
+                # Cancel reports carry the original client order id in 'C'
+                order_queue = self.__client_owners.get(message.get('c')) or self.__client_owners.get(message.get('C'))
+            if order_queue is None:
+                self.unrouted += 1
+                self.__pending.setdefault(key, []).append(message)
+                while len(self.__pending) > self.max_pending_orders:
+                    self.__pending.popitem(last=False)
+                return
+        self.__deliver(order_queue, message)
+
+    def __deliver(self, order_queue, message):
+        try:
+            order_queue.put_nowait(message)
+            self.routed += 1
+        except queue.Full:
+            logging.warning(f"__deliver : order queue is full. Dropping execution report for order {message['i']}")
+
+    def __len__(self):
+        return len(self.__owners)
@@ -0,0 +1,61 @@
+import logging
+
+from manager.order_gateway import OrderRequest, PRIORITY_QUERY, WEIGHT_ALL_ORDERS, WEIGHT_OPEN_ORDERS, WEIGHT_QUERY
+from manager.order_router import order_key
+
+ALL_ORDERS_LIMIT = 1000
+# Error code of a query for an order the exchange does not know
+ERROR_UNKNOWN_ORDER = -2013
+
+
+def load_orders(client, order_gateway, symbol, order_ids, client_order_ids=()):
+    """Orders of a symbol by order id and by client order id, fetched in bulk to reconcile the trades reloaded at
+    startup.
+
+    The open orders come in one openOrders request, the others from allOrders pages starting at the smallest order id
+    still missing. Paging stops once querying the missing orders one by one costs less weight than another page,
+    the traders query the orders left out themselves, as well as the orders they only know the client order id of
+    and that are no longer open.
+    """
+    missing = {order_key(order_id) for order_id in order_ids if order_id is not None}
+    missing_clients = {client_order_id for client_order_id in client_order_ids if client_order_id is not None}
+    orders = {}
+    if not missing and not missing_clients:
+        return orders
+    open_orders = order_gateway.call(OrderRequest(
+        name=f'open orders {symbol}',
+        submit=lambda: client.get_open_orders(symbol=symbol),
+        priority=PRIORITY_QUERY,
+        weight=WEIGHT_OPEN_ORDERS,
+        orders=0))
+    collect_orders(orders, missing, missing_clients, open_orders)
+    pages = 0
+    while missing and len(missing) * WEIGHT_QUERY > WEIGHT_ALL_ORDERS:
+        start_id = min(missing)
+        page = order_gateway.call(OrderRequest(
+            name=f'all orders {symbol} from {start_id}',
+            submit=lambda: client.get_orders(symbol=symbol, orderId=start_id, limit=ALL_ORDERS_LIMIT),
+            priority=PRIORITY_QUERY,
+            weight=WEIGHT_ALL_ORDERS,
+            orders=0))
+        pages += 1
+        collect_orders(orders, missing, missing_clients, page)
+        if len(page) < ALL_ORDERS_LIMIT:
+            break
+        # Order ids up to the end of the page it does not hold do not exist on this symbol
+        last_id = order_key(page[-1]['orderId'])
+        missing = {order_id for order_id in missing if order_id > last_id}
+    logging.info(f"load_orders : Orders of symbol {symbol} loaded with {pages + 1} requests, "
+                 f"{len(missing) + len(missing_clients)} left to query one by one")
+    return orders
+
+
+def collect_orders(orders, missing, missing_clients, page):
+    for order in page:
+        key = order_key(order['orderId'])
+        client_order_id = order.get('clientOrderId')
+        if key in missing or client_order_id in missing_clients:
+            orders[key] = order
+            orders[client_order_id] = order
+            missing.discard(key)
+            missing_clients.discard(client_order_id)
@@ -1,22 +1,58 @@
 import asyncio
-import json
 import logging
-import queue
-import threading
+import time
 from decimal import Decimal
 
 from manager.abstract_manager import AbstractManager
 import websockets
 
+from recorder.tick_record import RECORD_KIND_PRICE
+from utils.json_util import loads, field_marker, extract_string_field
+
+STREAM_TYPE_TRADE = 'trade'
+STREAM_TYPE_AGG_TRADE = 'aggTrade'
+STREAM_TYPE_BOOK_TICKER = 'bookTicker'
+STREAM_TYPE_MINI_TICKER = 'miniTicker'
+
+# Payload fields holding the price for each stream type, bookTicker prices are the mid of best bid and ask
+STREAM_PRICE_FIELDS = {
+    STREAM_TYPE_TRADE: ('p',),
+    STREAM_TYPE_AGG_TRADE: ('p',),
+    STREAM_TYPE_BOOK_TICKER: ('b', 'a'),
+    STREAM_TYPE_MINI_TICKER: ('c',)
+}
+
+SYMBOL_MARKER = field_marker('s')
+
 
 class PriceManager(AbstractManager):
 
-    def __init__(self, app_config, symbol, consumers_queues):
+    def __init__(self, app_config, io_reactor, consumers_queues, tick_recorder=None):
         super().__init__(app_config)
         self.threads = []
-        self.__last_price = None
+        self.io_reactor = io_reactor
+        self.tick_recorder = tick_recorder
+        self.__last_raw_prices = {}
         self.__consumers_queues = consumers_queues
-        self.symbol = symbol
+        self.symbols = list(consumers_queues.keys())
+        self.stream_types = {}
+        self.__price_fields = {}
+        self.__price_markers = {}
+        for symbol in self.symbols:
+            stream_type = self.__get_stream_type(symbol)
+            self.stream_types[symbol] = stream_type
+            self.__price_fields[symbol] = STREAM_PRICE_FIELDS[stream_type]
+            self.__price_markers[symbol] = tuple(field_marker(field) for field in STREAM_PRICE_FIELDS[stream_type])
+
+    def __get_stream_type(self, symbol):
+        price_config = self.app_config.price_config if self.app_config is not None else None
+        if price_config is None:
+            return STREAM_TYPE_TRADE
+        stream_type = price_config.get_stream_type(symbol)
+        if stream_type not in STREAM_PRICE_FIELDS:
+            logging.warning(f"__get_stream_type : Unknown stream type {stream_type} for symbol {symbol}, using trade")
+            return STREAM_TYPE_TRADE
+        return stream_type
 
     def start(self):
         api_config = self.app_config.api_config
@@ -25,20 +61,15 @@ class PriceManager(AbstractManager):
 
     def __add_price_handler(self, websocket_base_url):
         try:
-            lower_symbol = self.symbol.lower()
-            websocket_url = websocket_base_url + '/stream?streams=' + lower_symbol + '@trade'
+            streams = '/'.join(symbol.lower() + '@' + self.stream_types[symbol] for symbol in self.symbols)
+            websocket_url = websocket_base_url + '/stream?streams=' + streams
             self.__add_websocket_handler(websocket_url)
         except Exception as e:
-            logging.error(f"add_price_handler : An error occurred while adding websocket handler for {self.symbol} {e}")
+            logging.error(f"add_price_handler : An error occurred while adding websocket handler for {self.symbols} {e}")
 
     def __add_websocket_handler(self, websocket_url):
         logging.info(f"__add_websocket_handler : Start adding websocket handler for {websocket_url}")
 
-        def run():
-            asyncio.set_event_loop(asyncio.new_event_loop())
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(handler())
-
         async def handler():
             while True:
                 try:
@@ -57,26 +88,50 @@ class PriceManager(AbstractManager):
                     logging.error(f"Unexpected error occurred", exc_info=True)
                     await asyncio.sleep(5)
 
-        t = threading.Thread(target=run, daemon=True)
-        t.start()
-        self.threads.append(t)
+        self.io_reactor.submit(handler())
 
     def __update_price(self, message):
 
-        data = json.loads(message)
-        payload = data['data']
-        symbol = payload['s']
-        received_price = Decimal(payload['p'])
-        if received_price != self.__last_price:
-            self.__last_price = received_price
-            self.__notify_consumers(symbol)
-
-    def __notify_consumers(self, symbol):
-
-        logging.debug("__notify_consumers : Start notifying consumers about price update")
-        payload = {"last_price": self.__last_price, "symbol":self.symbol}
-        for q in self.__consumers_queues:
-            try:
-                q.put_nowait(payload)
-            except queue.Full:
-                logging.warning(f"Price queue is full for symbol {symbol}. Dropping message.")
+        if self.tick_recorder is not None:
+            self.tick_recorder.record(RECORD_KIND_PRICE, message)
+        symbol = extract_string_field(message, SYMBOL_MARKER)
+        raw_price = self.__extract_raw_price(message, symbol)
+        if raw_price is None:
+            payload = loads(message)['data']
+            symbol = payload['s']
+            price_fields = self.__price_fields.get(symbol)
+            if price_fields is None:
+                return
+            raw_price = '/'.join(payload[field] for field in price_fields)
+        # Binance prints prices with a fixed number of decimals per symbol, so comparing the raw strings
+        # is equivalent to comparing Decimals and lets unchanged ticks skip the conversion entirely
+        if raw_price != self.__last_raw_prices.get(symbol):
+            self.__last_raw_prices[symbol] = raw_price
+            self.__notify_consumers(symbol, self.__to_price(raw_price))
+
+    def __extract_raw_price(self, message, symbol):
+        markers = self.__price_markers.get(symbol)
+        if markers is None:
+            return None
+        if len(markers) == 1:
+            return extract_string_field(message, markers[0])
+        bid = extract_string_field(message, markers[0])
+        ask = extract_string_field(message, markers[1])
+        if bid is None or ask is None:
+            return None
+        return bid + '/' + ask
+
+    def __to_price(self, raw_price):
+        if '/' not in raw_price:
+            return Decimal(raw_price)
+        raw_bid, raw_ask = raw_price.split('/')
+        bid = Decimal(raw_bid)
+        return ((bid + Decimal(raw_ask)) / 2).quantize(bid)
+
+    def __notify_consumers(self, symbol, last_price):
+
+        # One payload per price change, shared by every consumer of the symbol
+        payload = {"last_price": last_price, "symbol": symbol}
+        now = time.monotonic()
+        for mailbox in self.__consumers_queues.get(symbol, []):
+            mailbox.offer(payload, last_price, now)
@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+# Delay before a price held back by a minimum move only is delivered anyway
+TRAILING_DELAY = 1
+
+
+class PriceQosPolicy:
+    """Per-consumer filter letting a price through only after a minimum move or a minimum interval.
+
+    The last price held back is not lost, the mailbox of the consumer delivers it on the trailing edge, once the
+    interval, or the trailing delay without one, has elapsed since the last price let through.
+    """
+
+    def __init__(self, min_delta_percent=None, min_delta_ticks=None, tick_size=None, min_interval=None):
+        self.min_delta_ratio = None
+        if min_delta_percent is not None:
+            self.min_delta_ratio = Decimal(str(min_delta_percent)) / Decimal('100')
+        self.min_delta = None
+        if min_delta_ticks is not None and tick_size is not None:
+            self.min_delta = Decimal(str(min_delta_ticks)) * Decimal(str(tick_size))
+        self.min_interval = min_interval
+        self.last_price = None
+        self.last_time = None
+        self.filtered = 0
+
+    def accept(self, price, now):
+        if self.last_price is None or self.__is_meaningful(price, now):
+            self.last_price = price
+            self.last_time = now
+            return True
+        self.filtered += 1
+        return False
+
+    def trailing_time(self):
+        return self.last_time + (self.min_interval if self.min_interval is not None else TRAILING_DELAY)
+
+    def release(self, price, now):
+        # Trailing delivery of a held back price, False when the price is already the one delivered last
+        if price == self.last_price:
+            return False
+        self.last_price = price
+        self.last_time = now
+        return True
+
+    def __is_meaningful(self, price, now):
+        if self.min_interval is not None and now - self.last_time < self.min_interval:
+            return False
+        delta = abs(price - self.last_price)
+        if self.min_delta is not None and delta < self.min_delta:
+            return False
+        if self.min_delta_ratio is not None and delta < self.last_price * self.min_delta_ratio:
+            return False
+        return True
+
+
+def build_price_qos_policy(price_qos_config):
+    if price_qos_config is None:
+        return None
+    return PriceQosPolicy(
+        min_delta_percent=price_qos_config.min_delta_percent,
+        min_delta_ticks=price_qos_config.min_delta_ticks,
+        tick_size=price_qos_config.tick_size,
+        min_interval=price_qos_config.min_interval
+    )
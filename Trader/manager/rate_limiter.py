@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+
+HEADER_USED_WEIGHT = 'x-mbx-used-weight-'
+HEADER_ORDER_COUNT = 'x-mbx-order-count-'
+
+
+def interval_suffix(seconds):
+    # Interval part of the exchange usage headers, e.g. 60 -> 1m, 10 -> 10s
+    for unit, length in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds % length == 0:
+            return f'{seconds // length}{unit}'
+    return f'{seconds}s'
+
+
+class TokenBucket:
+    """Budget of `limit` units per `interval` seconds, refilled continuously to spread bursts.
+
+    The exchange counts usage in fixed windows, so the usage it reports, which also counts the requests of other
+    clients of the account, caps the tokens until its window ends.
+    """
+
+    def __init__(self, name, limit, interval, header):
+        self.name = name
+        self.limit = limit
+        self.interval = interval
+        self.header = header
+        self.rate = limit / interval
+        self.tokens = float(limit)
+        self.updated = time.time()
+        self.window = None
+        self.used = 0
+
+    def refill(self, now):
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.window == int(now // self.interval):
+            self.tokens = min(self.tokens, self.limit - self.used)
+
+    def wait_time(self, cost, now):
+        if cost <= 0 or self.tokens >= cost:
+            return 0
+        if self.window == int(now // self.interval) and self.limit - self.used < cost:
+            return (self.window + 1) * self.interval - now
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= cost
+        self.used += cost
+
+    def sync(self, used, now):
+        window = int(now // self.interval)
+        if window != self.window or used > self.used:
+            self.window = window
+            self.used = used
+        self.refill(now)
+
+
+class RateLimiter:
+    """Request weight and order count budgets shared by every request sent to the exchange.
+
+    `acquire` waits until both buckets hold the cost of a request, so requests queue near the limit instead of
+    being refused by the exchange, `try_acquire` takes it or tells how long to wait for it. Usage headers of the
+    responses resync the buckets, a 429 or 418 pauses every request for the time the exchange asks.
+    """
+
+    def __init__(self, weight_limit=6000, weight_interval=60, order_limit=100, order_interval=10):
+        self.weight = TokenBucket('weight', weight_limit, weight_interval,
+                                  HEADER_USED_WEIGHT + interval_suffix(weight_interval))
+        self.orders = TokenBucket('orders', order_limit, order_interval,
+                                  HEADER_ORDER_COUNT + interval_suffix(order_interval))
+        self.paused_until = 0
+        self.waited = 0
+        self.__lock = threading.Lock()
+
+    def acquire(self, weight, orders=0):
+        while True:
+            wait = self.try_acquire(weight, orders)
+            if wait <= 0:
+                return
+            self.waited += 1
+            time.sleep(wait)
+
+    def try_acquire(self, weight, orders=0):
+        # Takes the cost of a request when both buckets hold it, otherwise returns the seconds to wait for it
+        with self.__lock:
+            now = time.time()
+            wait = self.paused_until - now
+            if wait > 0:
+                return wait
+            self.weight.refill(now)
+            self.orders.refill(now)
+            wait = max(self.weight.wait_time(weight, now), self.orders.wait_time(orders, now))
+            if wait <= 0:
+                self.weight.take(weight)
+                self.orders.take(orders)
+            return wait
+
+    def update(self, limit_usage):
+        now = time.time()
+        with self.__lock:
+            for bucket in (self.weight, self.orders):
+                used = limit_usage.get(bucket.header)
+                if used is not None:
+                    bucket.sync(int(used), now)
+
+    def back_off(self, seconds):
+        with self.__lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+        logging.warning(f"back_off : Exchange rate limit hit, pausing requests for {seconds} s")
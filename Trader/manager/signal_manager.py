@@ -1,34 +1,104 @@
 import logging
 
 from manager.abstract_manager import AbstractManager
-from signal_detector.grid_signal_detector import GridSignalDetector
-from signal_detector.reverse_mean_signal_detector import ReverseMeanSignalDetector
+from manager.detector_process_pool import DetectorProcessPool, POOLED_DETECTORS
+from signal_detector.batch_reverse_mean_evaluator import BatchReverseMeanEvaluator
+from signal_detector.deep_signal_evaluator import DeepSignalEvaluator
+from signal_detector.deep_signal_model import DeepSignalModel
+from signal_detector.signal_detector_factory import build_signal_detector
 
 
 class SignalManager(AbstractManager):
 
-    def __init__(self, app_config):
+    def __init__(self, app_config, indicator_service=None):
         super().__init__(app_config)
-        self.signal_detectors = self.__extract_signal_detectors()
+        self.indicator_service = indicator_service
+        self.batch_evaluators = {}
+        self.deep_evaluators = {}
+        self.deep_models = {}
+        self.detector_pool = None
+        detector_pool_config = app_config.detector_pool_config
+        if detector_pool_config is not None and detector_pool_config.enabled:
+            self.detector_pool = DetectorProcessPool(app_config=app_config,
+                                                     processes=detector_pool_config.processes)
+            self.signal_detectors = self.detector_pool.signal_detectors + self.__extract_signal_detectors(
+                excluded_detectors=POOLED_DETECTORS)
+        else:
+            self.signal_detectors = self.__extract_signal_detectors()
 
     def start(self):
+        if self.detector_pool is not None:
+            logging.info('start : Starting detector worker processes')
+            self.detector_pool.start()
         logging.info('start : Starting signal detectors')
         for detector in self.signal_detectors:
             detector.start()
 
-    def __extract_signal_detectors(self):
+    def __extract_signal_detectors(self, excluded_detectors=()):
         logging.debug(f'__extract_signal_detectors : Extracting signal configs')
         signal_detectors = []
         signal_configs = self.app_config.signal_configs
         for config in signal_configs:
-            if config.detector == 'ReverseMeanSignalDetector':
-                detector = ReverseMeanSignalDetector(symbol=config.symbol, app_config=self.app_config)
-                signal_detectors.append(detector)
-            elif config.detector == 'GridSignalDetector':
-                detector = GridSignalDetector(symbol=config.symbol, app_config=self.app_config)
-                signal_detectors.append(detector)
+            if config.detector in excluded_detectors:
+                continue
+            detector = build_signal_detector(self.app_config, config, indicator_service=self.indicator_service)
+            if detector is None:
+                continue
+            if config.detector == 'DeepSignalDetector':
+                if not self.__add_to_deep_evaluator(detector, config.deep_signal):
+                    continue
+            elif getattr(detector, 'batch', False):
+                self.__add_to_batch_evaluator(detector)
+            signal_detectors.append(detector)
         return signal_detectors
 
+    def __add_to_deep_evaluator(self, detector, deep_signal_config):
+        if deep_signal_config is None:
+            logging.error(f"__add_to_deep_evaluator : No deep-signal model configured for symbol {detector.symbol}")
+            return False
+        model = self.deep_models.get(deep_signal_config.model)
+        if model is None:
+            try:
+                model = DeepSignalModel(deep_signal_config.model)
+            except Exception as e:
+                logging.error(f"__add_to_deep_evaluator : Unable to load the model {deep_signal_config.model}: {e}")
+                return False
+            self.deep_models[deep_signal_config.model] = model
+        period = self.__find_klines_period(detector.symbol)
+        evaluator = self.deep_evaluators.get((period, deep_signal_config.model))
+        if evaluator is None:
+            evaluator = DeepSignalEvaluator(period=period, model=model,
+                                            min_confidence=deep_signal_config.min_confidence,
+                                            latency_budget=deep_signal_config.latency_budget)
+            self.deep_evaluators[(period, deep_signal_config.model)] = evaluator
+        evaluator.add_detector(detector)
+        return True
+
+    def __add_to_batch_evaluator(self, detector):
+        period = self.__find_klines_period(detector.symbol)
+        evaluator = self.batch_evaluators.get(period)
+        if evaluator is None:
+            evaluator = BatchReverseMeanEvaluator(period=period)
+            self.batch_evaluators[period] = evaluator
+        evaluator.add_detector(detector)
+
+    def __find_klines_period(self, symbol):
+        period = None
+        for entry in self.app_config.klines_config:
+            if entry.symbol == symbol:
+                period = entry.period
+        return period
+
+    def add_close_listeners(self, scheduler):
+        for period, evaluator in self.batch_evaluators.items():
+            logging.info(f"add_close_listeners : {len(evaluator.detectors)} reverse mean detectors evaluated "
+                         f"in batch on {period} candle close")
+            scheduler.add_close_listener(period, evaluator.evaluate)
+        for (period, model), evaluator in self.deep_evaluators.items():
+            logging.info(f"add_close_listeners : {len(evaluator.detectors)} deep signal detectors evaluated "
+                         f"in batch with {model} on {period} candle close")
+            scheduler.add_close_listener(period, evaluator.evaluate)
+
     def get_price_queues(self):
         price_queues = {}
         for detector in self.signal_detectors:
@@ -43,6 +113,8 @@ class SignalManager(AbstractManager):
         threads = []
         for signal_detector in self.signal_detectors:
             threads += signal_detector.threads
+        if self.detector_pool is not None:
+            threads += self.detector_pool.threads
         return threads
 
     def get_klines_queues(self):
@@ -50,10 +122,11 @@ class SignalManager(AbstractManager):
         for detector in self.signal_detectors:
             symbol = detector.symbol
             if self.__need_klines(symbol=symbol, detector_type=detector.type):
+                klines_queue = detector.klines_queue
                 if klines_queues.get(symbol):
-                    klines_queues[symbol].append(detector.klines_queue)
+                    klines_queues[symbol].append(klines_queue)
                 else:
-                    klines_queues[symbol] = [detector.klines_queue]
+                    klines_queues[symbol] = [klines_queue]
         return klines_queues
 
     def __need_klines(self, symbol, detector_type):
@@ -1,35 +1,79 @@
+import math
+
 from manager.abstract_manager import AbstractManager
-from manager.klines_manager import KlinesManager
+from manager.candle_scheduler import CandleScheduler
+from manager.klines_manager import KlinesManager, KLINES_SOURCE_REST
 from manager.price_manager import PriceManager
+from replay.replay_klines_manager import ReplayKlinesManager
+from replay.replay_price_manager import ReplayPriceManager
+
+# Binance accepts at most 1024 streams on a single combined connection
+MAX_STREAMS_PER_CONNECTION = 1024
+MAX_CONNECTIONS = 16
 
 
 class SymbolDataManager(AbstractManager):
 
-    def __init__(self, app_config):
+    def __init__(self, app_config, io_reactor, tick_recorder=None, replay_engine=None, indicator_service=None):
         super().__init__(app_config)
+        self.io_reactor = io_reactor
+        self.indicator_service = indicator_service
+        self.tick_recorder = tick_recorder
+        self.replay_engine = replay_engine
+        self.candle_scheduler = CandleScheduler(io_reactor=io_reactor)
         self.price_managers = None
         self.klines_managers = None
 
     def init_price_managers(self, price_consumers_queues):
 
         price_managers = []
-        for symbol, price_consumer_queues in price_consumers_queues.items():
-            price_manager = PriceManager(app_config=self.app_config, symbol=symbol,
-                                         consumers_queues=price_consumer_queues)
-            price_managers.append(price_manager)
+        price_config = self.app_config.price_config
+        if self.replay_engine is not None:
+            price_managers.append(ReplayPriceManager(app_config=self.app_config, replay_engine=self.replay_engine,
+                                                     consumers_queues=price_consumers_queues))
+        elif price_config.combined_stream:
+            for shard in self.__shard_symbols(price_consumers_queues, price_config.connections):
+                price_manager = PriceManager(app_config=self.app_config, io_reactor=self.io_reactor,
+                                             consumers_queues=shard, tick_recorder=self.tick_recorder)
+                price_managers.append(price_manager)
+        else:
+            for symbol, price_consumer_queues in price_consumers_queues.items():
+                price_manager = PriceManager(app_config=self.app_config, io_reactor=self.io_reactor,
+                                             consumers_queues={symbol: price_consumer_queues},
+                                             tick_recorder=self.tick_recorder)
+                price_managers.append(price_manager)
         self.price_managers = price_managers
 
+    def __shard_symbols(self, price_consumers_queues, connections):
+        symbols = sorted(price_consumers_queues.keys())
+        connections = max(1, min(connections, len(symbols), MAX_CONNECTIONS))
+        connections = max(connections, math.ceil(len(symbols) / MAX_STREAMS_PER_CONNECTION))
+        shards = [{} for _ in range(connections)]
+        for index, symbol in enumerate(symbols):
+            shards[index % connections][symbol] = price_consumers_queues[symbol]
+        return [shard for shard in shards if shard]
+
     def init_klines_managers(self, klines_consumers_queues):
 
         klines_managers = []
         klines_config = self.app_config.klines_config
         for symbol, klines_consumer_queues in klines_consumers_queues.items():
             period = None
+            source = KLINES_SOURCE_REST
             for entry in klines_config:
                 if entry.symbol == symbol:
                     period = entry.period
-            klines_manager = KlinesManager(app_config=self.app_config, symbol=symbol, period=period,
-                                           consumers_queues=klines_consumer_queues)
+                    source = entry.source
+            if self.replay_engine is not None:
+                klines_manager = ReplayKlinesManager(app_config=self.app_config, replay_engine=self.replay_engine,
+                                                     symbol=symbol, period=period,
+                                                     consumers_queues=klines_consumer_queues,
+                                                     indicator_service=self.indicator_service)
+            else:
+                klines_manager = KlinesManager(app_config=self.app_config, io_reactor=self.io_reactor,
+                                               symbol=symbol, period=period, consumers_queues=klines_consumer_queues,
+                                               source=source, candle_scheduler=self.candle_scheduler,
+                                               indicator_service=self.indicator_service)
             klines_managers.append(klines_manager)
         self.klines_managers = klines_managers
 
@@ -38,11 +82,17 @@ class SymbolDataManager(AbstractManager):
             price_manager.start()
         for klines_manager in self.klines_managers:
             klines_manager.start()
+        if self.replay_engine is not None:
+            self.replay_engine.start()
+        else:
+            self.candle_scheduler.start()
 
     def get_threads(self):
         threads = []
         for price_manager in self.price_managers:
             threads += price_manager.threads
+        if self.replay_engine is not None:
+            threads += self.replay_engine.threads
         return threads
 
 
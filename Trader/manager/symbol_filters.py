@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+
+from manager.order_gateway import OrderRequest, PRIORITY_QUERY
+
+WEIGHT_EXCHANGE_INFO = 20
+FILTERS_TTL = 3600
+# Error code of an order refused by a symbol filter
+ERROR_FILTER_FAILURE = -1013
+# Quote precision of the exchange, used until the filters of a symbol are loaded
+DEFAULT_QUOTE_QUANTUM = Decimal('1E-8')
+
+
+def to_decimal(value):
+    # Floats go through their shortest repr, not their binary value
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def format_decimal(value):
+    # Plain decimal string, as expected by the exchange, str only uses an exponent for very small values
+    text = str(value)
+    return text if 'E' not in text else f'{value:f}'
+
+
+class SymbolFilters:
+    """Trading rules of a symbol, with the tick and step sizes kept as Decimals so prices and quantities are rounded
+    with a single quantize. The rounded values are exact Decimals the trader works with up to the API boundary."""
+
+    def __init__(self, symbol, tick_size, step_size, min_quantity='0', min_notional='0', quote_scale=8):
+        self.symbol = symbol
+        self.tick = Decimal(tick_size).normalize()
+        self.step = Decimal(step_size).normalize()
+        # Sizes that are a power of ten are their own quantum, the others round to a multiple first
+        self.price_quantum = Decimal(1).scaleb(self.tick.as_tuple().exponent)
+        self.quantity_quantum = Decimal(1).scaleb(self.step.as_tuple().exponent)
+        self.tick_is_quantum = self.tick == self.price_quantum
+        self.step_is_quantum = self.step == self.quantity_quantum
+        self.quote_quantum = Decimal(1).scaleb(-quote_scale)
+        self.min_quantity = Decimal(min_quantity)
+        self.min_notional = Decimal(min_notional)
+
+    def round_price(self, price, side='BUY'):
+        # Buys round down and sells round up to the tick, neither pays more than asked for
+        rounding = ROUND_CEILING if side == 'SELL' else ROUND_FLOOR
+        if self.tick_is_quantum:
+            return to_decimal(price).quantize(self.price_quantum, rounding=rounding)
+        return self.__round(to_decimal(price), self.tick, self.price_quantum, rounding)
+
+    def round_quantity(self, quantity):
+        if self.step_is_quantum:
+            return to_decimal(quantity).quantize(self.quantity_quantum, rounding=ROUND_FLOOR)
+        return self.__round(to_decimal(quantity), self.step, self.quantity_quantum, ROUND_FLOOR)
+
+    def round_quote(self, amount):
+        return amount.quantize(self.quote_quantum, rounding=ROUND_FLOOR)
+
+    def is_tradable(self, price, quantity):
+        return quantity > 0 and quantity >= self.min_quantity and price * quantity >= self.min_notional
+
+    def __round(self, value, size, quantum, rounding):
+        return ((value / size).to_integral_value(rounding=rounding) * size).quantize(quantum)
+
+
+def build_symbol_filters(symbol_info):
+    filters = {entry['filterType']: entry for entry in symbol_info.get('filters', [])}
+    price_filter = filters.get('PRICE_FILTER', {})
+    lot_size = filters.get('LOT_SIZE', {})
+    notional = filters.get('NOTIONAL') or filters.get('MIN_NOTIONAL') or {}
+    return SymbolFilters(
+        symbol=symbol_info['symbol'],
+        tick_size=price_filter.get('tickSize', '0.00000001'),
+        step_size=lot_size.get('stepSize', '0.00000001'),
+        min_quantity=lot_size.get('minQty', '0'),
+        min_notional=notional.get('minNotional', '0'),
+        quote_scale=symbol_info.get('quoteAssetPrecision', 8))
+
+
+class SymbolFilterCache:
+    """Symbol filters of the exchange, loaded in one exchangeInfo request at startup.
+
+    Filters older than the ttl, or invalidated after an order was refused by a filter, are still served while a
+    refresh goes through the order gateway, so readers on the price path never wait on the network. A symbol that
+    is not loaded yet is refreshed the same way, get returns None and the caller fails its order meanwhile.
+    """
+
+    def __init__(self, client=None, order_gateway=None, ttl=FILTERS_TTL):
+        self.client = client
+        self.order_gateway = order_gateway
+        self.ttl = ttl
+        self.filters = {}
+        self.loaded_at = {}
+        self.refreshing = set()
+        self.__lock = threading.Lock()
+
+    def load(self, symbols):
+        symbols = sorted(set(symbols))
+        if not symbols:
+            return
+        exchange_info = self.order_gateway.call(self.__request(symbols))
+        self.__store(exchange_info)
+        logging.info(f"load : Filters loaded for {len(symbols)} symbols")
+
+    def get(self, symbol):
+        filters = self.filters.get(symbol)
+        if filters is None:
+            self.refresh(symbol)
+            return None
+        if time.monotonic() - self.loaded_at[symbol] > self.ttl:
+            self.refresh(symbol)
+        return filters
+
+    def put(self, filters):
+        self.filters[filters.symbol] = filters
+        self.loaded_at[filters.symbol] = time.monotonic()
+
+    def invalidate(self, symbol):
+        self.loaded_at[symbol] = float('-inf')
+
+    def refresh(self, symbol):
+        with self.__lock:
+            if symbol in self.refreshing:
+                return
+            self.refreshing.add(symbol)
+        request = self.__request([symbol])
+        request.on_success = self.__store
+        request.on_failure = lambda error: self.__refresh_failed(symbol, error)
+        if not self.order_gateway.submit(request):
+            self.__refresh_failed(symbol, 'order gateway is full')
+
+    def __request(self, symbols):
+        return OrderRequest(
+            name=f'exchange info {",".join(symbols)}',
+            submit=lambda: self.client.exchange_info(symbols=symbols),
+            priority=PRIORITY_QUERY,
+            weight=WEIGHT_EXCHANGE_INFO,
+            orders=0)
+
+    def __store(self, exchange_info):
+        for symbol_info in exchange_info.get('symbols', []):
+            self.put(build_symbol_filters(symbol_info))
+            with self.__lock:
+                self.refreshing.discard(symbol_info['symbol'])
+
+    def __refresh_failed(self, symbol, error):
+        with self.__lock:
+            self.refreshing.discard(symbol)
+        logging.error(f"refresh : Error refreshing the filters of symbol {symbol}: {error}")
@@ -1,42 +1,136 @@
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from binance.spot import Spot
+from requests.adapters import HTTPAdapter
+
+from config.order_gateway_config import OrderGatewayConfig
 from manager.abstract_manager import AbstractManager
+from manager.order_gateway import OrderGateway
+from manager.order_snapshot import load_orders
+from manager.rate_limiter import RateLimiter
+from manager.symbol_filters import SymbolFilterCache
+from manager.price_qos import build_price_qos_policy
 from trader.grid_trader import GridTrader
 from trader.reverse_mean_trader import ReverserMeanTrader
 
 REVERSE_MEAN_SIGNAL_DETECTOR = 'ReverseMeanSignalDetector'
 GRID_SIGNAL_DETECTOR = 'GridSignalDetector'
+DEEP_SIGNAL_DETECTOR = 'DeepSignalDetector'
 
 
 class TraderManager(AbstractManager):
 
-    def __init__(self, app_config, database_manager):
+    def __init__(self, app_config, database_manager, spot_client=None, order_router=None):
         super().__init__(app_config)
         self.traders = []
         self.database_manager = database_manager
+        self.spot_client = spot_client
+        self.order_router = order_router
+        order_gateway_config = app_config.order_gateway_config or OrderGatewayConfig()
+        self.order_gateway_config = order_gateway_config
+        rate_limiter = None
+        if spot_client is None:
+            # The simulated client of a replay has no exchange limits to respect
+            rate_limiter = RateLimiter(weight_limit=order_gateway_config.weight_limit,
+                                       weight_interval=order_gateway_config.weight_interval,
+                                       order_limit=order_gateway_config.order_limit,
+                                       order_interval=order_gateway_config.order_interval)
+        self.order_gateway = OrderGateway(name='OrderGateway', workers=order_gateway_config.workers,
+                                          queue_size=order_gateway_config.queue_size, rate_limiter=rate_limiter)
+        self.symbol_filters = SymbolFilterCache(order_gateway=self.order_gateway)
 
     def start(self):
+        started = time.monotonic()
         logging.info("start : Loading traders...")
         traders = self.database_manager.load_all_traders()
+        if self.spot_client is None:
+            self.spot_client = self.__build_spot_client()
+        self.order_gateway.start()
         self.__extract_traders(traders)
+        self.symbol_filters.client = self.spot_client
+        self.symbol_filters.load([trader.trader.symbol for trader in self.traders])
+        # Trades are loaded, their orders fetched in bulk per symbol, then traders reconcile and start in parallel
+        self.__run_concurrently(lambda trader: trader.load_trades(), self.traders)
+        order_ids = {}
         for trader in self.traders:
-            trader.start()
+            trader_order_ids, trader_client_order_ids = trader.open_order_ids()
+            symbol_order_ids = order_ids.setdefault(trader.trader.symbol, ([], []))
+            symbol_order_ids[0].extend(trader_order_ids)
+            symbol_order_ids[1].extend(trader_client_order_ids)
+        orders = dict(zip(order_ids, self.__run_concurrently(self.__load_orders, list(order_ids.items()))))
+        self.__run_concurrently(lambda trader: self.__start_trader(trader, orders.get(trader.trader.symbol), started),
+                                self.traders)
+        logging.info(f"start : {len(self.traders)} traders ready in {time.monotonic() - started:.2f}s")
+
+    def __run_concurrently(self, function, items):
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=self.order_gateway_config.workers,
+                                thread_name_prefix='TraderManager-start') as executor:
+            return list(executor.map(function, items))
+
+    def __load_orders(self, symbol_order_ids):
+        symbol, (order_ids, client_order_ids) = symbol_order_ids
+        try:
+            return load_orders(self.spot_client, self.order_gateway, symbol, order_ids, client_order_ids)
+        except Exception as e:
+            # Traders fall back to querying their orders one by one
+            logging.error(f"__load_orders : Error loading the orders of symbol {symbol}: {e}")
+            return {}
+
+    def __start_trader(self, trader, orders, started):
+        try:
+            trader.start(orders)
+            logging.info(f"__start_trader : Trader {trader.name} ready in {time.monotonic() - started:.2f}s")
+        except Exception as e:
+            logging.error(f"__start_trader : Error starting trader {trader.name}: {e}", exc_info=True)
 
     def __extract_traders(self, traders):
         logging.debug(f'__extract_traders : Extracting traders')
         for trader in traders:
-            if trader.signal_detector == REVERSE_MEAN_SIGNAL_DETECTOR:
-                trader = ReverserMeanTrader(
+            if trader.signal_detector in (REVERSE_MEAN_SIGNAL_DETECTOR, DEEP_SIGNAL_DETECTOR):
+                trader_instance = ReverserMeanTrader(
                     api_config=self.app_config.api_config,
                     trader=trader,
-                    database_manager=self.database_manager)
-                self.traders.append(trader)
-            elif trader.detector == GRID_SIGNAL_DETECTOR:
-                trader = GridTrader(
+                    database_manager=self.database_manager,
+                    client=self.spot_client)
+            elif trader.signal_detector == GRID_SIGNAL_DETECTOR:
+                trader_instance = GridTrader(
                     api_config=self.app_config.api_config,
                     trader=trader,
-                    database_manager=self.database_manager)
-                self.traders.append(trader)
+                    database_manager=self.database_manager,
+                    client=self.spot_client)
+            else:
+                continue
+            trader_config = self.__find_trader_config(trader)
+            trader_instance.trader_config = trader_config
+            trader_instance.order_router = self.order_router
+            trader_instance.order_gateway = self.order_gateway
+            trader_instance.symbol_filters = self.symbol_filters
+            if trader_config is not None:
+                trader_instance.price_queue.qos = build_price_qos_policy(trader_config.price_qos)
+            self.traders.append(trader_instance)
+
+    def __build_spot_client(self):
+        # One client for every trader, returning the usage headers the rate limiter is refreshed from
+        api_config = self.app_config.api_config
+        credentials = api_config.credentials
+        client = Spot(
+            api_key=credentials.api_key,
+            api_secret=credentials.secret,
+            base_url=api_config.trades_config.base_url,
+            show_limit_usage=True)
+        # A connection per gateway worker, so the orders of a batch are sent in parallel
+        client.session.mount('https://', HTTPAdapter(pool_maxsize=self.order_gateway_config.workers))
+        return client
+
+    def __find_trader_config(self, trader):
+        for trader_config in self.app_config.traders_config or []:
+            if trader_config.symbol == trader.symbol and trader_config.detector == trader.signal_detector:
+                return trader_config
+        return None
 
     def get_price_queues(self):
         price_queues = {}
@@ -47,14 +141,8 @@ class TraderManager(AbstractManager):
                 price_queues[trader.trader.symbol] = [trader.price_queue]
         return price_queues
 
-    def get_order_queues(self):
-        order_queues = []
-        for trader in self.traders:
-            order_queues.append(trader.order_queue)
-        return order_queues
-
     def get_threads(self):
-        threads = []
+        threads = list(self.order_gateway.threads)
         for trader in self.traders:
             threads += trader.threads
         return threads
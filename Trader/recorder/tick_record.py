@@ -0,0 +1,55 @@
+import mmap
+import os
+import struct
+
+RECORD_KIND_PRICE = 0
+RECORD_KIND_ORDER = 1
+
+SEGMENT_EXTENSION = '.ticks'
+
+# receive timestamp (ns), record kind, symbol, price, quantity : 40 bytes per record, no padding
+TICK_RECORD_STRUCT = struct.Struct('<qB15sdd')
+TICK_RECORD_SIZE = TICK_RECORD_STRUCT.size
+
+
+def tick_record_dtype():
+    import numpy as np
+    return np.dtype([
+        ('receive_ts', '<i8'),
+        ('kind', 'u1'),
+        ('symbol', 'S15'),
+        ('price', '<f8'),
+        ('quantity', '<f8')
+    ])
+
+
+def pack_tick_record(receive_ts, kind, symbol, price, quantity):
+    return TICK_RECORD_STRUCT.pack(receive_ts, kind, symbol.encode('ascii')[:15], price, quantity)
+
+
+def list_segments(directory):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_EXTENSION))
+    return [os.path.join(directory, name) for name in names]
+
+
+def load_segment(path):
+    import numpy as np
+    # A segment still being written may end with a partial record, only map the complete ones
+    count = os.path.getsize(path) // TICK_RECORD_SIZE
+    if count == 0:
+        return np.empty(0, dtype=tick_record_dtype())
+    return np.memmap(path, dtype=tick_record_dtype(), mode='r', shape=(count,))
+
+
+def iter_segment(path):
+    size = os.path.getsize(path)
+    size -= size % TICK_RECORD_SIZE
+    if size == 0:
+        return
+    with open(path, 'rb') as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(0, size, TICK_RECORD_SIZE):
+                receive_ts, kind, symbol, price, quantity = TICK_RECORD_STRUCT.unpack_from(mapped, offset)
+                yield receive_ts, kind, symbol.rstrip(b'\0').decode('ascii'), price, quantity
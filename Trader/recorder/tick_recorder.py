@@ -0,0 +1,110 @@
+import logging
+import os
+import queue
+import threading
+import time
+
+from recorder.tick_record import pack_tick_record, SEGMENT_EXTENSION, RECORD_KIND_ORDER
+from utils.json_util import loads
+
+WRITE_BATCH_SIZE = 1000
+FLUSH_INTERVAL = 1
+
+
+class TickRecorder:
+    """Append-only capture of raw market and user data messages, written by a background thread."""
+
+    def __init__(self, recorder_config):
+        self.directory = recorder_config.directory
+        self.segment_records = recorder_config.segment_records
+        self.buffer = queue.Queue(maxsize=recorder_config.buffer_size)
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.recorded = 0
+        self.dropped = 0
+        self.__segment = None
+        self.__segment_index = 0
+        self.__segment_size = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        t = threading.Thread(target=self.process_records, name='TickRecorder', daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def stop(self):
+        self.stop_event.set()
+
+    def record(self, kind, message):
+        # Called on the hot path: only timestamp and enqueue, the writer thread does the parsing
+        try:
+            self.buffer.put_nowait((time.time_ns(), kind, message))
+        except queue.Full:
+            self.dropped += 1
+
+    def process_records(self):
+        last_flush = time.monotonic()
+        while not (self.stop_event.is_set() and self.buffer.empty()):
+            batch = self.__next_batch()
+            if batch:
+                self.__write_batch(batch)
+            if self.__segment is not None and time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                self.__segment.flush()
+                last_flush = time.monotonic()
+        self.__close_segment()
+
+    def __next_batch(self):
+        batch = []
+        try:
+            batch.append(self.buffer.get(timeout=FLUSH_INTERVAL))
+            while len(batch) < WRITE_BATCH_SIZE:
+                batch.append(self.buffer.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def __write_batch(self, batch):
+        records = []
+        for receive_ts, kind, message in batch:
+            try:
+                symbol, price, quantity = self.__extract_fields(kind, message)
+                records.append(pack_tick_record(receive_ts, kind, symbol, price, quantity))
+            except Exception as e:
+                logging.error(f"__write_batch : An error occurred while recording message {message}: {e}")
+        while records:
+            if self.__segment is None or self.__segment_size >= self.segment_records:
+                self.__open_segment()
+            count = min(len(records), self.segment_records - self.__segment_size)
+            self.__segment.write(b''.join(records[:count]))
+            self.__segment_size += count
+            self.recorded += count
+            records = records[count:]
+
+    def __open_segment(self):
+        self.__close_segment()
+        name = f"ticks-{time.time_ns()}-{self.__segment_index:06d}{SEGMENT_EXTENSION}"
+        self.__segment = open(os.path.join(self.directory, name), 'ab')
+        self.__segment_index += 1
+        self.__segment_size = 0
+        logging.info(f"__open_segment : Recording ticks into {name}")
+
+    def __close_segment(self):
+        if self.__segment is not None:
+            self.__segment.close()
+            self.__segment = None
+
+    def __extract_fields(self, kind, message):
+        payload = loads(message)
+        payload = payload.get('data', payload)
+        symbol = payload.get('s', '')
+        if kind == RECORD_KIND_ORDER:
+            if payload.get('e') != 'executionReport':
+                return symbol, 0.0, 0.0
+            price = float(payload['L']) or float(payload['p'])
+            quantity = float(payload['l']) or float(payload['q'])
+            return symbol, price, quantity
+        if 'p' in payload:
+            return symbol, float(payload['p']), float(payload['q'])
+        if 'b' in payload and 'a' in payload:
+            return symbol, (float(payload['b']) + float(payload['a'])) / 2, float(payload['B'])
+        return symbol, float(payload['c']), float(payload['v'])
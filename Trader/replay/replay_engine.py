@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from decimal import Decimal
+
+from date.date_util import interval_open_time
+from recorder.tick_record import list_segments, iter_segment, RECORD_KIND_PRICE
+from replay.simulated_spot_client import SimulatedSpotClient
+
+
+class ReplayEngine:
+    """Drives the live pipeline from recorded ticks, at real time, N times speed or as fast as possible."""
+
+    def __init__(self, replay_config):
+        self.directory = replay_config.directory
+        self.speed = replay_config.speed
+        self.spot_client = SimulatedSpotClient()
+        self.threads = []
+        self.price_consumers_queues = {}
+        self.klines_managers = {}
+        self.close_listeners = {}
+        self.replayed = 0
+        self.finished = threading.Event()
+        self.__last_prices = {}
+        self.__open_times = {}
+
+    def add_price_consumers(self, symbol, consumers_queues):
+        self.price_consumers_queues.setdefault(symbol, []).extend(consumers_queues)
+
+    def add_klines_manager(self, klines_manager):
+        self.klines_managers.setdefault(klines_manager.symbol, []).append(klines_manager)
+
+    def add_close_listener(self, period, listener):
+        self.close_listeners.setdefault(period, []).append(listener)
+
+    def start(self):
+        if self.threads:
+            return
+        t = threading.Thread(target=self.replay, name='ReplayEngine', daemon=True)
+        t.start()
+        self.threads.append(t)
+
+    def replay(self):
+        segments = list_segments(self.directory)
+        logging.info(f"replay : Replaying {len(segments)} segments from {self.directory} at speed {self.speed}")
+        started = time.perf_counter()
+        first_ts = None
+        for segment in segments:
+            for receive_ts, kind, symbol, price, quantity in iter_segment(segment):
+                if kind != RECORD_KIND_PRICE:
+                    continue
+                if first_ts is None:
+                    first_ts = receive_ts
+                if self.speed:
+                    self.__wait_until(started, (receive_ts - first_ts) / 1e9 / self.speed)
+                self.__replay_tick(receive_ts, symbol, price, quantity)
+        elapsed = time.perf_counter() - started
+        rate = self.replayed / elapsed if elapsed else 0
+        logging.info(f"replay : Replay finished, {self.replayed} ticks in {elapsed:.1f}s ({rate:,.0f} ticks/s), "
+                     f"{self.spot_client.filled} simulated fills")
+        self.finished.set()
+
+    def __wait_until(self, started, offset):
+        delay = offset - (time.perf_counter() - started)
+        if delay > 0:
+            time.sleep(delay)
+
+    def __process_candle_closes(self, timestamp):
+        for period, listeners in self.close_listeners.items():
+            open_time = interval_open_time(timestamp, period)
+            last_open_time = self.__open_times.get(period)
+            self.__open_times[period] = open_time
+            if last_open_time is None or open_time <= last_open_time:
+                continue
+            # Close the candle of every symbol of the interval, not only of the one that ticked, like a candle close
+            for klines_managers in self.klines_managers.values():
+                for klines_manager in klines_managers:
+                    if klines_manager.period == period:
+                        klines_manager.close_candle(open_time)
+            for listener in listeners:
+                listener(period)
+
+    def __replay_tick(self, receive_ts, symbol, price, quantity):
+        self.replayed += 1
+        if self.close_listeners:
+            self.__process_candle_closes(receive_ts // 1000000)
+        for klines_manager in self.klines_managers.get(symbol, []):
+            klines_manager.on_tick(receive_ts // 1000000, price, quantity)
+        if price == self.__last_prices.get(symbol):
+            return
+        self.__last_prices[symbol] = price
+        last_price = Decimal(repr(price))
+        self.spot_client.on_price(symbol, last_price)
+        payload = {"last_price": last_price, "symbol": symbol}
+        now = time.monotonic()
+        for mailbox in self.price_consumers_queues.get(symbol, []):
+            mailbox.offer(payload, last_price, now)
@@ -0,0 +1,62 @@
+import logging
+import queue
+
+from date.date_util import interval_open_time, interval_to_milliseconds
+from manager.abstract_manager import AbstractManager
+from manager.klines_store import KlinesStore
+from manager.klines_update import KlinesUpdate
+
+
+class ReplayKlinesManager(AbstractManager):
+    """Builds candles out of replayed ticks and publishes them like the live klines manager at each close."""
+
+    def __init__(self, app_config, replay_engine, symbol, period, consumers_queues, indicator_service=None):
+        super().__init__(app_config)
+        self.symbol = symbol
+        self.period = period
+        self.threads = []
+        self.replay_engine = replay_engine
+        self.consumers_queues = consumers_queues
+        self.indicator_service = indicator_service
+        self.interval = interval_to_milliseconds(period)
+        self.store = KlinesStore(symbol=symbol, period=period)
+        self.__current = None
+
+    def start(self):
+        self.replay_engine.add_klines_manager(self)
+
+    def on_tick(self, timestamp, price, quantity):
+        open_time = interval_open_time(timestamp, self.period)
+        self.close_candle(open_time)
+        if self.__current is None:
+            self.__current = [open_time, price, price, price, price, 0.0, 0.0, 0]
+        candle = self.__current
+        candle[2] = max(candle[2], price)
+        candle[3] = min(candle[3], price)
+        candle[4] = price
+        candle[5] += quantity
+        candle[6] += quantity * price
+        candle[7] += 1
+
+    def close_candle(self, open_time):
+        # Publishes the current candle once a tick or the replay clock reaches a later candle
+        if self.__current is not None and open_time > self.__current[0]:
+            self.__notify_consumers(self.store.merge([self.__to_kline(self.__current)]))
+            self.__current = None
+
+    def __to_kline(self, candle):
+        open_time, open_price, high, low, close, volume, quote_volume, trades = candle
+        return [open_time, repr(open_price), repr(high), repr(low), repr(close), repr(volume),
+                open_time + self.interval - 1, repr(quote_volume), trades, '0', '0', '0']
+
+    def __notify_consumers(self, klines):
+
+        window = self.store.window()
+        if self.indicator_service is not None:
+            self.indicator_service.update(window)
+        message = KlinesUpdate(symbol=self.symbol, period=self.period, klines=klines, window=window)
+        for q in self.consumers_queues:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                logging.warning(f"Klines queue is full for symbol {self.symbol}. Dropping message.")
@@ -0,0 +1,15 @@
+from manager.abstract_manager import AbstractManager
+
+
+class ReplayPriceManager(AbstractManager):
+
+    def __init__(self, app_config, replay_engine, consumers_queues):
+        super().__init__(app_config)
+        self.threads = []
+        self.replay_engine = replay_engine
+        self.symbols = list(consumers_queues.keys())
+        self.__consumers_queues = consumers_queues
+
+    def start(self):
+        for symbol, consumers_queues in self.__consumers_queues.items():
+            self.replay_engine.add_price_consumers(symbol, consumers_queues)
@@ -0,0 +1,194 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+import uuid
+from decimal import Decimal
+
+from binance.error import ClientError
+
+from manager.order_snapshot import ERROR_UNKNOWN_ORDER
+
+SIMULATED_COMMISSION_RATE = Decimal('0.001')
+
+
+class SimulatedOrder:
+
+    def __init__(self, order_id, client_order_id, symbol, side, order_type, quantity, price):
+        self.order_id = order_id
+        self.client_order_id = client_order_id
+        self.symbol = symbol
+        self.side = side
+        self.type = order_type
+        self.quantity = quantity
+        self.price = price
+        self.status = 'NEW'
+        self.executed_quantity = Decimal('0')
+        self.cumulative_quote_quantity = Decimal('0')
+        self.last_price = Decimal('0')
+
+
+class SimulatedSpotClient:
+    """Stand-in for binance.spot.Spot matching orders against replayed prices, shared by every trader."""
+
+    def __init__(self):
+        self.order_queues = []
+        self.__orders = {}
+        self.__client_orders = {}
+        self.__open_orders = {}
+        self.__last_prices = {}
+        self.__order_ids = itertools.count(1)
+        self.__lock = threading.RLock()
+        self.filled = 0
+
+    def set_order_queues(self, order_queues):
+        self.order_queues = order_queues
+
+    def new_order(self, symbol, side, type, **kwargs):
+        side = side.upper()
+        quantity = Decimal(str(kwargs['quantity']))
+        price = Decimal(str(kwargs['price'])) if kwargs.get('price') is not None else None
+        client_order_id = kwargs.get('newClientOrderId') or uuid.uuid4().hex
+        with self.__lock:
+            order = SimulatedOrder(next(self.__order_ids), client_order_id, symbol, side, type.upper(),
+                                   quantity, price)
+            self.__orders[order.order_id] = order
+            self.__client_orders[order.client_order_id] = order
+            last_price = self.__last_prices.get(symbol)
+            if order.type == 'MARKET':
+                if last_price is None:
+                    raise ValueError(f"No replayed price yet for symbol {symbol}")
+                self.__fill(order, last_price)
+            else:
+                # Limit orders rest until the next replayed price, so the caller records the trade before its fill
+                self.__open_orders.setdefault(symbol, []).append(order)
+            return self.__to_response(order)
+
+    def get_order(self, symbol, **kwargs):
+        with self.__lock:
+            return self.__to_response(self.__find_order(kwargs))
+
+    def get_open_orders(self, symbol=None, **kwargs):
+        with self.__lock:
+            return [self.__to_response(order) for order in self.__orders.values()
+                    if order.status == 'NEW' and symbol in (None, order.symbol)]
+
+    def get_orders(self, symbol, **kwargs):
+        start_id = int(kwargs.get('orderId') or 0)
+        with self.__lock:
+            orders = [order for order_id, order in sorted(self.__orders.items())
+                      if order.symbol == symbol and order_id >= start_id]
+            return [self.__to_response(order) for order in orders[:kwargs.get('limit', 500)]]
+
+    def cancel_order(self, symbol, **kwargs):
+        with self.__lock:
+            order = self.__find_order(kwargs)
+            if order.status == 'NEW':
+                order.status = 'CANCELED'
+                self.__open_orders[symbol].remove(order)
+                self.__publish(order, execution_type='CANCELED')
+            return self.__to_response(order)
+
+    def cancel_and_replace(self, symbol, side, type, cancelReplaceMode, **kwargs):
+        with self.__lock:
+            order = self.__find_order({'orderId': kwargs.pop('cancelOrderId', None),
+                                       'origClientOrderId': kwargs.pop('cancelOrigClientOrderId', None)})
+            if order.status != 'NEW':
+                raise ValueError(f"Order {order.order_id} cannot be canceled, it is {order.status}")
+            cancel_response = self.cancel_order(symbol, orderId=order.order_id)
+            new_order_response = self.new_order(symbol, side, type, **kwargs)
+            return {
+                'cancelResult': 'SUCCESS',
+                'newOrderResult': 'SUCCESS',
+                'cancelResponse': cancel_response,
+                'newOrderResponse': new_order_response
+            }
+
+    def exchange_info(self, symbol=None, symbols=None):
+        # Recorded sessions carry no filters, the finest ones leave replayed orders as the traders priced them
+        symbols = symbols or ([symbol] if symbol else [])
+        return {'symbols': [{
+            'symbol': name,
+            'quoteAssetPrecision': 8,
+            'filters': [
+                {'filterType': 'PRICE_FILTER', 'tickSize': '0.00000001'},
+                {'filterType': 'LOT_SIZE', 'stepSize': '0.00000001', 'minQty': '0'}
+            ]
+        } for name in symbols]}
+
+    def on_price(self, symbol, price):
+        with self.__lock:
+            self.__last_prices[symbol] = price
+            open_orders = self.__open_orders.get(symbol)
+            if not open_orders:
+                return
+            crossed = [order for order in open_orders if self.__crosses(order, price)]
+            for order in crossed:
+                open_orders.remove(order)
+                self.__fill(order, order.price)
+
+    def __crosses(self, order, price):
+        if order.side == 'BUY':
+            return price <= order.price
+        return price >= order.price
+
+    def __find_order(self, params):
+        order_id = params.get('orderId')
+        if order_id is not None:
+            order = self.__orders.get(int(order_id))
+        else:
+            order = self.__client_orders.get(params.get('origClientOrderId'))
+        if order is None:
+            raise ClientError(400, ERROR_UNKNOWN_ORDER, 'Order does not exist.', {})
+        return order
+
+    def __fill(self, order, price):
+        order.status = 'FILLED'
+        order.executed_quantity = order.quantity
+        order.cumulative_quote_quantity = order.quantity * price
+        order.last_price = price
+        self.filled += 1
+        self.__publish(order, execution_type='TRADE')
+
+    def __publish(self, order, execution_type):
+        commission = order.cumulative_quote_quantity * SIMULATED_COMMISSION_RATE
+        message = {
+            'e': 'executionReport',
+            'E': int(time.time() * 1000),
+            's': order.symbol,
+            'c': order.client_order_id,
+            'S': order.side,
+            'o': order.type,
+            'q': str(order.quantity),
+            'p': str(order.price or Decimal('0')),
+            'x': execution_type,
+            'X': order.status,
+            'i': order.order_id,
+            'l': str(order.executed_quantity),
+            'z': str(order.executed_quantity),
+            'L': str(order.last_price),
+            'n': str(commission),
+            'Z': str(order.cumulative_quote_quantity)
+        }
+        for q in self.order_queues:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                logging.warning("__publish : order queue is full. Dropping simulated execution report.")
+
+    def __to_response(self, order):
+        return {
+            'symbol': order.symbol,
+            'orderId': order.order_id,
+            'clientOrderId': order.client_order_id,
+            'price': str(order.price if order.price is not None else order.last_price),
+            'origQty': str(order.quantity),
+            'executedQty': str(order.executed_quantity),
+            'cummulativeQuoteQty': str(order.cumulative_quote_quantity),
+            'status': order.status,
+            'type': order.type,
+            'side': order.side,
+            'fills': [{'price': str(order.last_price), 'qty': str(order.executed_quantity)}]
+            if order.status == 'FILLED' else []
+        }
@@ -0,0 +1,56 @@
+import logging
+import queue
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from utils.conflating_mailbox import ConflatingMailbox
+
+
+class AbstractBatchEvaluator(ABC):
+    """Evaluates every detector sharing a klines interval together, once per candle close.
+
+    Each detector's klines queue becomes a latest-value mailbox read by the evaluator, which then works on the
+    closes of all symbols stacked into one (symbols, length) array.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.detectors = {}
+        self.klines_queues = {}
+        self.windows = {}
+        self.evaluations = 0
+
+    def add_detector(self, detector):
+        detector.interval = self.period
+        detector.klines_queue = ConflatingMailbox()
+        self.detectors[detector.symbol] = detector
+        self.klines_queues[detector.symbol] = detector.klines_queue
+
+    def evaluate(self, period=None):
+        started = time.perf_counter()
+        try:
+            for symbol, klines_queue in self.klines_queues.items():
+                try:
+                    self.windows[symbol] = klines_queue.get_nowait().window
+                except queue.Empty:
+                    continue
+            symbols = self.evaluate_windows()
+            self.evaluations += 1
+            logging.debug(f"evaluate : {symbols} {self.period} symbols evaluated by {type(self).__name__} in "
+                          f"{(time.perf_counter() - started) * 1000:.2f}ms")
+        except Exception as e:
+            logging.error(f"evaluate : An error occurred while evaluating {self.period} signals in "
+                          f"{type(self).__name__}", exc_info=True)
+
+    @abstractmethod
+    def evaluate_windows(self):
+        pass
+
+    def stack_closes(self, length):
+        symbols = [symbol for symbol, window in self.windows.items() if len(window) >= length]
+        closes = np.empty((len(symbols), length))
+        for row, symbol in enumerate(symbols):
+            closes[row] = self.windows[symbol].close[-length:]
+        return symbols, closes
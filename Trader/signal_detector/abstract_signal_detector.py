@@ -3,6 +3,8 @@ import queue
 import threading
 from abc import ABC
 
+from utils.conflating_mailbox import ConflatingMailbox
+
 
 class AbstractSignalDetector(ABC):
 
@@ -10,11 +12,12 @@ class AbstractSignalDetector(ABC):
         self.last_price = None
         self.app_config = app_config
         self.symbol = symbol
-        self.price_queue = queue.Queue(maxsize=1000)
+        self.price_queue = ConflatingMailbox()
         self.stop_event = threading.Event()
         self.threads = []
         self.type = type
         self.signal_consumers = []
+        self.signal_gate = None
 
     def start(self):
         self.init_price_handling()
@@ -47,6 +50,8 @@ class AbstractSignalDetector(ABC):
 
     def notify_consumers(self, message):
 
+        if self.signal_gate is not None and not self.signal_gate.accept(message):
+            return
         logging.debug(f"__notify_consumers : Start notifying consumers about detected signal {message}")
         for q in self.signal_consumers:
             try:
@@ -55,5 +60,10 @@ class AbstractSignalDetector(ABC):
                 logging.warning(
                     f"Signal queue is full for symbol {self.symbol} and detector {self.type}. Dropping message.")
 
+    def clear_signal_state(self):
+        # The condition behind the last signal went away, the next one opens a new state
+        if self.signal_gate is not None:
+            self.signal_gate.clear()
+
     def add_signal_consumer(self, signal_queue):
         self.signal_consumers.append(signal_queue)
@@ -0,0 +1,48 @@
+import numpy as np
+
+from signal_detector.abstract_batch_evaluator import AbstractBatchEvaluator
+from signal_detector.model.Signal import Signal
+from signal_detector.model.signal_type import SIGNAL_TYPE_BUY
+
+
+class BatchReverseMeanEvaluator(AbstractBatchEvaluator):
+    """Evaluates the reverse mean bands of every symbol sharing an interval in one vectorized pass.
+
+    Signals are dispatched through each symbol's ReverseMeanSignalDetector, which keeps handling prices and
+    consumers.
+    """
+
+    def __init__(self, period, bollinger_window=20, bollinger_num_std=2):
+        super().__init__(period)
+        self.bollinger_window = bollinger_window
+        self.bollinger_num_std = bollinger_num_std
+
+    def evaluate_windows(self):
+        symbols, closes = self.stack_closes(self.bollinger_window)
+        if not symbols:
+            return 0
+        for symbol, signal_type in zip(symbols, self.compute_signal_types(closes)):
+            if signal_type is None:
+                self.detectors[symbol].clear_signal_state()
+            else:
+                self.__notify(symbol)
+        return len(symbols)
+
+    def compute_signal_types(self, closes):
+        middle_band = closes.mean(axis=1)
+        lower_band = middle_band - closes.std(axis=1, ddof=1) * self.bollinger_num_std
+        last_close = closes[:, -1]
+        buy = last_close < lower_band
+        sell = ~buy & (last_close > middle_band)
+        return np.where(buy, "BUY", np.where(sell, "SELL", None))
+
+    def __notify(self, symbol):
+        detector = self.detectors[symbol]
+        # Same message as the per symbol detector, which emits the buy signal type for both band crossings
+        message = Signal(
+            detector=detector.type,
+            symbol=symbol,
+            signal_type=SIGNAL_TYPE_BUY,
+            price=detector.last_price
+        )
+        detector.notify_consumers(message)
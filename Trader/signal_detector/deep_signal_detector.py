@@ -1,12 +1,12 @@
-from manager.abstract_manager import AbstractManager
 from signal_detector.abstract_signal_detector import AbstractSignalDetector
 
 
 class DeepSignalDetector(AbstractSignalDetector):
-
-    def __init__(self, app_config):
-        super().__init__(app_config)
-
-
-    def start(self):
-        pass
\ No newline at end of file
+    """Model driven detector. Inference runs in a DeepSignalEvaluator batching every symbol of the interval at each
+    candle close, the detector keeps the last price and the signal consumers of its symbol."""
+
+    def __init__(self, app_config, symbol):
+        super().__init__(app_config=app_config, symbol=symbol, type='DeepSignalDetector')
+        self.klines_queue = None
+        self.batch = True
+        self.interval = None
@@ -0,0 +1,68 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from signal_detector.abstract_batch_evaluator import AbstractBatchEvaluator
+from signal_detector.deep_signal_model import DEEP_SIGNAL_CLASSES, build_features
+from signal_detector.model.Signal import Signal
+from signal_detector.model.signal_type import SIGNAL_TYPE_BUY, SIGNAL_TYPE_SELL
+
+SIGNAL_TYPES = {"BUY": SIGNAL_TYPE_BUY, "SELL": SIGNAL_TYPE_SELL}
+
+
+class DeepSignalEvaluator(AbstractBatchEvaluator):
+    """Runs one batched inference over every DeepSignalDetector of an interval and model at each candle close.
+
+    The model runs on a thread of its own, never on the IO loop, and only hands back the signal type detected for
+    each symbol, the detectors are updated by the thread evaluating the close.
+    """
+
+    def __init__(self, period, model, min_confidence=0.6, latency_budget=0.05):
+        super().__init__(period)
+        self.model = model
+        self.min_confidence = min_confidence
+        self.latency_budget = latency_budget
+        self.over_budget = 0
+        self.inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'DeepSignal-{period}')
+
+    def evaluate_windows(self):
+        symbols, closes = self.stack_closes(self.model.lookback + 1)
+        if not symbols:
+            return 0
+        signal_types = self.inference_executor.submit(self.infer_signal_types, symbols, closes).result()
+        for symbol, signal_type in zip(symbols, signal_types):
+            detector = self.detectors[symbol]
+            if signal_type is None:
+                detector.clear_signal_state()
+                continue
+            message = Signal(
+                detector=detector.type,
+                symbol=symbol,
+                signal_type=signal_type,
+                price=detector.last_price
+            )
+            detector.notify_consumers(message)
+        return len(symbols)
+
+    def infer_signal_types(self, symbols, closes):
+        # Signal type of each symbol, None below the confidence threshold
+        started = time.perf_counter()
+        probabilities = self.model.predict(build_features(closes))
+        elapsed = time.perf_counter() - started
+        if elapsed > self.latency_budget:
+            self.over_budget += 1
+            logging.warning(f"infer_signal_types : Inference of {len(symbols)} {self.period} symbols took "
+                            f"{elapsed * 1000:.1f}ms, over the {self.latency_budget * 1000:.0f}ms budget "
+                            f"({self.over_budget} times)")
+        classes = probabilities.argmax(axis=1)
+        confidences = probabilities[np.arange(len(symbols)), classes]
+        signal_types = []
+        for detected_class, confidence in zip(classes, confidences):
+            detected_signal_type = DEEP_SIGNAL_CLASSES[detected_class]
+            if detected_signal_type is None or confidence < self.min_confidence:
+                signal_types.append(None)
+            else:
+                signal_types.append(SIGNAL_TYPES[detected_signal_type])
+        return signal_types
@@ -0,0 +1,71 @@
+import numpy as np
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+DEFAULT_LOOKBACK = 32
+
+# Output columns of the model
+DEEP_SIGNAL_CLASSES = (None, "BUY", "SELL")
+
+
+class DeepSignalModel:
+    """Classifier over candle features, loaded from a NumPy weights file (.npz) or an ONNX model run on CPU.
+
+    Both take a (batch, lookback + 2) float32 feature matrix and return (batch, 3) logits for hold, buy and sell.
+    A weights file holds the lookback and the dense layers w0, b0, w1, b1... of a ReLU MLP.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.layers = None
+        self.session = None
+        if path.endswith('.onnx'):
+            if onnxruntime is None:
+                raise ImportError(f"onnxruntime is required to load the ONNX model {path}")
+            self.session = onnxruntime.InferenceSession(path, providers=['CPUExecutionProvider'])
+            self.input_name = self.session.get_inputs()[0].name
+            metadata = self.session.get_modelmeta().custom_metadata_map
+            self.lookback = int(metadata.get('lookback', DEFAULT_LOOKBACK))
+        else:
+            with np.load(path) as weights:
+                self.lookback = int(weights['lookback'])
+                self.layers = []
+                while f'w{len(self.layers)}' in weights:
+                    index = len(self.layers)
+                    self.layers.append((weights[f'w{index}'].astype(np.float32),
+                                        weights[f'b{index}'].astype(np.float32)))
+
+    def predict(self, features):
+        """Class probabilities of a (batch, features) matrix."""
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        if self.session is not None:
+            logits = self.session.run(None, {self.input_name: features})[0]
+        else:
+            logits = features
+            for index, (weights, bias) in enumerate(self.layers):
+                logits = logits @ weights + bias
+                if index < len(self.layers) - 1:
+                    np.maximum(logits, 0, out=logits)
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+
+def build_features(closes):
+    """Features of a (batch, lookback + 1) matrix of closes: volatility normalized log returns, log volatility and
+    the position of the last close in the lookback."""
+    returns = np.diff(np.log(closes), axis=1)
+    volatility = returns.std(axis=1, keepdims=True) + 1e-12
+    position = (closes[:, -1:] - closes.mean(axis=1, keepdims=True)) / (closes.std(axis=1, keepdims=True) + 1e-12)
+    return np.hstack([returns / volatility, np.log(volatility), position])
+
+
+def save_deep_signal_model(path, layers, lookback=DEFAULT_LOOKBACK):
+    arrays = {'lookback': np.array(lookback)}
+    for index, (weights, bias) in enumerate(layers):
+        arrays[f'w{index}'] = weights
+        arrays[f'b{index}'] = bias
+    np.savez(path, **arrays)
@@ -4,6 +4,7 @@ import threading
 from decimal import Decimal
 
 from signal_detector.abstract_signal_detector import AbstractSignalDetector
+from signal_detector.indicator.range_tracker import RangeTracker
 from signal_detector.model.GridSignal import GridSignal
 from signal_detector.model.Signal import Signal
 from signal_detector.model.signal_type import SIGNAL_TYPE_GRID_CONFIG
@@ -16,6 +17,7 @@ class GridSignalDetector(AbstractSignalDetector):
         self.klines_queue = queue.Queue(maxsize=1000)
         self.min_price = None
         self.max_price = None
+        self.range_tracker = RangeTracker()
 
     def start(self):
 
@@ -38,8 +40,8 @@ class GridSignalDetector(AbstractSignalDetector):
                 if message is None:
                     break
                 logging.debug(f"process_klines_update : klines update received for symbol {self.symbol}")
-                self.init_prices(message)
-                self.build_and_send_message()
+                if self.update_prices(message.window):
+                    self.build_and_send_message()
             except queue.Empty:
                 continue
             except Exception as e:
@@ -48,23 +50,26 @@ class GridSignalDetector(AbstractSignalDetector):
                     exc_info=True)
                 self.klines_queue.task_done()
 
-    def init_prices(self, data):
-        if self.min_price is None and self.max_price is None:
-            logging.debug("detect_signal : Start detecting signal")
-            try:
-                min_price = Decimal(data[0][3])
-                max_price = Decimal(data[0][2])
-                for item in data:
-                    low_price = Decimal(item[3])
-                    high_price = Decimal(item[2])
-                    if low_price < min_price:
-                        min_price = low_price
-                    elif high_price > max_price:
-                        max_price = high_price
-                self.min_price = min_price
-                self.max_price = max_price
-            except Exception as e:
-                logging.error(f"An error occurred while detecting reverse mean signal for symbol {self.symbol}")
+    def update_prices(self, window):
+        # Follows the range of the klines window, True only when it actually moved
+        try:
+            self.range_tracker.update(window)
+            min_price = self.range_tracker.min()
+            max_price = self.range_tracker.max()
+            if min_price is None:
+                return False
+            min_price = Decimal(repr(min_price))
+            max_price = Decimal(repr(max_price))
+            if min_price == self.min_price and max_price == self.max_price:
+                return False
+            logging.debug(f"update_prices : Range of {self.symbol} moved to [{min_price}, {max_price}]")
+            self.min_price = min_price
+            self.max_price = max_price
+            return True
+        except Exception as e:
+            logging.error(f"update_prices : An error occurred while updating the price range for symbol {self.symbol}",
+                          exc_info=True)
+            return False
 
     def process_price_update_message(self):
 
@@ -85,9 +90,12 @@ class GridSignalDetector(AbstractSignalDetector):
                 self.price_queue.task_done()
 
     def detect_signal(self):
-        if (self.min_price is not None and self.max_price is not None and
-                self.last_price < self.min_price or self.max_price < self.last_price):
+        if self.min_price is None or self.max_price is None:
+            return
+        if self.last_price < self.min_price or self.max_price < self.last_price:
             self.build_and_send_message()
+        else:
+            self.clear_signal_state()
 
     def build_and_send_message(self):
         message = GridSignal(
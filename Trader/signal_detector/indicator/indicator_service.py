@@ -0,0 +1,68 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from signal_detector.indicator.indicators import build_indicator_series
+
+MAX_CACHED_SERIES = 1024
+
+
+class IndicatorService:
+    """Indicator series shared by every detector, keyed by symbol, interval, indicator and parameters.
+
+    The klines pipeline feeds each new window once and every cached series of that symbol and interval advances
+    incrementally. Detectors asking for the same series read the same cached value, and the least recently read
+    series are evicted past `max_series`.
+    """
+
+    def __init__(self, max_series=MAX_CACHED_SERIES):
+        self.max_series = max_series
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.__series = OrderedDict()
+        self.__series_keys = {}
+        self.__windows = {}
+        self.__lock = threading.Lock()
+
+    def update(self, window):
+        window_key = (window.symbol, window.period)
+        with self.__lock:
+            # Windows reach the service from the klines manager and from every detector, only newer ones count
+            last_window = self.__windows.get(window_key)
+            if last_window is not None and window.version <= last_window.version:
+                return
+            self.__windows[window_key] = window
+            for key in self.__series_keys.get(window_key, ()):
+                self.__series[key].update(window)
+
+    def read(self, symbol, interval, indicator, last_value=None, **params):
+        """Latest value of a series, None until enough candles were seen. `last_value` stands in for the open
+        candle's close, e.g. the last traded price."""
+        key = (symbol, interval, indicator, tuple(sorted(params.items())))
+        with self.__lock:
+            series = self.__series.get(key)
+            if series is None:
+                window = self.__windows.get((symbol, interval))
+                if window is None:
+                    return None
+                self.misses += 1
+                series = build_indicator_series(indicator, **params)
+                series.update(window)
+                self.__add(key, series)
+            else:
+                self.hits += 1
+                self.__series.move_to_end(key)
+            return series.value(last_value=last_value)
+
+    def __add(self, key, series):
+        self.__series[key] = series
+        self.__series_keys.setdefault(key[:2], set()).add(key)
+        while len(self.__series) > self.max_series:
+            evicted_key, evicted_series = self.__series.popitem(last=False)
+            self.__series_keys[evicted_key[:2]].discard(evicted_key)
+            self.evicted += 1
+            logging.debug(f"__add : Evicted indicator series {evicted_key}")
+
+    def __len__(self):
+        return len(self.__series)
@@ -0,0 +1,226 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from signal_detector.indicator.rolling_stats import RollingStats
+
+INDICATOR_SMA = 'SMA'
+INDICATOR_EMA = 'EMA'
+INDICATOR_STD = 'STD'
+INDICATOR_BOLLINGER = 'BOLLINGER'
+INDICATOR_RSI = 'RSI'
+INDICATOR_ATR = 'ATR'
+
+
+class IndicatorSeries(ABC):
+    """Indicator over a klines window, advanced with the candles that changed since the previous update.
+
+    The last candle of a window is still open, so every series can replace its last input, and its value can be
+    read with a tick standing in for the open candle's close without touching the series.
+    """
+
+    # Candles needed to bootstrap the series, None meaning the whole window
+    warmup = None
+
+    def __init__(self):
+        self.open_time = None
+
+    def update(self, window):
+        if len(window) == 0:
+            return
+        position = None
+        if self.open_time is not None:
+            position = int(np.searchsorted(window.open_time, self.open_time))
+            if position == len(window) or window.open_time[position] != self.open_time:
+                position = None
+        if position is None:
+            self.reset()
+            start = 0 if self.warmup is None else max(0, len(window) - self.warmup)
+            for index in range(start, len(window)):
+                self.push(self.inputs(window, index))
+        else:
+            self.replace_last(self.inputs(window, position))
+            for index in range(position + 1, len(window)):
+                self.push(self.inputs(window, index))
+        self.open_time = int(window.open_time[-1])
+
+    def inputs(self, window, index):
+        return float(window.close[index])
+
+    @abstractmethod
+    def reset(self):
+        pass
+
+    @abstractmethod
+    def push(self, inputs):
+        pass
+
+    @abstractmethod
+    def replace_last(self, inputs):
+        pass
+
+    @abstractmethod
+    def value(self, last_value=None):
+        pass
+
+
+class RollingSeries(IndicatorSeries):
+
+    def __init__(self, length):
+        super().__init__()
+        self.length = length
+        self.warmup = length
+        self.stats = None
+
+    def reset(self):
+        self.stats = RollingStats(window=self.length)
+
+    def push(self, inputs):
+        self.stats.push(inputs)
+
+    def replace_last(self, inputs):
+        self.stats.replace_last(inputs)
+
+
+class SmaSeries(RollingSeries):
+
+    def value(self, last_value=None):
+        if not self.stats.is_ready():
+            return None
+        return self.stats.bands(num_std=0, last_value=last_value)[1]
+
+
+class StdSeries(RollingSeries):
+
+    def value(self, last_value=None):
+        if not self.stats.is_ready():
+            return None
+        lower_band, middle_band, upper_band = self.stats.bands(num_std=1, last_value=last_value)
+        return upper_band - middle_band
+
+
+class BollingerSeries(RollingSeries):
+
+    def __init__(self, length, num_std):
+        super().__init__(length)
+        self.num_std = num_std
+
+    def value(self, last_value=None):
+        if not self.stats.is_ready():
+            return None
+        return self.stats.bands(num_std=self.num_std, last_value=last_value)
+
+
+class RecursiveSeries(IndicatorSeries):
+    """Series whose state folds every candle in turn, kept as the state before the open candle plus its inputs."""
+
+    def __init__(self, length):
+        super().__init__()
+        self.length = length
+        self.state = None
+        self.last_inputs = None
+
+    def reset(self):
+        self.state = None
+        self.last_inputs = None
+
+    def push(self, inputs):
+        if self.last_inputs is not None:
+            self.state = self.step(self.state, self.last_inputs)
+        self.last_inputs = inputs
+
+    def replace_last(self, inputs):
+        self.last_inputs = inputs
+
+    def value(self, last_value=None):
+        if self.last_inputs is None:
+            return None
+        inputs = self.last_inputs if last_value is None else self.tick_inputs(last_value)
+        return self.output(self.step(self.state, inputs))
+
+    def tick_inputs(self, last_value):
+        return last_value
+
+    @abstractmethod
+    def step(self, state, inputs):
+        pass
+
+    @abstractmethod
+    def output(self, state):
+        pass
+
+
+class EmaSeries(RecursiveSeries):
+
+    def step(self, state, close):
+        if state is None:
+            return close, 1
+        ema, count = state
+        return ema + (close - ema) * 2 / (self.length + 1), count + 1
+
+    def output(self, state):
+        ema, count = state
+        return ema if count >= self.length else None
+
+
+class RsiSeries(RecursiveSeries):
+    """Relative strength index with Wilder's smoothing."""
+
+    def step(self, state, close):
+        if state is None:
+            return close, 0.0, 0.0, 0
+        previous_close, average_gain, average_loss, count = state
+        change = close - previous_close
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        if count == 0:
+            return close, gain, loss, 1
+        return (close, average_gain + (gain - average_gain) / self.length,
+                average_loss + (loss - average_loss) / self.length, count + 1)
+
+    def output(self, state):
+        previous_close, average_gain, average_loss, count = state
+        if count < self.length:
+            return None
+        if average_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+
+
+class AtrSeries(RecursiveSeries):
+    """Average true range with Wilder's smoothing."""
+
+    def inputs(self, window, index):
+        return float(window.high[index]), float(window.low[index]), float(window.close[index])
+
+    def tick_inputs(self, last_value):
+        high, low, close = self.last_inputs
+        return max(high, last_value), min(low, last_value), last_value
+
+    def step(self, state, inputs):
+        high, low, close = inputs
+        if state is None:
+            return close, high - low, 1
+        previous_close, atr, count = state
+        true_range = max(high - low, abs(high - previous_close), abs(low - previous_close))
+        return close, atr + (true_range - atr) / self.length, count + 1
+
+    def output(self, state):
+        previous_close, atr, count = state
+        return atr if count >= self.length else None
+
+
+def build_indicator_series(indicator, length, num_std=2):
+    if indicator == INDICATOR_SMA:
+        return SmaSeries(length)
+    if indicator == INDICATOR_STD:
+        return StdSeries(length)
+    if indicator == INDICATOR_BOLLINGER:
+        return BollingerSeries(length, num_std)
+    if indicator == INDICATOR_EMA:
+        return EmaSeries(length)
+    if indicator == INDICATOR_RSI:
+        return RsiSeries(length)
+    if indicator == INDICATOR_ATR:
+        return AtrSeries(length)
+    raise ValueError(f"Unknown indicator {indicator}")
@@ -0,0 +1,76 @@
+from collections import deque
+
+import numpy as np
+
+
+class RangeTracker:
+    """Lowest low and highest high of a klines window, kept in monotonic deques of (open_time, value).
+
+    The deques are derived vectorized from the window on the first update, then advanced with the candles that
+    arrived and trimmed of those that rolled off the window start, so an update costs O(1) amortized.
+    """
+
+    def __init__(self):
+        self.lows = deque()
+        self.highs = deque()
+        self.open_time = None
+        self.last_low = None
+        self.last_high = None
+
+    def update(self, window):
+        if len(window) == 0:
+            return
+        position = None
+        if self.open_time is not None:
+            position = int(np.searchsorted(window.open_time, self.open_time))
+            if position == len(window) or window.open_time[position] != self.open_time:
+                position = None
+        if position is None or not self.__replace_last(float(window.low[position]), float(window.high[position])):
+            self.__rebuild(window)
+        else:
+            for index in range(position + 1, len(window)):
+                self.__push(int(window.open_time[index]), float(window.low[index]), float(window.high[index]))
+            first_open_time = window.open_time[0]
+            while self.lows[0][0] < first_open_time:
+                self.lows.popleft()
+            while self.highs[0][0] < first_open_time:
+                self.highs.popleft()
+        self.open_time = int(window.open_time[-1])
+
+    def min(self):
+        return self.lows[0][1] if self.lows else None
+
+    def max(self):
+        return self.highs[0][1] if self.highs else None
+
+    def __rebuild(self, window):
+        self.lows = deque(zip(*self.__monotonic(window.open_time, window.low, np.minimum, np.less)))
+        self.highs = deque(zip(*self.__monotonic(window.open_time, window.high, np.maximum, np.greater)))
+        self.last_low = float(window.low[-1])
+        self.last_high = float(window.high[-1])
+
+    def __monotonic(self, open_time, values, accumulate, compare):
+        # A candle stays in the deque while no later candle is at least as extreme
+        suffix = accumulate.accumulate(values[::-1])[::-1]
+        kept = np.append(compare(values[:-1], suffix[1:]), True)
+        return open_time[kept].tolist(), values[kept].tolist()
+
+    def __push(self, open_time, low, high):
+        while self.lows and self.lows[-1][1] >= low:
+            self.lows.pop()
+        self.lows.append((open_time, low))
+        while self.highs and self.highs[-1][1] <= high:
+            self.highs.pop()
+        self.highs.append((open_time, high))
+        self.last_low = low
+        self.last_high = high
+
+    def __replace_last(self, low, high):
+        # An open candle only widens, a narrower correction needs the candles its previous value evicted
+        if low > self.last_low or high < self.last_high:
+            return False
+        open_time = self.lows[-1][0]
+        self.lows.pop()
+        self.highs.pop()
+        self.__push(open_time, low, high)
+        return True
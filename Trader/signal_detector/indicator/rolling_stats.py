@@ -0,0 +1,87 @@
+import math
+from collections import deque
+
+REANCHOR_INTERVAL = 1000
+
+
+class RollingStats:
+    """O(1) rolling mean and sample standard deviation over the last `window` values.
+
+    Sums are kept relative to an anchor close to the data (shifted data algorithm), which avoids the
+    cancellation of naive sum of squares. The anchor and sums are recomputed exactly every
+    `reanchor_interval` updates so that rounding errors cannot accumulate.
+    """
+
+    def __init__(self, window, reanchor_interval=REANCHOR_INTERVAL):
+        self.window = window
+        self.reanchor_interval = reanchor_interval
+        self.values = deque(maxlen=window)
+        self.anchor = 0.0
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.updates = 0
+
+    def push(self, value):
+        if not self.values:
+            self.anchor = value
+        if len(self.values) == self.window:
+            self.__remove(self.values[0])
+        self.values.append(value)
+        self.__add(value)
+        self.__count_update()
+
+    def replace_last(self, value):
+        self.__remove(self.values[-1])
+        self.values[-1] = value
+        self.__add(value)
+        self.__count_update()
+
+    def is_ready(self):
+        return len(self.values) == self.window
+
+    def mean(self):
+        return self.anchor + self.sum / len(self.values)
+
+    def std(self):
+        return self.__std(self.sum, self.sum_sq, len(self.values))
+
+    def bands(self, num_std, last_value=None):
+        # Bands of the window with its last value replaced, without touching the window itself
+        total = self.sum
+        total_sq = self.sum_sq
+        if last_value is not None:
+            removed = self.values[-1] - self.anchor
+            added = last_value - self.anchor
+            total += added - removed
+            total_sq += added * added - removed * removed
+        count = len(self.values)
+        mean = self.anchor + total / count
+        deviation = self.__std(total, total_sq, count) * num_std
+        return mean - deviation, mean, mean + deviation
+
+    def __std(self, total, total_sq, count):
+        if count < 2:
+            return float('nan')
+        variance = (total_sq - total * total / count) / (count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def __add(self, value):
+        shifted = value - self.anchor
+        self.sum += shifted
+        self.sum_sq += shifted * shifted
+
+    def __remove(self, value):
+        shifted = value - self.anchor
+        self.sum -= shifted
+        self.sum_sq -= shifted * shifted
+
+    def __count_update(self):
+        self.updates += 1
+        if self.updates % self.reanchor_interval == 0:
+            self.reanchor()
+
+    def reanchor(self):
+        count = len(self.values)
+        self.anchor = math.fsum(self.values) / count
+        self.sum = math.fsum(value - self.anchor for value in self.values)
+        self.sum_sq = math.fsum((value - self.anchor) ** 2 for value in self.values)
@@ -1,24 +1,31 @@
 import logging
 import queue
 import threading
-from decimal import Decimal
-
-import pandas as pd
 
 from signal_detector.abstract_signal_detector import AbstractSignalDetector
+from signal_detector.indicator.indicator_service import IndicatorService
+from signal_detector.indicator.indicators import INDICATOR_BOLLINGER
 from signal_detector.model.Signal import Signal
 from signal_detector.model.signal_type import SIGNAL_TYPE_BUY
 
 
 class ReverseMeanSignalDetector(AbstractSignalDetector):
 
-    def __init__(self, app_config, symbol):
+    def __init__(self, app_config, symbol, evaluate_on_tick=False, indicator_service=None, batch=False):
         super().__init__(app_config=app_config, symbol=symbol, type='ReverseMeanSignalDetector')
         self.klines_queue = queue.Queue(maxsize=1000)
+        self.evaluate_on_tick = evaluate_on_tick
+        # In batch mode klines go to a BatchReverseMeanEvaluator shared by every symbol of the interval
+        self.batch = batch
+        self.indicator_service = indicator_service if indicator_service is not None else IndicatorService()
+        self.bollinger_window = 20
+        self.bollinger_num_std = 2
+        self.interval = None
 
     def start(self):
         super().start()
-        self.init_klines_handling()
+        if not self.batch:
+            self.init_klines_handling()
 
     def init_klines_handling(self):
         t = threading.Thread(
@@ -36,7 +43,7 @@ class ReverseMeanSignalDetector(AbstractSignalDetector):
                 if message is None:
                     break
                 logging.debug(f"process_klines_update : klines update received for symbol {self.symbol}")
-                self.detect_signal(message)
+                self.detect_signal(message.window)
             except queue.Empty:
                 continue
             except Exception as e:
@@ -45,55 +52,62 @@ class ReverseMeanSignalDetector(AbstractSignalDetector):
                     exc_info=True)
                 self.klines_queue.task_done()
 
-    def detect_signal(self, data):
+    def detect_signal(self, window):
         logging.debug("detect_signal : Start detecting signal")
         try:
-            klines = self.compute_klines(data)
-            bollinger_data = self.update_bollinger_bands(klines, window=20, num_std=2)
-
-            last_row = bollinger_data.iloc[-1]
-            last_close = Decimal(str(last_row['close']))
-            lower_band = Decimal(str(last_row['Lower_Band']))
-            middle_band = Decimal(str(last_row['MA']))
-
-            detected_signal_type = None
-            if last_close < lower_band:
-                detected_signal_type = "BUY"
-            elif last_close > middle_band:
-                detected_signal_type = "SELL"
-            if detected_signal_type is not None:
-                message = Signal(
-                    detector=self.type,
-                    symbol=self.symbol,
-                    signal_type=SIGNAL_TYPE_BUY,
-                    price=self.last_price
-                )
-                self.notify_consumers(message)
+            # A no-op when the klines pipeline already fed this window to the shared indicator service
+            self.indicator_service.update(window)
+            self.interval = window.period
+            self.evaluate_bands(last_close=float(window.close[-1]))
         except Exception as e:
             logging.error(f"An error occurred while detecting reverse mean signal for symbol {self.symbol}")
 
-    def update_bollinger_bands(self, data: pd.DataFrame, window: int = 20, num_std: int = 2):
-
-        data['MA'] = data['close'].rolling(window=window).mean()
-        data['STD'] = data['close'].rolling(window=window).std()
-        data['Upper_Band'] = data['MA'] + (data['STD'] * num_std)
-        data['Lower_Band'] = data['MA'] - (data['STD'] * num_std)
-        return data
+    def detect_signal_on_tick(self):
+        if self.interval is None:
+            return
+        self.evaluate_bands(last_close=float(self.last_price), tick=True)
+
+    def compute_signal_type(self, last_close, tick=False):
+        bands = self.indicator_service.read(self.symbol, self.interval, INDICATOR_BOLLINGER,
+                                            last_value=last_close if tick else None,
+                                            length=self.bollinger_window, num_std=self.bollinger_num_std)
+        if bands is None:
+            return None
+        lower_band, middle_band, upper_band = bands
+        if last_close < lower_band:
+            return "BUY"
+        if last_close > middle_band:
+            return "SELL"
+        return None
+
+    def evaluate_bands(self, last_close, tick=False):
+        detected_signal_type = self.compute_signal_type(last_close, tick=tick)
+        if detected_signal_type is None:
+            self.clear_signal_state()
+        else:
+            message = Signal(
+                detector=self.type,
+                symbol=self.symbol,
+                signal_type=SIGNAL_TYPE_BUY,
+                price=self.last_price
+            )
+            self.notify_consumers(message)
+
+    def process_price_update_message(self):
 
-    def compute_klines(self, data):
-        columns = [
-            'timestamp', 'open', 'high', 'low', 'close', 'volume',
-            'close_time', 'quote_asset_volume', 'trades',
-            'taker_base_vol', 'taker_quote_vol', 'ignore'
-        ]
-        data = pd.DataFrame(data, columns=columns)
-
-        # Convert relevant columns to numeric
-        for col in ['open', 'high', 'low', 'close', 'volume']:
-            data[col] = pd.to_numeric(data[col])
-
-        # Use timestamp as datetime index
-        data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
-        data.set_index('timestamp', inplace=True)
-
-        return data[['open', 'high', 'low', 'close', 'volume']]
+        while not self.stop_event.is_set():
+            try:
+                message = self.price_queue.get(timeout=1)
+                if message is None:
+                    break
+                self.last_price = message['last_price']
+                if self.evaluate_on_tick:
+                    self.detect_signal_on_tick()
+                self.price_queue.task_done()
+            except queue.Empty:
+                continue
+            except Exception as e:
+                logging.error(
+                    f"process_price_update_message : Error processing price message for symbol {self.symbol}: {e}",
+                    exc_info=True)
+                self.price_queue.task_done()
@@ -0,0 +1,23 @@
+from manager.price_qos import build_price_qos_policy
+from signal_detector.deep_signal_detector import DeepSignalDetector
+from signal_detector.grid_signal_detector import GridSignalDetector
+from signal_detector.reverse_mean_signal_detector import ReverseMeanSignalDetector
+from signal_detector.signal_gate import build_signal_gate
+
+
+def build_signal_detector(app_config, config, indicator_service=None, batch=None):
+    if batch is None:
+        batch = config.batch
+    if config.detector == 'ReverseMeanSignalDetector':
+        detector = ReverseMeanSignalDetector(symbol=config.symbol, app_config=app_config,
+                                             evaluate_on_tick=config.evaluate_on_tick,
+                                             indicator_service=indicator_service, batch=batch)
+    elif config.detector == 'GridSignalDetector':
+        detector = GridSignalDetector(symbol=config.symbol, app_config=app_config)
+    elif config.detector == 'DeepSignalDetector':
+        detector = DeepSignalDetector(symbol=config.symbol, app_config=app_config)
+    else:
+        return None
+    detector.price_queue.qos = build_price_qos_policy(config.price_qos)
+    detector.signal_gate = build_signal_gate(config.signal_gate)
+    return detector
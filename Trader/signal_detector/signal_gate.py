@@ -0,0 +1,67 @@
+import logging
+import threading
+import time
+
+SUPPRESSED_REPORT_INTERVAL = 1000
+
+
+class SignalGate:
+    """Per-detector filter between a detector and its consumers, suppressing redundant signals.
+
+    on_change lets a signal through only when it opens a new state, i.e. its type differs from the last emitted one
+    or the detector cleared the state since. min_interval bounds the rate per signal type, and coalesce drops a
+    signal identical to the last one emitted with its type.
+    """
+
+    def __init__(self, on_change=False, min_interval=None, coalesce=False):
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.coalesce = coalesce
+        self.state = None
+        self.last_times = {}
+        self.last_payloads = {}
+        self.emitted = 0
+        self.suppressed = {'state': 0, 'interval': 0, 'coalesced': 0}
+        self.__lock = threading.Lock()
+
+    def accept(self, message, now=None):
+        if now is None:
+            now = time.monotonic()
+        with self.__lock:
+            reason = self.__suppression_reason(message, now)
+            if reason is not None:
+                self.suppressed[reason] += 1
+                total = sum(self.suppressed.values())
+                if total % SUPPRESSED_REPORT_INTERVAL == 0:
+                    logging.info(f"accept : {total} signals suppressed for symbol {message.symbol} and detector "
+                                 f"{message.detector} {self.suppressed}, {self.emitted} emitted")
+                return False
+            self.state = message.type
+            self.last_times[message.type] = now
+            self.last_payloads[message.type] = dict(vars(message))
+            self.emitted += 1
+            return True
+
+    def clear(self):
+        with self.__lock:
+            self.state = None
+
+    def __suppression_reason(self, message, now):
+        if self.on_change and self.state == message.type:
+            return 'state'
+        last_time = self.last_times.get(message.type)
+        if self.min_interval is not None and last_time is not None and now - last_time < self.min_interval:
+            return 'interval'
+        if self.coalesce and self.last_payloads.get(message.type) == vars(message):
+            return 'coalesced'
+        return None
+
+
+def build_signal_gate(signal_gate_config):
+    if signal_gate_config is None:
+        return None
+    return SignalGate(
+        on_change=signal_gate_config.on_change,
+        min_interval=signal_gate_config.min_interval,
+        coalesce=signal_gate_config.coalesce
+    )
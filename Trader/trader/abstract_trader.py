@@ -1,26 +1,38 @@
+import copy
 import logging
 import queue
 import threading
 import time
+import uuid
 from abc import ABC, abstractmethod
+from concurrent.futures import Future
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, ROUND_FLOOR
+
+from binance.error import ClientError
 
-from binance.spot import Spot
 from date.date_util import get_current_date, compute_duration_until_now
+from manager.order_gateway import (OrderBatch, OrderRequest, PRIORITY_BUY, PRIORITY_CANCEL, PRIORITY_QUERY,
+                                   PRIORITY_SELL, WEIGHT_CANCEL, WEIGHT_CANCEL_REPLACE, WEIGHT_QUERY)
+from manager.order_router import order_key
+from manager.order_snapshot import ERROR_UNKNOWN_ORDER
+from manager.symbol_filters import DEFAULT_QUOTE_QUANTUM, ERROR_FILTER_FAILURE, format_decimal
 from trader.model.trade import Trade
+from utils.conflating_mailbox import ConflatingMailbox
 
 STATUS_BUY_OPEN = 'buy-open'
 STATUS_FILLED = 'filled'
 STATUS_CLOSED = 'closed'
 STATUS_SALE_OPEN = 'sale-open'
+STATUS_CANCELED = 'canceled'
+ORDER_FINAL_STATUSES = ('FILLED', 'CANCELED', 'REJECTED', 'EXPIRED', 'EXPIRED_IN_MATCH')
 
 
 class AbstractTrader(ABC):
 
-    def __init__(self, api_config, name, database_manager, trader):
+    def __init__(self, api_config, name, database_manager, trader, client=None):
         self.last_price = None
-        self.price_queue = queue.Queue(maxsize=1000)
+        self.price_queue = ConflatingMailbox()
         self.stop_event = threading.Event()
         self.threads = []
         self.signal_queue = queue.Queue(maxsize=1000)
@@ -35,13 +47,58 @@ class AbstractTrader(ABC):
         self.name = name
         self.database_manager = database_manager
         self.trader = trader
-
-    def start(self):
+        self.trader_config = None
+        self.client = client
+        self.order_router = None
+        # Open orders of the trader by order id, the router sends it the execution reports of these orders only
+        self.orders = {}
+        # Orders sent by the trader by client order id, until their final execution report
+        self.client_orders = {}
+        # Serializes order acknowledgements from the gateway workers with the execution reports, it only guards
+        # state in memory, the database round trips run on the writer thread
+        self.order_lock = threading.RLock()
+        # Copies of the trades and trader to write, queued under the order lock so they are written in that order
+        self.write_queue = queue.Queue()
+        self.writer = None
+        # Gateway shared by every trader, assigned by the trader manager
+        self.order_gateway = None
+        # Exchange filters of the traded symbols, assigned by the trader manager
+        self.symbol_filters = None
+
+    def load_trades(self):
         self.current_trades = self.database_manager.load_trades_by_trader(self.trader.id)
-        self.__init_client()
+        for trade in self.current_trades:
+            if trade.status == STATUS_BUY_OPEN:
+                self.__track_open_order(trade.buy_id, trade.buy_client_id, trade)
+            elif trade.status == STATUS_SALE_OPEN:
+                self.__track_open_order(trade.sale_id, trade.sale_client_id, trade)
+
+    def __track_open_order(self, order_id, client_order_id, trade):
+        if order_id is not None:
+            self.track_order(order_id, trade)
+        if client_order_id is not None:
+            self.track_client_order(client_order_id, trade)
+
+    def open_order_ids(self):
+        # Order ids and client order ids of the open orders of the trades, fetched in bulk at startup
+        order_ids = []
+        client_order_ids = []
+        for trade in self.current_trades:
+            if trade.status == STATUS_BUY_OPEN:
+                order_ids.append(trade.buy_id)
+                client_order_ids.append(trade.buy_client_id)
+            elif trade.status == STATUS_SALE_OPEN:
+                order_ids.append(trade.sale_id)
+                client_order_ids.append(trade.sale_client_id)
+        return order_ids, client_order_ids
+
+    def start(self, orders=None):
+        # The trades are loaded beforehand, orders holds the orders of the symbol fetched in bulk by the manager
         self.init_price_handling()
         self.init_signal_handling()
-        self.sync_orders()
+        self.reconcile_orders(orders or {})
+        with self.order_lock:
+            self.init_write_handling()
         self.init_order_update_handling()
 
     def process_price_update_message(self):
@@ -73,12 +130,15 @@ class AbstractTrader(ABC):
     def buy_fees(self):
         try:
             quantity = Decimal('0.0000001') * Decimal('1000')
-            order = self.client.new_order(
-                symbol=self.trader.symbol,
-                side='BUY',
-                type='MARKET',
-                quantity=str(quantity)
-            )
+            order = self.order_gateway.call(OrderRequest(
+                name='fees buy order',
+                submit=lambda: self.client.new_order(
+                    symbol=self.trader.symbol,
+                    side='BUY',
+                    type='MARKET',
+                    quantity=str(quantity)
+                ),
+                priority=PRIORITY_BUY))
 
             fills = order.get('fills', [])
             total_cost = Decimal('0')
@@ -95,73 +155,472 @@ class AbstractTrader(ABC):
         except Exception as e:
             logging.error(f"Error placing buy order: {e}")
 
-    def __init_client(self):
-        credentials = self.api_config.credentials
-        trades_base_url = self.api_config.trades_config.base_url
-        self.client = Spot(
-            api_key=credentials.api_key,
-            api_secret=credentials.secret,
-            base_url=trades_base_url)
-
     def open_position(self, price=None):
-        try:
-            quantity = Decimal(str(self.trader.trade_quantity))
-            order_price = price
-            if order_price is None:
-                order_price = self.last_price
-            # Place a market buy order using Binance API
-            remote_order = self.client.new_order(symbol=self.trader.symbol,
-                                                 side='buy',
+        trades = self.open_positions([price])
+        return trades[0]
+
+    def open_positions(self, prices):
+        # Trades are recorded before the exchange acknowledges their orders, the gateway reconciles them afterwards
+        # and the batch is written again in one write once every order is answered
+        trades = []
+        for price in prices:
+            trade = None
+            try:
+                order_price = price
+                if order_price is None:
+                    order_price = self.last_price
+                trade = self.__reserve_trade(order_price)
+            except Exception as e:
+                logging.error(f"An Error occurred when opening buy position by trader {self.name}: {e}")
+            trades.append(trade)
+        reserved = [trade for trade in trades if trade is not None]
+        batch = OrderBatch(len(reserved), self.on_buy_orders_placed)
+        self.__send_after_write(name=f'{len(reserved)} buy trades write',
+                                write=lambda: self.__save_trades(reserved),
+                                requests=[self.__buy_request(trade, batch) for trade in reserved],
+                                priority=PRIORITY_BUY)
+        return trades
+
+    def __send_after_write(self, name, write, requests, priority):
+        # The trades are written with the client order ids of their orders before these are sent, on a gateway
+        # worker, so an order sent right before a crash is found again at startup
+        if not requests:
+            return
+
+        def send():
+            try:
+                written = write()
+            except Exception as e:
+                logging.error(f"__send_after_write : Error writing {name} by trader {self.name}: {e}")
+                written = False
+            for request in requests:
+                if not written:
+                    request.on_failure('trades could not be written')
+                elif not self.order_gateway.submit(request):
+                    request.on_failure('order gateway is full')
+
+        if not self.order_gateway.submit(OrderRequest(name=name, submit=send, priority=priority, weight=0,
+                                                      orders=0)):
+            for request in requests:
+                request.on_failure('order gateway is full')
+
+    def __save_trades(self, trades):
+        with self.order_lock:
+            written = self.queue_write(trades, insert=True)
+        trade_ids = written.result()
+        with self.order_lock:
+            for trade, trade_id in zip(trades, trade_ids):
+                trade.id = trade_id
+        return all(trade_id is not None for trade_id in trade_ids)
+
+    def __update_trades(self, trades):
+        with self.order_lock:
+            written = self.queue_write(trades)
+        return written.result()
+
+    def queue_write(self, trades, trader=False, insert=False):
+        # Called under the order lock. Returns a future of the trade ids for an insert, of the update result otherwise
+        written = Future()
+        self.write_queue.put(([copy.copy(trade) for trade in trades], copy.copy(self.trader) if trader else None,
+                              insert, written))
+        self.init_write_handling()
+        return written
+
+    def init_write_handling(self):
+        if self.writer is not None:
+            return
+        self.writer = threading.Thread(
+            target=self.process_write_message,
+            args=(),
+            daemon=True
+        )
+        self.writer.start()
+        self.threads.append(self.writer)
+
+    def process_write_message(self):
+
+        while not self.stop_event.is_set():
+            try:
+                message = self.write_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            trades, trader, insert, written = message
+            try:
+                if insert:
+                    self.database_manager.save_trades(trades=trades)
+                    result = [trade.id for trade in trades]
+                else:
+                    result = self.database_manager.update_trades(trades=trades) if trades else True
+                if trader is not None:
+                    self.database_manager.update_trader(trader=trader)
+                written.set_result(result)
+            except Exception as e:
+                logging.error(f"process_write_message : Error writing {len(trades)} trades by trader {self.name}: {e}")
+                written.set_exception(e)
+            self.write_queue.task_done()
+
+    def __reserve_trade(self, order_price):
+        # Orders are sent rounded to the tick and step of the symbol filters, what they reserve is exact
+        filters = self.symbol_filters.get(self.trader.symbol)
+        if filters is None:
+            logging.warning(f"__reserve_trade : Filters of symbol {self.trader.symbol} not loaded yet, no order sent "
+                            f"by trader {self.name}")
+            return None
+        price = filters.round_price(order_price, 'BUY')
+        quantity = filters.round_quantity(self.trader.trade_quantity)
+        if not filters.is_tradable(price, quantity):
+            logging.warning(f"__reserve_trade : Order of {self.trader.trade_quantity} at {order_price} does not pass "
+                            f"the filters of symbol {self.trader.symbol}, trader {self.name}")
+            return None
+        order_reserved_amount = price * quantity
+
+        trade = Trade()
+        trade.buy_client_id = self.new_client_order_id()
+        trade.open_date = get_current_date()
+        trade.quantity = quantity
+        trade.order_price = price
+        trade.detected_price = self.last_price
+        trade.status = STATUS_BUY_OPEN
+        trade.reserved_amount = order_reserved_amount
+        trade.trader_id = self.trader.id
+
+        self.free_slots -= 1
+        self.trader.total_reserved_amount += order_reserved_amount
+        self.current_trades.append(trade)
+        self.track_client_order(trade.buy_client_id, trade)
+        return trade
+
+    def __buy_request(self, trade, batch):
+        # The trade holds the rounded price and quantity, the filters are not looked up again
+        client_order_id = trade.buy_client_id
+        price = format_decimal(trade.order_price)
+        quantity = format_decimal(trade.quantity)
+        return OrderRequest(
+            name=f'buy order {client_order_id}',
+            submit=lambda: self.client.new_order(symbol=self.trader.symbol,
+                                                 side='BUY',
                                                  type='LIMIT',
-                                                 quantity=str(quantity),
+                                                 quantity=quantity,
                                                  timeInForce='GTC',
-                                                 price=str(order_price))
-
-            # Extract order details
+                                                 price=price,
+                                                 newClientOrderId=client_order_id),
+            on_success=lambda remote_order: self.on_buy_order_placed(trade, remote_order, batch),
+            on_failure=lambda error: self.on_buy_order_failed(trade, error, batch),
+            priority=PRIORITY_BUY)
+
+    def on_buy_order_placed(self, trade, remote_order, batch):
+        with self.order_lock:
             order_id = remote_order['orderId']
-            order_reserved_amount = self.last_price * quantity
-
-            trade = Trade()
+            # A fill report can beat the acknowledgement, the order is then already done
+            if trade.buy_id is None and trade.buy_client_id in self.client_orders:
+                self.track_order(order_id, trade)
             trade.buy_id = order_id
-            trade.open_date = get_current_date()
-            trade.quantity = quantity
-            trade.detected_price = self.last_price
-            trade.status = STATUS_BUY_OPEN
-            trade.reserved_amount = order_reserved_amount
-            trade.trader_id = self.trader.id
-
-            self.free_slots -= 1
-            self.trader.total_reserved_amount += order_reserved_amount
-            self.current_trades.append(trade)
-            logging.info(f"open_position : A new order opened with id {order_id} by trader {self.name}")
-            self.database_manager.save_trade(trade=trade)
-            self.database_manager.update_trader(trader=self.trader)
-            return trade
+            logging.info(f"on_buy_order_placed : A new order opened with id {order_id} by trader {self.name}")
+        batch.done(trade)
 
-        except Exception as e:
-            logging.error(f"An Error occurred when opening buy position by trader {self.name}: {e}")
+    def on_buy_orders_placed(self, trades):
+        if not trades:
+            return
+        with self.order_lock:
+            self.queue_write(trades, trader=True)
 
-    def close_position(self, trade, price=None):
+    def on_buy_order_failed(self, trade, error, batch):
+        try:
+            with self.order_lock:
+                logging.error(f"on_buy_order_failed : An Error occurred when opening buy position by trader "
+                              f"{self.name}: {error}")
+                self.__check_filters(error)
+                self.untrack_client_order(trade.buy_client_id)
+                trade.status = STATUS_CANCELED
+                self.__release_trade(trade)
+                self.on_position_failed(trade)
+        finally:
+            # A written trade is written again as canceled, the batch completes even if the trader failed
+            batch.done(trade if trade.id is not None else None)
+
+    def __check_filters(self, error):
+        # Filters changed on the exchange side, they are reloaded for the next orders
+        if getattr(error, 'error_code', None) == ERROR_FILTER_FAILURE:
+            self.symbol_filters.invalidate(self.trader.symbol)
+
+    def __release_trade(self, trade):
+        if trade in self.current_trades:
+            self.current_trades.remove(trade)
+            self.free_slots += 1
+            self.trader.total_reserved_amount -= trade.reserved_amount
+
+    def on_position_failed(self, trade):
+        pass
+
+    def on_position_moved(self, trade):
+        pass
+
+    def on_position_move_failed(self, trade):
+        pass
+
+    def on_position_cancel_failed(self, trade):
+        pass
+
+    def on_position_sale_failed(self, trade):
+        pass
 
-        if trade.status == STATUS_FILLED:
+    def close_position(self, trade, price=None):
+        self.close_positions([(trade, price)])
+
+    def close_positions(self, positions):
+        # Sale orders of (trade, price) pairs, trades that are not filled are skipped
+        positions = [(trade, price) for trade, price in positions if trade.status == STATUS_FILLED]
+        filters = self.symbol_filters.get(self.trader.symbol) if positions else None
+        if positions and filters is None:
+            logging.warning(f"close_positions : Filters of symbol {self.trader.symbol} not loaded yet, "
+                            f"{len(positions)} sale orders not sent by trader {self.name}")
+            for trade, _ in positions:
+                self.on_position_sale_failed(trade)
+            return
+        batch = OrderBatch(len(positions), self.on_sell_orders_placed)
+        requests = []
+        for trade, price in positions:
             order_price = price
             if order_price is None:
                 order_price = self.last_price
-            try:
-                remote_order = self.client.new_order(symbol=self.trader.symbol,
-                                                     side='SELL',
-                                                     type='LIMIT',
-                                                     quantity=str(trade.quantity),
-                                                     timeInForce='GTC',
-                                                     price=str(order_price))
-                order_id = remote_order['orderId']
-                trade.sale_id = order_id
-                trade.status = STATUS_SALE_OPEN
-                logging.info(
-                    f"close_position : Sale order opened with buy-id {trade.buy_id} and sale_id {trade.sale_id} by trader {self.name}")
-                self.database_manager.update_trade(trade=trade)
-            except Exception as e:
-                logging.error(f"Erreur lors de la vente by trader {self.name}: {e}")
+            order_price = format_decimal(filters.round_price(order_price, 'SELL'))
+            # A buy canceled after a partial fill only holds what it bought
+            bought = trade.quantity_filled if trade.quantity_filled is not None else trade.quantity
+            quantity = format_decimal(filters.round_quantity(bought))
+            client_order_id = self.new_client_order_id()
+            trade.sale_client_id = client_order_id
+            trade.status = STATUS_SALE_OPEN
+            self.track_client_order(client_order_id, trade)
+            requests.append(OrderRequest(
+                name=f'sell order {client_order_id}',
+                submit=lambda order_price=order_price, quantity=quantity, client_order_id=client_order_id:
+                self.client.new_order(symbol=self.trader.symbol,
+                                      side='SELL',
+                                      type='LIMIT',
+                                      quantity=quantity,
+                                      timeInForce='GTC',
+                                      price=order_price,
+                                      newClientOrderId=client_order_id),
+                on_success=lambda remote_order, trade=trade: self.on_sell_order_placed(trade, remote_order, batch),
+                on_failure=lambda error, trade=trade: self.on_sell_order_failed(trade, error, batch),
+                priority=PRIORITY_SELL))
+        trades = [trade for trade, _ in positions]
+        self.__send_after_write(name=f'{len(trades)} sell trades write',
+                                write=lambda: self.__update_trades(trades),
+                                requests=requests,
+                                priority=PRIORITY_SELL)
+
+    def on_sell_order_placed(self, trade, remote_order, batch):
+        with self.order_lock:
+            order_id = remote_order['orderId']
+            if trade.sale_id is None and trade.sale_client_id in self.client_orders:
+                self.track_order(order_id, trade)
+            trade.sale_id = order_id
+            logging.info(
+                f"on_sell_order_placed : Sale order opened with buy-id {trade.buy_id} and sale_id {trade.sale_id} by "
+                f"trader {self.name}")
+        batch.done(trade)
+
+    def on_sell_orders_placed(self, trades):
+        if not trades:
+            return
+        with self.order_lock:
+            self.queue_write(trades)
+
+    def on_sell_order_failed(self, trade, error, batch):
+        try:
+            with self.order_lock:
+                logging.error(f"on_sell_order_failed : Erreur lors de la vente by trader {self.name}: {error}")
+                self.__check_filters(error)
+                self.untrack_client_order(trade.sale_client_id)
+                trade.sale_client_id = None
+                if trade.status == STATUS_SALE_OPEN:
+                    trade.status = STATUS_FILLED
+                    self.on_position_sale_failed(trade)
+        finally:
+            batch.done(trade)
+
+    def replace_positions(self, positions):
+        # Moves the open buy orders of (trade, price) pairs in one cancel-replace each, sent in parallel, for the
+        # quantity the trades still have to buy. Trades with too little left to buy are canceled instead
+        skipped = [trade for trade, _ in positions if trade.status != STATUS_BUY_OPEN or trade.buy_id is None]
+        positions = [(trade, price) for trade, price in positions
+                     if trade.status == STATUS_BUY_OPEN and trade.buy_id is not None]
+        for trade in skipped:
+            self.on_position_move_failed(trade)
+        filters = self.symbol_filters.get(self.trader.symbol) if positions else None
+        if positions and filters is None:
+            logging.warning(f"replace_positions : Filters of symbol {self.trader.symbol} not loaded yet, "
+                            f"{len(positions)} orders not moved by trader {self.name}")
+            for trade, _ in positions:
+                self.on_position_move_failed(trade)
+            return
+        moves = []
+        canceled = []
+        for trade, price in positions:
+            price = filters.round_price(price, 'BUY')
+            quantity = self.__remaining_quantity(trade, filters)
+            if filters.is_tradable(price, quantity):
+                moves.append((trade, price, quantity))
+            else:
+                canceled.append(trade)
+        for trade in canceled:
+            self.on_position_move_failed(trade)
+        self.cancel_positions(canceled)
+        batch = OrderBatch(len(moves), self.on_buy_orders_updated)
+        requests = []
+        for trade, price, quantity in moves:
+            order_price = format_decimal(price)
+            order_quantity = format_decimal(quantity)
+            client_order_id = self.new_client_order_id()
+            # The trade is written with the client order id of the new order, the old one is kept to roll back
+            replaced_client_id = trade.buy_client_id
+            trade.buy_client_id = client_order_id
+            requests.append(OrderRequest(
+                name=f'buy order replace {trade.buy_id}',
+                submit=lambda trade=trade, order_price=order_price, quantity=order_quantity,
+                client_order_id=client_order_id:
+                self.client.cancel_and_replace(symbol=self.trader.symbol,
+                                               side='BUY',
+                                               type='LIMIT',
+                                               cancelReplaceMode='STOP_ON_FAILURE',
+                                               cancelOrderId=trade.buy_id,
+                                               quantity=quantity,
+                                               timeInForce='GTC',
+                                               price=order_price,
+                                               newClientOrderId=client_order_id),
+                on_success=lambda response, trade=trade, price=price, quantity=quantity,
+                replaced_client_id=replaced_client_id:
+                self.on_order_replaced(trade, price, quantity, replaced_client_id, response, batch),
+                on_failure=lambda error, trade=trade, replaced_client_id=replaced_client_id:
+                self.on_order_replace_failed(trade, replaced_client_id, error, batch),
+                priority=PRIORITY_CANCEL,
+                weight=WEIGHT_CANCEL_REPLACE))
+            # The new order is tracked before it is sent, its reports can beat the response
+            self.track_client_order(client_order_id, trade)
+        trades = [trade for trade, _, _ in moves]
+        self.__send_after_write(name=f'{len(trades)} replaced trades write',
+                                write=lambda: self.__update_trades(trades),
+                                requests=requests,
+                                priority=PRIORITY_CANCEL)
+
+    def on_order_replaced(self, trade, price, quantity, replaced_client_id, response, batch):
+        oversized = False
+        try:
+            with self.order_lock:
+                self.untrack_order(trade.buy_id)
+                self.untrack_client_order(replaced_client_id)
+                trade.buy_id = response['newOrderResponse']['orderId']
+                # The fill report of the new order can beat this response, the reservation is then already released
+                if trade.status == STATUS_BUY_OPEN:
+                    reserved_amount = price * quantity
+                    trade.order_price = price
+                    self.trader.total_reserved_amount += reserved_amount - trade.reserved_amount
+                    trade.reserved_amount = reserved_amount
+                    if trade.buy_client_id in self.client_orders:
+                        self.track_order(trade.buy_id, trade)
+                logging.info(f"on_order_replaced : Buy order replaced by order {trade.buy_id} at {price} by trader "
+                             f"{self.name}")
+                # What the canceled order bought is held, the new one was sent for that much too many
+                kept = self.__keep_fills(trade, response.get('cancelResponse'))
+                oversized = kept and trade.status == STATUS_BUY_OPEN
+                self.on_position_moved(trade)
+        finally:
+            batch.done(trade)
+        if oversized:
+            # The new order is canceled rather than resized, the trade keeps what both orders bought
+            self.cancel_positions([trade])
+
+    def __keep_fills(self, trade, canceled_order):
+        if not canceled_order or Decimal(canceled_order.get('executedQty', '0')) <= 0:
+            return False
+        cost = self.__settle_buy(trade, cost=canceled_order['cummulativeQuoteQty'],
+                                 quantity_filled=canceled_order['executedQty'])
+        self.__update_capital('buy', cost)
+        logging.info(f"__keep_fills : {canceled_order['executedQty']} bought by canceled order "
+                     f"{canceled_order.get('orderId')} kept by trader {self.name}")
+        return True
+
+    def on_order_replace_failed(self, trade, replaced_client_id, error, batch):
+        try:
+            with self.order_lock:
+                # With STOP_ON_FAILURE the old order stays when its cancel fails, it is only gone when the new one
+                # failed
+                data = getattr(error, 'error_data', None) or {}
+                if data.get('cancelResult') == 'SUCCESS' and trade.status == STATUS_BUY_OPEN:
+                    self.untrack_client_order(replaced_client_id)
+                    self.__end_buy(trade, data.get('cancelResponse') or {})
+                else:
+                    logging.error(f"on_order_replace_failed : Error replacing buy order {trade.buy_id} by trader "
+                                  f"{self.name}: {error}")
+                    self.__check_filters(error)
+                    self.untrack_client_order(trade.buy_client_id)
+                    trade.buy_client_id = replaced_client_id
+                self.on_position_move_failed(trade)
+        finally:
+            batch.done(trade)
+
+    def on_buy_orders_updated(self, trades):
+        if not trades:
+            return
+        with self.order_lock:
+            self.queue_write(trades, trader=True)
+
+    def cancel_positions(self, trades):
+        # Cancels the open buy orders of the trades and releases what they reserved, what they bought is kept
+        trades = [trade for trade in trades if trade.status == STATUS_BUY_OPEN and trade.buy_id is not None]
+        batch = OrderBatch(len(trades), self.on_buy_orders_updated)
+        for trade in trades:
+            request = OrderRequest(
+                name=f'buy order cancel {trade.buy_id}',
+                submit=lambda trade=trade: self.client.cancel_order(symbol=self.trader.symbol, orderId=trade.buy_id),
+                on_success=lambda canceled_order, trade=trade: self.on_order_canceled(trade, canceled_order, batch),
+                on_failure=lambda error, trade=trade: self.on_order_cancel_failed(trade, error, batch),
+                priority=PRIORITY_CANCEL,
+                weight=WEIGHT_CANCEL,
+                orders=0)
+            if not self.order_gateway.submit(request):
+                self.on_order_cancel_failed(trade, 'order gateway is full', batch)
+
+    def on_order_canceled(self, trade, canceled_order, batch):
+        canceled = None
+        try:
+            with self.order_lock:
+                if trade.status == STATUS_BUY_OPEN:
+                    canceled = trade
+                    self.__end_buy(trade, canceled_order)
+        finally:
+            batch.done(canceled)
+
+    def __end_buy(self, trade, canceled_order):
+        # A buy canceled after it bought part of its quantity, now or before a replace, keeps what it bought
+        if Decimal(canceled_order.get('executedQty', '0')) > 0 or trade.quantity_filled:
+            self.sync_buy_order(trade, {'cummulativeQuoteQty': canceled_order.get('cummulativeQuoteQty', '0'),
+                                        'executedQty': canceled_order.get('executedQty', '0')})
+        else:
+            self.__cancel_trade(trade)
+
+    def on_order_cancel_failed(self, trade, error, batch):
+        # The order most likely filled meanwhile, its execution report updates the trade
+        try:
+            logging.error(f"on_order_cancel_failed : Error canceling buy order {trade.buy_id} by trader {self.name}: "
+                          f"{error}")
+            with self.order_lock:
+                self.on_position_cancel_failed(trade)
+        finally:
+            batch.done()
+
+    def __cancel_trade(self, trade):
+        self.untrack_order(trade.buy_id)
+        self.untrack_client_order(trade.buy_client_id)
+        trade.status = STATUS_CANCELED
+        self.__release_trade(trade)
+        self.on_position_failed(trade)
+        logging.info(f"__cancel_trade : Buy order {trade.buy_id} canceled by trader {self.name}")
+
+    def new_client_order_id(self):
+        # At most 36 characters, unique across traders sharing the account
+        return f'{self.trader.id}-{uuid.uuid4().hex[:24]}'
 
     def init_order_update_handling(self):
         t = threading.Thread(
@@ -180,22 +639,8 @@ class AbstractTrader(ABC):
                 if message is None:
                     break
                 if message['e'] == 'executionReport':
-                    order_id = message['i']
-                    logging.info(f"process_order_update_message : order update received for id {order_id}")
-                    for trade in self.current_trades:
-                        if trade.status != STATUS_FILLED and (trade.buy_id == order_id or trade.sale_id == order_id):
-                            status = message['X']
-                            logging.info(f"process_order_update_message : status {status} for id {order_id}")
-                            order_type = message['S']
-                            logging.info(f"process_order_update_message : order type {order_type} for id {order_id}")
-                            if status == 'FILLED':
-                                if order_type == 'BUY':
-                                    self.update_buy_position(message=message, trade=trade)
-                                elif order_type == 'SELL':
-                                    self.update_sell_position(message=message, trade=trade)
-                                else:
-                                    logging.warning(
-                                        f"process_order_update_message : unknown order type {order_type} for id {order_id}")
+                    with self.order_lock:
+                        self.handle_execution_report(message)
                 self.order_queue.task_done()
             except queue.Empty:
                 continue
@@ -203,20 +648,70 @@ class AbstractTrader(ABC):
                 logging.error(f"Error processing message for : {e}", exc_info=True)
                 self.order_queue.task_done()
 
+    def handle_execution_report(self, message):
+        order_id = message['i']
+        logging.info(f"process_order_update_message : order update received for id {order_id}")
+        trade = self.orders.get(order_key(order_id))
+        if trade is None:
+            trade = self.client_orders.get(message.get('c')) or self.client_orders.get(message.get('C'))
+        if trade is not None:
+            status = message['X']
+            order_type = message['S']
+            if status in ORDER_FINAL_STATUSES:
+                self.untrack_order(order_id)
+                self.untrack_client_order(message.get('c'))
+                self.untrack_client_order(message.get('C'))
+            # The report can beat the acknowledgement of the order
+            if order_type == 'BUY' and trade.buy_id is None:
+                trade.buy_id = order_id
+            elif order_type == 'SELL' and trade.sale_id is None:
+                trade.sale_id = order_id
+            if trade.status != STATUS_FILLED:
+                logging.info(f"process_order_update_message : status {status} for id {order_id}")
+                logging.info(f"process_order_update_message : order type {order_type} for id {order_id}")
+                if status == 'FILLED':
+                    if order_type == 'BUY':
+                        self.update_buy_position(message=message, trade=trade)
+                    elif order_type == 'SELL':
+                        self.update_sell_position(message=message, trade=trade)
+                    else:
+                        logging.warning(
+                            f"process_order_update_message : unknown order type {order_type} for id {order_id}")
+
+    def track_order(self, order_id, trade):
+        self.orders[order_key(order_id)] = trade
+        if self.order_router is not None:
+            self.order_router.register(order_id, self.order_queue)
+
+    def untrack_order(self, order_id):
+        if order_id is None:
+            return
+        self.orders.pop(order_key(order_id), None)
+        if self.order_router is not None:
+            self.order_router.unregister(order_id)
+
+    def track_client_order(self, client_order_id, trade):
+        self.client_orders[client_order_id] = trade
+        if self.order_router is not None:
+            self.order_router.register_client_order(client_order_id, self.order_queue)
+
+    def untrack_client_order(self, client_order_id):
+        if client_order_id is None:
+            return
+        self.client_orders.pop(client_order_id, None)
+        if self.order_router is not None:
+            self.order_router.unregister_client_order(client_order_id)
+
     def update_buy_position(self, message, trade):
 
         try:
-            trade.cost = Decimal(message['Z'])
+            cost = self.__settle_buy(trade, cost=message['Z'], quantity_filled=message['z'])
             trade.buy_commission = Decimal(message['n'])
-            quantity_filled = Decimal(message['z'])
-            trade.quantity_filled = quantity_filled
-            trade.buy_price = trade.cost / quantity_filled
             trade.status = STATUS_FILLED
             self.trader.total_reserved_amount -= trade.reserved_amount
-            self.__update_capital('buy', trade.cost)
+            self.__update_capital('buy', cost)
             logging.info(f"update_buy_order : Trade updated by trader {self.name}. Buy order executed successfully")
-            self.database_manager.update_trade(trade=trade)
-            self.database_manager.update_trader(trader=self.trader)
+            self.queue_write([trade], trader=True)
         except Exception as e:
             logging.error("update_buy_order")
 
@@ -230,26 +725,50 @@ class AbstractTrader(ABC):
             start_datetime = datetime.strptime(trade.open_date, "%d/%m/%YT%H:%M")
             trade.duration = compute_duration_until_now(start_datetime)
             trade.sale_timestamp = time.time()
-            total_sale_amount = Decimal(message['Z'])
-            trade.sale_fees = total_sale_amount * self.trading_fee_percentage
-            trade.profit = total_sale_amount - trade.cost - trade.sale_fees - self.fees_to_cover
+            self.__settle_sale(trade, message['Z'])
             trade.status = STATUS_CLOSED
 
-            self.__update_capital(action='sell', total=total_sale_amount - trade.sale_fees)
             self.trade_history.append(trade)
             self.current_trades.remove(trade)
             if trade.profit > 0:
                 logging.info(f"update_sale_order : trade closed with profit {trade.profit} by trader {self.name}")
             if trade.profit < 0:
                 logging.info(f"update_sale_order : trade closed with loss {trade.profit} by trader {self.name}")
-            self.database_manager.update_trade(trade=trade)
             self.trader.profit += trade.profit
-            self.database_manager.update_trader(trader=self.trader)
+            self.queue_write([trade], trader=True)
 
         except Exception as e:
             logging.error(
                 f'update_sale_order : An error occurred while updating order {trade.sale_id} with message {message}')
 
+    def __settle_buy(self, trade, cost, quantity_filled):
+        # Fills add up with those of the orders the trade had before a replace, the average price rounds down to the
+        # quote precision. Returns the cost of this order
+        order_cost = Decimal(cost)
+        trade.cost = order_cost + (trade.cost or 0)
+        trade.quantity_filled = Decimal(quantity_filled) + (trade.quantity_filled or 0)
+        if trade.quantity_filled:
+            trade.buy_price = self.__round_quote(trade.cost / trade.quantity_filled)
+        return order_cost
+
+    def __round_quote(self, amount):
+        # Settlements never wait on the filters, the exchange quote precision stands in until they are loaded
+        filters = self.symbol_filters.get(self.trader.symbol)
+        if filters is None:
+            return amount.quantize(DEFAULT_QUOTE_QUANTUM, rounding=ROUND_FLOOR)
+        return filters.round_quote(amount)
+
+    def __remaining_quantity(self, trade, filters):
+        # Quantity still to buy, the fills of the orders a replace canceled are already held
+        return filters.round_quantity(trade.quantity - (trade.quantity_filled or 0))
+
+    def __settle_sale(self, trade, total_sale_amount):
+        # Fees round down to the quote precision, the other amounts are exact
+        total_sale_amount = Decimal(total_sale_amount)
+        trade.sale_fees = self.__round_quote(total_sale_amount * self.trading_fee_percentage)
+        trade.profit = total_sale_amount - trade.cost - trade.sale_fees - self.fees_to_cover
+        self.__update_capital(action='sell', total=total_sale_amount - trade.sale_fees)
+
     def __update_capital(self, action, total):
 
         if action == 'buy':
@@ -271,48 +790,129 @@ class AbstractTrader(ABC):
         pass
 
     def sync_buy_order(self, trade, message):
-        trade.cost = Decimal(message['cummulativeQuoteQty'])
-        trade.quantity_filled = Decimal(message['executedQty'])
-        trade.buy_price = Decimal(message['price'])
+        self.untrack_order(trade.buy_id)
+        self.untrack_client_order(trade.buy_client_id)
+        cost = self.__settle_buy(trade, cost=message['cummulativeQuoteQty'], quantity_filled=message['executedQty'])
         trade.status = STATUS_FILLED
         self.trader.total_reserved_amount -= trade.reserved_amount
-        self.__update_capital('buy', trade.cost)
+        self.__update_capital('buy', cost)
         logging.info(f"sync_buy_order : Trade updated by trader {self.name}. Buy order executed successfully")
-        self.database_manager.update_trade(trade=trade)
-        self.database_manager.update_trader(trader=self.trader)
 
     def sync_sell_order(self, trade, message):
+        self.untrack_order(trade.sale_id)
         trade.sailed_quantity = Decimal(message['executedQty'])
         trade.close_date = get_current_date()
         trade.sale_price = Decimal(message['price'])
         start_datetime = datetime.strptime(trade.open_date, "%d/%m/%YT%H:%M")
         trade.duration = compute_duration_until_now(start_datetime)
         trade.sale_timestamp = time.time()
-        total_sale_amount = Decimal(message['cummulativeQuoteQty'])
-        trade.sale_fees = total_sale_amount * self.trading_fee_percentage
-        trade.profit = total_sale_amount - trade.cost - trade.sale_fees - self.fees_to_cover
+        self.__settle_sale(trade, message['cummulativeQuoteQty'])
         trade.status = STATUS_CLOSED
 
-        self.__update_capital(action='sell', total=total_sale_amount - trade.sale_fees)
         self.trade_history.append(trade)
         self.current_trades.remove(trade)
         if trade.profit > 0:
             logging.info(f"sync_sell_order : trade closed with profit {trade.profit} by trader {self.name}")
         if trade.profit < 0:
             logging.info(f"sync_sell_order : trade closed with loss {trade.profit} by trader {self.name}")
-        self.database_manager.update_trade(trade=trade)
         self.trader.profit += trade.profit
-        self.database_manager.update_trader(trader=self.trader)
 
-    def sync_orders(self):
-        for trade in self.current_trades:
+    def reconcile_orders(self, orders):
+        # Settles the trades whose order ended while the trader was stopped, then writes them all at once.
+        # Orders missing from the bulk fetch are queried one by one
+        updated = []
+        for trade in list(self.current_trades):
             try:
-                if trade != STATUS_FILLED:
-                    if trade.status == STATUS_BUY_OPEN:
-                        order = self.client.get_order(symbol=self.trader.symbol, orderId=trade.buy_id)
-                        self.sync_buy_order(trade, order)
-                    elif trade.status == STATUS_SALE_OPEN:
-                        order = self.client.get_order(symbol=self.trader.symbol, orderId=trade.sale_id)
-                        self.sync_sell_order(trade, order)
+                if trade.status == STATUS_BUY_OPEN:
+                    order = self.__find_order(orders, trade.buy_id, trade.buy_client_id)
+                    if self.__reconcile_buy_order(trade, order):
+                        updated.append(trade)
+                elif trade.status == STATUS_SALE_OPEN:
+                    order = self.__find_order(orders, trade.sale_id, trade.sale_client_id)
+                    if self.__reconcile_sell_order(trade, order):
+                        updated.append(trade)
             except Exception as e:
-                logging.error(f"sync_orders : An error occurred while syncing trade {trade.id}")
+                logging.error(f"reconcile_orders : An error occurred while syncing trade {trade.id}: {e}")
+        if updated:
+            self.database_manager.update_trades(trades=updated)
+            self.database_manager.update_trader(trader=self.trader)
+        logging.info(f"reconcile_orders : {len(updated)} trades updated by trader {self.name}")
+
+    def __find_order(self, orders, order_id, client_order_id):
+        # The client order id is the one of the last order sent for the trade, its order id may be the one of the
+        # order it replaced or be missing when the trader stopped before the exchange answered
+        if client_order_id is not None:
+            order = orders.get(client_order_id) or self.get_order(client_order_id=client_order_id)
+            if order is not None:
+                return order
+        if order_id is not None:
+            return orders.get(order_key(order_id)) or self.get_order(order_id)
+        return None
+
+    def __reconcile_buy_order(self, trade, order):
+        if order is None:
+            # The order never reached the exchange
+            self.__cancel_trade(trade)
+            return True
+        adopted = self.__adopt_order(trade, order)
+        if order['status'] not in ORDER_FINAL_STATUSES:
+            return adopted
+        if order['status'] == 'FILLED':
+            self.sync_buy_order(trade, order)
+        else:
+            self.__end_buy(trade, order)
+        return True
+
+    def __reconcile_sell_order(self, trade, order):
+        if order is not None:
+            adopted = self.__adopt_order(trade, order)
+            if order['status'] not in ORDER_FINAL_STATUSES:
+                return adopted
+            if order['status'] == 'FILLED' or Decimal(order['executedQty']) > 0:
+                self.sync_sell_order(trade, order)
+                return True
+        # Nothing was sold, the position is held again and can be sold anew
+        self.untrack_order(trade.sale_id)
+        self.untrack_client_order(trade.sale_client_id)
+        trade.sale_id = None
+        trade.sale_client_id = None
+        trade.status = STATUS_FILLED
+        return True
+
+    def __adopt_order(self, trade, order):
+        # The trade follows the order found on the exchange, the one it was written with or the one it replaced
+        order_id = order['orderId']
+        client_order_id = order.get('clientOrderId')
+        if order['side'] == 'BUY':
+            if trade.buy_id is not None and order_key(trade.buy_id) == order_key(order_id) \
+                    and trade.buy_client_id == client_order_id:
+                return False
+            self.untrack_order(trade.buy_id)
+            self.untrack_client_order(trade.buy_client_id)
+            trade.buy_id = order_id
+            trade.buy_client_id = client_order_id
+        else:
+            if trade.sale_id is not None and order_key(trade.sale_id) == order_key(order_id) \
+                    and trade.sale_client_id == client_order_id:
+                return False
+            self.untrack_order(trade.sale_id)
+            self.untrack_client_order(trade.sale_client_id)
+            trade.sale_id = order_id
+            trade.sale_client_id = client_order_id
+        self.__track_open_order(order_id, client_order_id, trade)
+        return True
+
+    def get_order(self, order_id=None, client_order_id=None):
+        # None when the exchange does not know the order
+        try:
+            return self.order_gateway.call(OrderRequest(
+                name=f'order query {order_id or client_order_id}',
+                submit=lambda: self.client.get_order(symbol=self.trader.symbol, orderId=order_id,
+                                                     origClientOrderId=client_order_id),
+                priority=PRIORITY_QUERY,
+                weight=WEIGHT_QUERY,
+                orders=0))
+        except ClientError as e:
+            if e.error_code == ERROR_UNKNOWN_ORDER:
+                return None
+            raise
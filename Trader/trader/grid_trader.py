@@ -1,25 +1,42 @@
 import logging
 import queue
-import uuid
-from decimal import Decimal
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
 
 from signal_detector.model.signal_type import SIGNAL_TYPE_GRID_CONFIG
-from trader.abstract_trader import AbstractTrader, STATUS_FILLED
+from trader.abstract_trader import AbstractTrader, STATUS_BUY_OPEN, STATUS_CANCELED, STATUS_FILLED
 from trader.model.grid import Grid
+from trader.model.grid_book import GridBook
 
 
 class GridTrader(AbstractTrader):
 
-    def __init__(self, api_config, database_manager, trader):
+    def __init__(self, api_config, database_manager, trader, client=None):
         super().__init__(
             api_config=api_config,
             trader=trader,
             name='GridTrader-' + trader.symbol,
-            database_manager=database_manager)
-        self.grids = []
+            database_manager=database_manager,
+            client=client)
+        self.grids = GridBook()
+        self.active_grids = []
+        # Levels sit on a lattice of ends anchor + index * gap, the anchor being the first max price
+        self.grid_anchor = None
+        self.grid_bottom = None
+        self.grid_top = None
         self.min_price = None
         self.max_price = None
         self.trade_grid = {}
+        # Level id of each trade bound to a level, kept with trade_grid
+        self.trade_levels = {}
+        # Levels held for the orders being moved, bound once the exchange replaced them
+        self.pending_levels = {}
+        self.pending_grid_ids = set()
+        # Trades left without a level, with whether their order still has to be canceled
+        self.stranded = {}
+        # The price, signal and gateway threads all change the levels. The gateway callbacks free them while holding
+        # the order lock, sharing it keeps both locks taken in one order. It only guards state in memory, the
+        # trader writes to the database on its writer thread
+        self.grid_lock = self.order_lock
         self.max_trades = 20
 
     def process_signal_message(self):
@@ -41,22 +58,160 @@ class GridTrader(AbstractTrader):
                 self.signal_queue.task_done()
 
     def create_or_update_grids(self, min_price, max_price):
-        if self.min_price is None or self.max_price is None or self.min_price < min_price or self.max_price < max_price:
+        if self.min_price != min_price or self.max_price != max_price:
             self.min_price = min_price
             self.max_price = max_price
             self.recompute_grid()
 
     def recompute_grid(self):
-        current_max_level = self.max_price
-        self.grids.clear()
-        gap = self.trader_config.grid_gap
-        while current_max_level > self.min_price:
-            grid_id = str(uuid.uuid4())
-            grid = Grid(grid_id, start=current_max_level - gap, end=current_max_level)
-            current_max_level -= gap
-            self.grids.append(grid)
+        with self.grid_lock:
+            self.__recompute_grid()
+
+    def __recompute_grid(self):
+        # Moves the edges of the grid only, levels inside the range and levels bound to a trade are kept as is,
+        # except those only holding an open buy order, which moves to the new range
+        gap = Decimal(str(self.trader_config.grid_gap))
+        if self.grid_anchor is None:
+            self.grid_anchor = self.max_price
+        top = int(((self.max_price - self.grid_anchor) / gap).to_integral_value(rounding=ROUND_CEILING))
+        bottom = int(((self.min_price - self.grid_anchor) / gap).to_integral_value(rounding=ROUND_FLOOR)) + 1
+        count = len(self.grids)
+        grids = self.grids.grids
+        trim_top = 0
+        while trim_top < count and self.grid_top - trim_top > top and self.__is_movable(grids[count - 1 - trim_top]):
+            trim_top += 1
+        trim_bottom = 0
+        while (trim_bottom < count - trim_top and self.grid_bottom + trim_bottom < bottom
+               and self.__is_movable(grids[trim_bottom])):
+            trim_bottom += 1
+        moving = []
+        for grid in grids[:trim_bottom] + grids[count - trim_top:]:
+            trade = self.__unbind(grid.id)
+            if trade is not None and trade.status == STATUS_BUY_OPEN:
+                moving.append(trade)
+        if trim_bottom + trim_top == count:
+            # Nothing to keep, e.g. the first grid or a jump away from levels without trades
+            self.grids.rebuild([self.__build_grid(index, gap) for index in range(bottom, top + 1)])
+            self.grid_bottom = bottom
+            self.grid_top = top
+            self.active_grids = []
+            removed = count
+            added = len(self.grids)
+        else:
+            # Levels bound to a trade stay, and with them every level up to the new range
+            grid_bottom = self.grid_bottom + trim_bottom
+            grid_top = self.grid_top - trim_top
+            below = [self.__build_grid(index, gap) for index in range(bottom, grid_bottom)]
+            above = [self.__build_grid(index, gap) for index in range(grid_top + 1, top + 1)]
+            self.grids.replace_edges(trim_bottom=trim_bottom, trim_top=trim_top, bottom=below, top=above)
+            self.grid_bottom = min(bottom, grid_bottom)
+            self.grid_top = max(top, grid_top)
+            removed = trim_bottom + trim_top
+            added = len(below) + len(above)
+            if removed:
+                self.active_grids = [grid for grid in self.active_grids
+                                     if grid.start >= self.grids.bottom().start and grid.end <= self.grids.top().end]
+        self.__move_orders(moving)
         logging.info(
-            f'recompute_grid : Grid config recomputed successfully by trader {self.name} for symbol {self.trader_config.symbol}')
+            f'recompute_grid : Grid config recomputed by trader {self.name} for symbol {self.trader.symbol}, '
+            f'{added} levels added, {removed} removed, {len(moving)} orders moved, {len(self.grids)} levels')
+
+    def __move_orders(self, trades):
+        # Open buys of the removed levels go to the free levels nearest below the price in one batch of
+        # cancel-replace orders, those left without a level are canceled
+        if not trades:
+            return
+        levels = []
+        if self.last_price is not None:
+            for grid in self.grids.below(self.last_price):
+                if len(levels) == len(trades):
+                    break
+                if self.__is_free(grid):
+                    levels.append(grid)
+        for trade, grid in zip(trades, levels):
+            self.pending_levels[trade] = grid.id
+            self.pending_grid_ids.add(grid.id)
+        for trade in trades[len(levels):]:
+            self.stranded[trade] = False
+        self.replace_positions([(trade, grid.start) for trade, grid in zip(trades, levels)])
+        self.cancel_positions(trades[len(levels):])
+
+    def on_position_moved(self, trade):
+        with self.grid_lock:
+            grid_id = self.__release_level(trade)
+            if grid_id is not None:
+                self.__bind(grid_id, trade)
+
+    def on_position_move_failed(self, trade):
+        # The old order may still be open, or have bought, while its level is gone
+        with self.grid_lock:
+            if self.__release_level(trade) is not None:
+                self.stranded[trade] = True
+
+    def on_position_cancel_failed(self, trade):
+        with self.grid_lock:
+            if trade in self.stranded:
+                self.stranded[trade] = True
+
+    def on_position_sale_failed(self, trade):
+        # The level was freed when the sale was sent, the position takes a level again to be sold later
+        with self.grid_lock:
+            if trade not in self.trade_levels:
+                self.stranded[trade] = False
+
+    def __release_level(self, trade):
+        grid_id = self.pending_levels.pop(trade, None)
+        self.pending_grid_ids.discard(grid_id)
+        return grid_id
+
+    def __place_stranded(self):
+        # Open orders without a level are canceled again, positions they bought take the free level holding their
+        # buy price
+        cancels = []
+        for trade, cancel in list(self.stranded.items()):
+            if trade.status == STATUS_BUY_OPEN:
+                if cancel:
+                    self.stranded[trade] = False
+                    cancels.append(trade)
+            elif trade.status == STATUS_FILLED:
+                for grid in self.grids.find(trade.buy_price):
+                    if self.__is_free(grid):
+                        self.__bind(grid.id, trade)
+                        del self.stranded[trade]
+                        break
+            else:
+                del self.stranded[trade]
+        self.cancel_positions(cancels)
+
+    def __bind(self, grid_id, trade):
+        previous = self.trade_grid.get(grid_id)
+        if previous is not None and self.trade_levels.get(previous) == grid_id:
+            del self.trade_levels[previous]
+        self.trade_grid[grid_id] = trade
+        if trade is not None:
+            self.trade_levels[trade] = grid_id
+
+    def __unbind(self, grid_id):
+        trade = self.trade_grid.pop(grid_id, None)
+        if trade is not None and self.trade_levels.get(trade) == grid_id:
+            del self.trade_levels[trade]
+        return trade
+
+    def __build_grid(self, index, gap):
+        end = self.grid_anchor + index * gap
+        start = end - gap
+        return Grid(f'{self.trader.symbol}:{start}', start=start, end=end)
+
+    def __is_free(self, grid):
+        trade = self.trade_grid.get(grid.id)
+        return (trade is None or trade.status == STATUS_CANCELED) and grid.id not in self.pending_grid_ids
+
+    def __is_movable(self, grid):
+        # Acknowledged buy orders can be canceled or replaced, the level does not hold a position yet
+        if grid.id in self.pending_grid_ids:
+            return False
+        trade = self.trade_grid.get(grid.id)
+        return self.__is_free(grid) or (trade.status == STATUS_BUY_OPEN and trade.buy_id is not None)
 
     def process_price_update_message(self):
 
@@ -78,22 +233,43 @@ class GridTrader(AbstractTrader):
                 self.price_queue.task_done()
 
     def update_orders(self):
+        if self.stranded:
+            with self.grid_lock:
+                self.__place_stranded()
+        # Only the levels that held the previous price can have been crossed by this one
         if len(self.current_trades) < self.max_trades and len(self.grids) > 0:
-            for grid in self.grids:
-                if grid.in_price_range:
-                    if self.last_price < grid.start:
-                        if self.trade_grid.get(grid.id) is None:
-                            trade = self.open_position()
-                            self.trade_grid[grid.id] = trade
-                    if self.last_price > grid.end:
-                        trade = self.trade_grid.get(grid.id, None)
-                        if trade is not None and trade.status == STATUS_FILLED:
-                            self.close_position(trade=trade)
-                            self.trade_grid[grid.id] = None
+            with self.grid_lock:
+                opening = []
+                closing = []
+                for grid in self.active_grids:
+                    if grid.in_price_range:
+                        if self.last_price < grid.start:
+                            if self.__is_free(grid):
+                                opening.append(grid)
+                        if self.last_price > grid.end:
+                            trade = self.trade_grid.get(grid.id, None)
+                            if trade is not None and trade.status == STATUS_FILLED:
+                                closing.append((trade, None))
+                                self.__bind(grid.id, None)
+                if opening:
+                    for grid, trade in zip(opening, self.open_positions([None] * len(opening))):
+                        self.__bind(grid.id, trade)
+                if closing:
+                    self.close_positions(closing)
+
+    def on_position_failed(self, trade):
+        # The level of an order the exchange refused is free again
+        with self.grid_lock:
+            grid_id = self.trade_levels.pop(trade, None)
+            if grid_id is not None and self.trade_grid.get(grid_id) is trade:
+                self.trade_grid[grid_id] = None
+            self.__release_level(trade)
+            self.stranded.pop(trade, None)
 
     def update_grid_in_range(self):
-        for grid in self.grids:
-            if grid.start <= self.last_price <= grid.end:
-                grid.in_price_range = True
-            else:
+        with self.grid_lock:
+            for grid in self.active_grids:
                 grid.in_price_range = False
+            self.active_grids = self.grids.find(self.last_price)
+            for grid in self.active_grids:
+                grid.in_price_range = True
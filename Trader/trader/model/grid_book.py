@@ -0,0 +1,51 @@
+from bisect import bisect_right
+
+
+class GridBook:
+    """Grid levels sorted by start price in parallel arrays, so that the levels holding a price are found by
+    bisection instead of scanning the whole grid."""
+
+    def __init__(self):
+        self.starts = []
+        self.grids = []
+
+    def rebuild(self, grids):
+        grids = sorted(grids, key=lambda grid: grid.start)
+        # Swapped in one assignment each, readers keep a consistent view of the previous levels
+        self.starts, self.grids = [grid.start for grid in grids], grids
+
+    def clear(self):
+        self.rebuild([])
+
+    def replace_edges(self, trim_bottom=0, trim_top=0, bottom=(), top=()):
+        """Drops levels from both ends and adds the given sorted levels below and above the remaining ones."""
+        grids = list(bottom) + self.grids[trim_bottom:len(self.grids) - trim_top] + list(top)
+        self.starts, self.grids = [grid.start for grid in grids], grids
+
+    def bottom(self):
+        return self.grids[0] if self.grids else None
+
+    def top(self):
+        return self.grids[-1] if self.grids else None
+
+    def find(self, price):
+        """Levels whose [start, end] holds the price, two when it sits exactly on a shared boundary."""
+        starts, grids = self.starts, self.grids
+        index = bisect_right(starts, price) - 1
+        found = []
+        while index >= 0 and grids[index].end >= price:
+            found.append(grids[index])
+            index -= 1
+        return found
+
+    def below(self, price):
+        """Levels starting at or below the price, nearest first."""
+        starts, grids = self.starts, self.grids
+        for index in range(bisect_right(starts, price) - 1, -1, -1):
+            yield grids[index]
+
+    def __len__(self):
+        return len(self.grids)
+
+    def __iter__(self):
+        return iter(self.grids)
@@ -20,4 +20,9 @@ class Trade:
         self.sale_price = None
         self.duration = None
         self.sale_timestamp = None
-        self.sale_fees = None
\ No newline at end of file
+        self.sale_fees = None
+        # Client order ids generated by the trader, written before their orders are sent
+        self.buy_client_id = None
+        self.sale_client_id = None
+        # Price of the buy order rounded to the tick, not persisted
+        self.order_price = None
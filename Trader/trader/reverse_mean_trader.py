@@ -4,18 +4,17 @@ from trader.abstract_trader import STATUS_FILLED
 
 class ReverserMeanTrader(AbstractBasicTrader):
 
-    def __init__(self, api_config, database_manager, trader):
+    def __init__(self, api_config, database_manager, trader, client=None):
         super().__init__(
             api_config=api_config,
             name='ReverserMeanTrader-'+trader.symbol,
             database_manager=database_manager,
-            trader=trader
+            trader=trader,
+            client=client
         )
 
     def handle_sell_signal_logic(self, signal):
-        for trade in self.current_trades:
-            if trade.status == STATUS_FILLED:
-                self.close_position(trade=trade)
+        self.close_positions([(trade, None) for trade in self.current_trades if trade.status == STATUS_FILLED])
 
     def handle_buy_signal_logic(self, signal):
         if len(self.current_trades) == 0:
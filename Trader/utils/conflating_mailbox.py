@@ -0,0 +1,84 @@
+import queue
+import threading
+import time
+
+
+class ConflatingMailbox:
+    """Single-slot mailbox keeping only the latest value, with queue.Queue's get/put_nowait interface.
+
+    Prices offered through a qos policy it holds back are kept aside, get hands the last one out once the policy's
+    trailing time has come, so the consumer never stays on a stale price.
+    """
+
+    def __init__(self, qos=None):
+        self.qos = qos
+        self.__condition = threading.Condition(threading.Lock())
+        self.__value = None
+        self.__has_value = False
+        # Value and price of the last offer held back by the qos policy
+        self.__deferred = None
+        self.seq = 0
+        self.skipped = 0
+
+    def offer(self, value, price, now):
+        # The qos policy is only used under the mailbox lock, producers and the consumer both update it
+        with self.__condition:
+            if self.qos is None or self.qos.accept(price, now):
+                self.__put(value)
+            else:
+                self.__deferred = (value, price)
+                self.__condition.notify()
+
+    def put_nowait(self, value):
+        with self.__condition:
+            self.__put(value)
+
+    def __put(self, value):
+        if self.__has_value:
+            self.skipped += 1
+        self.__value = value
+        self.__has_value = True
+        self.__deferred = None
+        self.seq += 1
+        self.__condition.notify()
+
+    def put(self, value, block=True, timeout=None):
+        self.put_nowait(value)
+
+    def get(self, block=True, timeout=None):
+        with self.__condition:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self.__has_value:
+                now = time.monotonic()
+                trailing_time = None
+                if self.__deferred is not None:
+                    trailing_time = self.qos.trailing_time()
+                    if now >= trailing_time:
+                        value, price = self.__deferred
+                        self.__deferred = None
+                        if self.qos.release(price, now):
+                            return value
+                        continue
+                if not block or (deadline is not None and now >= deadline):
+                    raise queue.Empty
+                waits = [moment - now for moment in (deadline, trailing_time) if moment is not None]
+                self.__condition.wait(min(waits) if waits else None)
+            value = self.__value
+            self.__value = None
+            self.__has_value = False
+            return value
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self):
+        pass
+
+    def qsize(self):
+        return 1 if self.__has_value else 0
+
+    def empty(self):
+        return not self.__has_value
+
+    def full(self):
+        return False
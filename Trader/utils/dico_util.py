@@ -8,6 +8,8 @@ def merge_dicts(dict1, dict2):
                 merged_dict[key] += value
             else:
                 merged_dict[key] = [merged_dict[key], value]  # On met les valeurs dans une liste
+        elif isinstance(value, list):
+            merged_dict[key] = list(value)
         else:
             merged_dict[key] = [value]
 
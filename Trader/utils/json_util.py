@@ -0,0 +1,28 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(message):
+    if orjson is not None:
+        return orjson.loads(message)
+    return json.loads(message)
+
+
+def field_marker(field):
+    return '"' + field + '":"'
+
+
+def extract_string_field(message, marker, start=0):
+    # Cheap scan for a flat "field":"value" pair, avoiding a full parse of the message
+    index = message.find(marker, start)
+    if index < 0:
+        return None
+    index += len(marker)
+    end = message.find('"', index)
+    if end < 0:
+        return None
+    return message[index:end]